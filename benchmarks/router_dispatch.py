@@ -0,0 +1,67 @@
+"""Micro-benchmark: Router.dispatch overhead per event.
+
+Measures dispatch of a `message` event to three no-op handlers through 0, 5 and
+20 pass-through middlewares. Handlers and middlewares do no work, so the numbers
+are pure routing overhead.
+
+    python benchmarks/router_dispatch.py [--events N]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict
+
+from zebras.router import Router
+
+
+EVENT: Dict[str, Any] = {
+    "type": "event_callback",
+    "event_id": "Ev000",
+    "event": {"type": "message", "channel": "C1", "user": "U1", "text": "hi", "ts": "1.0"},
+}
+
+
+async def _handler(evt: Dict[str, Any]) -> None:
+    return None
+
+
+async def _middleware(evt: Dict[str, Any], nxt) -> None:
+    await nxt(evt)
+
+
+def _router(middlewares: int, concurrent: bool) -> Router:
+    router = Router(concurrent=concurrent)
+    for _ in range(middlewares):
+        router.add_middleware(_middleware)
+    for _ in range(3):
+        router.on("message", _handler)
+    return router
+
+
+async def _run(router: Router, n: int) -> float:
+    dispatch = router.dispatch
+    for _ in range(min(n, 1000)):  # warm up
+        await dispatch(EVENT)
+    start = time.perf_counter()
+    for _ in range(n):
+        await dispatch(EVENT)
+    return (time.perf_counter() - start) / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<12}{'middlewares':>12}{'us/event':>12}")
+    for concurrent in (False, True):
+        mode = "concurrent" if concurrent else "sequential"
+        for mws in (0, 5, 20):
+            per_event = asyncio.run(_run(_router(mws, concurrent), args.events))
+            print(f"{mode:<12}{mws:>12}{per_event * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
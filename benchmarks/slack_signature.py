@@ -0,0 +1,139 @@
+"""Micro-benchmark: per-request CPU cost of Slack request verification and parsing.
+
+Compares the previous path (decode the body into an f-string, re-encode, HMAC
+with a fresh key, then parse again with `request.json()` / `request.form()`)
+with the current one (`SlackSignatureVerifier` on raw bytes, body parsed once
+with orjson / parse_qsl). Run for an Events API JSON body and a slash command
+form body.
+
+    python benchmarks/slack_signature.py [--requests N] [--size BYTES]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import urlencode
+
+import orjson
+from fastapi import HTTPException, Request
+
+from zebras.http.app import SlackSignatureVerifier, parse_form
+
+
+SECRET = "8f742231b10e8888abcd99yyyzzz85a5"
+
+
+def _legacy_verify(req: Request, signing_secret: str, body: bytes) -> None:
+    ts = req.headers.get("X-Slack-Request-Timestamp")
+    sig = req.headers.get("X-Slack-Signature")
+    if not ts or not sig:
+        raise HTTPException(status_code=401, detail="Missing Slack signature")
+    if abs(time.time() - int(ts)) > 60 * 5:
+        raise HTTPException(status_code=401, detail="Stale request")
+    base = f"v0:{ts}:{body.decode()}".encode()
+    digest = hmac.new(signing_secret.encode(), base, hashlib.sha256).hexdigest()
+    expected = f"v0={digest}"
+    if not hmac.compare_digest(expected, sig):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+
+def _event_body(size: int, i: int) -> bytes:
+    text = "x" * max(0, size - 300)
+    return json.dumps({
+        "type": "event_callback",
+        "team_id": "T1",
+        "event_id": f"Ev{i:08d}",
+        "event": {"type": "message", "channel": "C1", "user": "U1", "text": text, "ts": "1.0"},
+    }).encode()
+
+
+def _command_body(size: int, i: int) -> bytes:
+    return urlencode({
+        "command": "/rules",
+        "text": "y" * max(0, size - 200),
+        "user_id": "U1",
+        "channel_id": "C1",
+        "trigger_id": f"{i:08d}",
+        "response_url": "https://hooks.slack.com/commands/T1/1/abc",
+    }).encode()
+
+
+def _requests(make_body: Callable[[int], bytes], content_type: str, n: int) -> List[Tuple[Request, bytes]]:
+    # Bodies differ per request (event id / trigger id) so the replay cache accepts them all.
+    ts = str(int(time.time()))
+    out = []
+    for i in range(n):
+        body = make_body(i)
+        sig = "v0=" + hmac.new(SECRET.encode(), b"v0:" + ts.encode() + b":" + body, hashlib.sha256).hexdigest()
+
+        async def receive(body: bytes = body) -> Dict[str, Any]:
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        req = Request({
+            "type": "http",
+            "method": "POST",
+            "headers": [
+                (b"x-slack-request-timestamp", ts.encode()),
+                (b"x-slack-signature", sig.encode()),
+                (b"content-type", content_type.encode()),
+            ],
+        }, receive)
+        out.append((req, body))
+    return out
+
+
+async def _legacy_event(req: Request, body: bytes) -> Any:
+    _legacy_verify(req, SECRET, body)
+    return await req.json()
+
+
+async def _legacy_command(req: Request, body: bytes) -> Any:
+    _legacy_verify(req, SECRET, body)
+    form = await req.form()
+    return {k: form.get(k) for k in form.keys()}
+
+
+def _current(parse: Callable[[bytes], Any]) -> Callable[[Request, bytes], Awaitable[Any]]:
+    verifier = SlackSignatureVerifier(SECRET, replay_size=1_000_000)
+
+    async def run(req: Request, body: bytes) -> Any:
+        verifier.verify(req, body)
+        return parse(body)
+
+    return run
+
+
+async def _time(fn: Callable[[Request, bytes], Awaitable[Any]], make_body: Callable[[int], bytes], content_type: str, n: int) -> float:
+    reqs = _requests(make_body, content_type, n)
+    for req, _ in reqs:
+        await req.body()  # the endpoint has already read the body in both versions
+    start = time.perf_counter()
+    for req, body in reqs:
+        await fn(req, body)
+    return (time.perf_counter() - start) / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--size", type=int, default=2_000, help="approximate body size in bytes")
+    args = parser.parse_args()
+
+    cases: List[Tuple[str, Callable[[int], bytes], str, Callable, Callable]] = [
+        ("events", lambda i: _event_body(args.size, i), "application/json", _legacy_event, _current(orjson.loads)),
+        ("commands", lambda i: _command_body(args.size, i), "application/x-www-form-urlencoded", _legacy_command, _current(parse_form)),
+    ]
+    print(f"{'endpoint':<10}{'bytes':>8}{'before us':>12}{'after us':>12}{'speedup':>10}")
+    for name, make_body, content_type, before, after in cases:
+        b = asyncio.run(_time(before, make_body, content_type, args.requests))
+        a = asyncio.run(_time(after, make_body, content_type, args.requests))
+        print(f"{name:<10}{len(make_body(0)):>8}{b * 1e6:>12.2f}{a * 1e6:>12.2f}{b / a:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""partition event_logs by month, composite indexes, daily rollups
+
+Revision ID: 0006_partition_event_logs
+Revises: 0005_auto_responder_rules
+Create Date: 2025-09-20 00:00:00
+
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0006_partition_event_logs"
+down_revision = "0005_auto_responder_rules"
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = "id, created_at, event_type, subtype, team_id, channel_id, user_id, message_ts, thread_ts, action, raw"
+
+# Partitions created up front beyond the current month; `zebras db maintain` keeps them coming.
+MONTHS_AHEAD = 2
+
+
+def _month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(dt: datetime) -> datetime:
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    op.execute("ALTER TABLE event_logs RENAME TO event_logs_legacy")
+    op.execute("ALTER INDEX event_logs_pkey RENAME TO event_logs_legacy_pkey")
+    op.execute("ALTER SEQUENCE event_logs_id_seq RENAME TO event_logs_legacy_id_seq")
+
+    op.execute(
+        """
+        CREATE TABLE event_logs (
+            id BIGSERIAL NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL,
+            event_type VARCHAR(64) NOT NULL,
+            subtype VARCHAR(64),
+            team_id VARCHAR(32),
+            channel_id VARCHAR(32),
+            user_id VARCHAR(32),
+            message_ts VARCHAR(32),
+            thread_ts VARCHAR(32),
+            action VARCHAR(64),
+            raw JSONB NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("CREATE TABLE event_logs_default PARTITION OF event_logs DEFAULT")
+
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM event_logs_legacy")).scalar()
+    now = datetime.now(timezone.utc)
+    start = _month_start(min(oldest, now) if oldest is not None else now)
+    last = _month_start(now)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while start <= last:
+        end = _next_month(start)
+        op.execute(
+            f"CREATE TABLE event_logs_p{start:%Y%m} PARTITION OF event_logs "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+    # Composite indexes in the shape of real queries (a filter plus a time range);
+    # they replace the four single-column indexes of 0001_initial.
+    op.execute("CREATE INDEX ix_event_logs_channel_created ON event_logs (channel_id, created_at)")
+    op.execute("CREATE INDEX ix_event_logs_user_created ON event_logs (user_id, created_at)")
+    op.execute("CREATE INDEX ix_event_logs_type_created ON event_logs (event_type, created_at)")
+
+    op.execute(f"INSERT INTO event_logs ({COLUMNS}) SELECT {COLUMNS} FROM event_logs_legacy")
+    op.execute("SELECT setval('event_logs_id_seq', COALESCE((SELECT max(id) FROM event_logs), 0) + 1, false)")
+    op.execute("DROP TABLE event_logs_legacy")
+
+    op.create_table(
+        "event_log_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("channel_id", sa.String(length=32), nullable=False, server_default=""),
+        sa.Column("event_type", sa.String(length=64), nullable=False),
+        sa.Column("events", sa.BigInteger(), nullable=False),
+        sa.Column("users", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "channel_id", "event_type"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("event_log_daily")
+
+    op.execute("ALTER TABLE event_logs RENAME TO event_logs_partitioned")
+    op.execute("ALTER SEQUENCE event_logs_id_seq RENAME TO event_logs_partitioned_id_seq")
+    op.create_table(
+        "event_logs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("event_type", sa.String(length=64), nullable=False),
+        sa.Column("subtype", sa.String(length=64), nullable=True),
+        sa.Column("team_id", sa.String(length=32), nullable=True),
+        sa.Column("channel_id", sa.String(length=32), nullable=True),
+        sa.Column("user_id", sa.String(length=32), nullable=True),
+        sa.Column("message_ts", sa.String(length=32), nullable=True),
+        sa.Column("thread_ts", sa.String(length=32), nullable=True),
+        sa.Column("action", sa.String(length=64), nullable=True),
+        sa.Column("raw", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    )
+    op.execute(f"INSERT INTO event_logs ({COLUMNS}) SELECT {COLUMNS} FROM event_logs_partitioned")
+    op.execute("SELECT setval('event_logs_id_seq', COALESCE((SELECT max(id) FROM event_logs), 0) + 1, false)")
+    op.execute("DROP TABLE event_logs_partitioned")
+    op.create_index("ix_event_logs_event_type", "event_logs", ["event_type"], unique=False)
+    op.create_index("ix_event_logs_team_id", "event_logs", ["team_id"], unique=False)
+    op.create_index("ix_event_logs_channel_id", "event_logs", ["channel_id"], unique=False)
+    op.create_index("ix_event_logs_user_id", "event_logs", ["user_id"], unique=False)
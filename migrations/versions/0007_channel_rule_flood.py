@@ -0,0 +1,30 @@
+"""add flood limits to channel_rules
+
+Revision ID: 0007_channel_rule_flood
+Revises: 0006_partition_event_logs
+Create Date: 2025-09-27 00:00:00
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_channel_rule_flood"
+down_revision = "0006_partition_event_logs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 0 disables a limit.
+    op.add_column("channel_rules", sa.Column("flood_user_limit", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("channel_rules", sa.Column("flood_channel_limit", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("channel_rules", sa.Column("flood_window", sa.Integer(), nullable=False, server_default="60"))
+
+
+def downgrade() -> None:
+    op.drop_column("channel_rules", "flood_window")
+    op.drop_column("channel_rules", "flood_channel_limit")
+    op.drop_column("channel_rules", "flood_user_limit")
@@ -0,0 +1,32 @@
+"""add cooldowns to auto_responder_rules
+
+Revision ID: 0008_auto_responder_cooldowns
+Revises: 0007_channel_rule_flood
+Create Date: 2025-09-28 00:00:00
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_auto_responder_cooldowns"
+down_revision = "0007_channel_rule_flood"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Seconds; 0 disables a cooldown.
+    op.add_column("auto_responder_rules", sa.Column("cooldown", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("auto_responder_rules", sa.Column("channel_cooldown", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("auto_responder_rules", sa.Column("thread_cooldown", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("auto_responder_rules", sa.Column("once_per_thread", sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    op.drop_column("auto_responder_rules", "once_per_thread")
+    op.drop_column("auto_responder_rules", "thread_cooldown")
+    op.drop_column("auto_responder_rules", "channel_cooldown")
+    op.drop_column("auto_responder_rules", "cooldown")
@@ -1,26 +1,237 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from sqlalchemy.ext.asyncio import AsyncEngine
 from redis import Redis
-from slack_sdk.web.async_client import AsyncWebClient
+from redis.asyncio import Redis as AsyncRedis
+
+from .config import AppSettings
+from .storage.cache import CacheInvalidator
+from .storage.batch import EventLogWriter
+from .storage.datastore import pool_stats
+from .storage.kv import create_async_redis
+from .metrics import register_stats
+from .storage.repositories import EventLogRepository
+from .rules.cache import ChannelRuleCache
+from .rules.engine import Engine, channel_policy_rules
+from .rules.flood import FloodLimiter, FloodRule
+from .rules.repository import CHANNEL_RULES_TOPIC
+from .middleware.dedupe import DedupeMiddleware
+from .slack.client import RateLimitedWebClient
+from .slack.directory import ChannelDirectory
+from .slack.webhooks import WebhookSender
+from .worker.jobs import JobQueue
+
+if TYPE_CHECKING:
+    from .plugins.autoresponder.cooldown import ReplyCooldowns
+    from .plugins.autoresponder.safe_regex import RegexRunner
+    from .plugins.invite.cache import InviteSettingsCache
 
 
 @dataclass
 class AppContext:
     engine: AsyncEngine
+    # Sync client for RQ only; everything on the event loop uses `aredis()`.
     redis: Redis
     bot_token: Optional[str] = None
-    _web_client: Optional[AsyncWebClient] = None
+    settings: Optional[AppSettings] = None
+    _web_client: Optional[RateLimitedWebClient] = None
+    _admin_web_client: Optional[RateLimitedWebClient] = None
+    _invalidator: Optional[CacheInvalidator] = None
+    _channel_rules: Optional[ChannelRuleCache] = None
+    _event_log_writer: Optional[EventLogWriter] = None
+    _dedupe: Optional[DedupeMiddleware] = None
+    _webhooks: Optional[WebhookSender] = None
+    _invite_settings: Optional["InviteSettingsCache"] = None
+    _channel_directory: Optional[ChannelDirectory] = None
+    _jobs: Optional[JobQueue] = None
+    _aredis: Optional[AsyncRedis] = None
+    _rules_engine: Optional[Engine] = None
+    _flood: Optional[FloodLimiter] = None
+    _auto_cooldowns: Optional["ReplyCooldowns"] = None
+    _auto_regex: Optional["RegexRunner"] = None
 
-    async def web_client(self) -> AsyncWebClient:
+    async def web_client(self) -> RateLimitedWebClient:
         if self._web_client is None:
             if not self.bot_token:
                 raise RuntimeError("SLACK_BOT_TOKEN not configured for web client")
-            self._web_client = AsyncWebClient(token=self.bot_token)
+            s = self.settings or AppSettings()
+            self._web_client = RateLimitedWebClient(
+                token=self.bot_token,
+                session=self.webhooks().session,
+                max_concurrency=s.slack_max_concurrency,
+                max_retries=s.slack_max_retries,
+            )
         return self._web_client
 
+    async def admin_web_client(self) -> RateLimitedWebClient:
+        """Client for moderation calls (chat.delete): `ZEBRAS_SLACK_ADMIN_TOKEN` if set, else the bot."""
+        s = self.settings or AppSettings()
+        if not s.slack_admin_token:
+            return await self.web_client()
+        if self._admin_web_client is None:
+            self._admin_web_client = RateLimitedWebClient(
+                token=s.slack_admin_token,
+                session=self.webhooks().session,
+                max_concurrency=s.slack_max_concurrency,
+                max_retries=s.slack_max_retries,
+            )
+        return self._admin_web_client
+
+    def webhooks(self) -> WebhookSender:
+        """Shared outbound HTTP pool; also backs the Slack Web API client."""
+        if self._webhooks is None:
+            s = self.settings or AppSettings()
+            self._webhooks = WebhookSender(
+                pool_size=s.outbound_pool_size,
+                timeout=s.outbound_timeout,
+                retries=s.outbound_retries,
+            )
+        return self._webhooks
+
+    def aredis(self) -> AsyncRedis:
+        """asyncio Redis client over a connection pool, sharing the sync client's URL."""
+        if self._aredis is None:
+            s = self.settings or AppSettings()
+            self._aredis = create_async_redis(s.redis_url, max_connections=s.redis_max_connections, pool_timeout=s.redis_pool_timeout)
+        return self._aredis
+
+    def channel_directory(self) -> ChannelDirectory:
+        """Channel id → name map; call `start()` on it to page in the full list."""
+        if self._channel_directory is None:
+            s = self.settings or AppSettings()
+            self._channel_directory = ChannelDirectory(self.web_client, refresh_interval=s.channel_directory_refresh)
+        return self._channel_directory
+
+    def invalidator(self) -> CacheInvalidator:
+        if self._invalidator is None:
+            self._invalidator = CacheInvalidator(self.aredis())
+        return self._invalidator
+
+    def channel_rules(self) -> ChannelRuleCache:
+        if self._channel_rules is None:
+            s = self.settings or AppSettings()
+            self._channel_rules = ChannelRuleCache(
+                self.engine,
+                self.invalidator(),
+                ttl=s.channel_rule_cache_ttl,
+                max_size=s.channel_rule_cache_size,
+            )
+        return self._channel_rules
+
+    def rules_engine(self) -> Engine:
+        """Channel policy engine over the cached channel rules."""
+        if self._rules_engine is None:
+            s = self.settings or AppSettings()
+            engine = Engine(self.channel_rules().get, ttl=s.channel_rule_cache_ttl, max_channels=s.channel_rule_cache_size)
+            for rule in channel_policy_rules():
+                engine.add(rule)
+            engine.add(FloodRule(self.flood_limiter()))
+            self.invalidator().subscribe(CHANNEL_RULES_TOPIC, engine.invalidate)
+            self._rules_engine = engine
+        return self._rules_engine
+
+    def flood_limiter(self) -> FloodLimiter:
+        if self._flood is None:
+            s = self.settings or AppSettings()
+            self._flood = FloodLimiter(self.aredis(), headroom=s.flood_headroom, local_lag=s.flood_local_lag)
+        return self._flood
+
+    def invite_settings(self) -> "InviteSettingsCache":
+        if self._invite_settings is None:
+            # Imported lazily: the invite plugin package itself imports this module.
+            from .plugins.invite.cache import InviteSettingsCache
+
+            self._invite_settings = InviteSettingsCache(self.engine, self.invalidator())
+        return self._invite_settings
+
+    def auto_cooldowns(self) -> "ReplyCooldowns":
+        if self._auto_cooldowns is None:
+            from .plugins.autoresponder.cooldown import ReplyCooldowns
+
+            self._auto_cooldowns = ReplyCooldowns(self.aredis())
+        return self._auto_cooldowns
+
+    def auto_regex(self) -> "RegexRunner":
+        """Time-bounded search for auto-responder regex rules."""
+        if self._auto_regex is None:
+            from .plugins.autoresponder.matcher import AUTO_RESPONDER_TOPIC
+            from .plugins.autoresponder.safe_regex import RegexRunner
+
+            s = self.settings or AppSettings()
+            self._auto_regex = RegexRunner(timeout=s.auto_regex_timeout, workers=s.auto_regex_workers)
+            self.invalidator().subscribe(AUTO_RESPONDER_TOPIC, self._auto_regex.reset)
+        return self._auto_regex
+
+    def event_log_writer(self) -> EventLogWriter:
+        if self._event_log_writer is None:
+            s = self.settings or AppSettings()
+            self._event_log_writer = EventLogWriter(
+                EventLogRepository(self.engine),
+                batch_size=s.event_log_batch_size,
+                flush_interval=s.event_log_flush_interval,
+                max_buffer=s.event_log_buffer_size,
+                raw_mode=s.event_log_raw,
+            )
+            self._event_log_writer.start()
+        return self._event_log_writer
+
+    def jobs(self) -> JobQueue:
+        if self._jobs is None:
+            s = self.settings or AppSettings()
+            self._jobs = JobQueue(
+                self,
+                mode=s.jobs_mode,
+                queue=s.jobs_queue,
+                idempotency_ttl=s.jobs_idempotency_ttl,
+                inline_concurrency=s.jobs_inline_concurrency,
+            )
+        return self._jobs
+
+    def dedupe(self) -> DedupeMiddleware:
+        if self._dedupe is None:
+            s = self.settings or AppSettings()
+            self._dedupe = DedupeMiddleware(self.aredis(), ttl=s.dedupe_ttl, local_size=s.dedupe_local_size)
+        return self._dedupe
+
+    def register_metrics(self) -> None:
+        """Export the components' `stats()` on /metrics; only ones in use report."""
+        register_stats("db_pool", lambda: pool_stats(self.engine), counters={"checkouts", "timeouts"})
+        register_stats("jobs", lambda: self._jobs.stats() if self._jobs else None, counters={"enqueued", "duplicates"})
+        register_stats("dedupe", lambda: self._dedupe.stats() if self._dedupe else None, counters={"claimed", "duplicates", "duplicates_local", "retries_dropped", "redis_errors"})
+        register_stats("event_log", lambda: self._event_log_writer.stats() if self._event_log_writer else None, counters={"written", "dropped"})
+        register_stats("channel_directory", lambda: self._channel_directory.stats() if self._channel_directory else None)
+        register_stats("slack", lambda: self._web_client.stats() if self._web_client else None, label="method", counters={"calls", "throttled", "waited", "wait_seconds"})
+        register_stats("rules", lambda: self._rules_engine.stats() if self._rules_engine else None, label="rule", counters={"evaluations", "denies"})
+        register_stats("rules_table", lambda: self._rules_engine.table_stats() if self._rules_engine else None, counters={"hits", "misses"})
+        register_stats("rules_deletes", lambda: self._rules_engine.delete_stats() if self._rules_engine else None, counters={"deleted", "failed"})
+        register_stats("flood", lambda: self._flood.stats() if self._flood else None, counters={"checks", "local", "violations", "redis_errors"})
+        register_stats("autoresponder", lambda: self._auto_cooldowns.stats() if self._auto_cooldowns else None, label="rule", counters={"hits", "replies", "suppressed", "suppressed_local"})
+        register_stats("autoresponder_regex", lambda: self._auto_regex.stats() if self._auto_regex else None, label="rule", counters={"calls", "seconds", "timeouts"})
+
+    async def aclose(self) -> None:
+        """Drain background work and release shared resources on shutdown."""
+        if self._channel_directory is not None:
+            await self._channel_directory.close()
+        if self._jobs is not None:
+            await self._jobs.close()
+        if self._auto_regex is not None:
+            await self._auto_regex.close()
+        if self._auto_cooldowns is not None:
+            await self._auto_cooldowns.close()
+        if self._flood is not None:
+            await self._flood.close()
+        if self._event_log_writer is not None:
+            await self._event_log_writer.close()
+        if self._webhooks is not None:
+            await self._webhooks.close()
+        if self._invalidator is not None:
+            await self._invalidator.close()
+        if self._aredis is not None:
+            await self._aredis.aclose()
+        await self.engine.dispose()
+
 
 ctx: Optional[AppContext] = None
 
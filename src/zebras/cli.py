@@ -5,19 +5,28 @@ import logging
 import click
 import uvicorn
 
-from .config import load_settings
+from .config import AppSettings, load_settings
 from .logging import setup_logging
 from .router import Router
+from .middleware import DispatchMetrics
+from . import metrics
 from .plugin.registry import Registry
 from .slack.socket import SocketApp
 from .http.app import create_app
 from .storage.kv import create_redis
 from .worker.queue import start_worker
-from .storage.datastore import create_engine
+from .worker.async_worker import AsyncWorker
+from .storage.datastore import engine_from_settings
+from .storage.partitions import MaintenanceReport, maintain
+from .rules.dry_run import Policy, dry_run as rules_dry_run, load_policies
+from .rules.engine import BatchReport
+from .storage.repositories import EventLogQuery, EventLogRepository, decode_cursor, export_ndjson, parse_time
 from .app_context import AppContext, set_context
 from alembic import command as alembic_command
 from alembic.config import Config as AlembicConfig
 import os
+import sys
+import time
 
 
 def _load_plugins(reg: Registry) -> None:
@@ -29,7 +38,8 @@ def _load_plugins(reg: Registry) -> None:
     from .plugins.invite import register as invite_register
     from .plugins.admin import register as admin_register
 
-    # Order can matter for readability (e.g., logging first), but all are independent.
+    # Order can matter for readability (e.g., logging first), but all are independent:
+    # handlers for the same event run concurrently unless a plugin declares a later stage.
     logging_register(reg)
     autoresponder_register(reg)
     rules_register(reg)
@@ -38,6 +48,15 @@ def _load_plugins(reg: Registry) -> None:
     debug_register(reg)
 
 
+def _build_router(s: AppSettings, ctx: AppContext) -> Router:
+    router = Router(concurrent=s.dispatch_mode == "concurrent", handler_timeout=s.handler_timeout)
+    # First, so dispatch latency includes the rest of the chain.
+    router.add_middleware(DispatchMetrics())
+    if s.dedupe_ttl > 0:
+        router.add_middleware(ctx.dedupe())
+    return router
+
+
 @click.group()
 def cli() -> None:
     """ZEBRAS CLI."""
@@ -47,26 +66,38 @@ def cli() -> None:
 def socket() -> None:
     """Run Socket Mode app."""
     s = load_settings()
-    setup_logging(s.log_level)
+    setup_logging(s.log_level, s.log_format)
     if not s.slack_app_token:
         raise SystemExit("SLACK_APP_TOKEN required for socket mode")
     if not s.slack_bot_token:
         raise SystemExit("SLACK_BOT_TOKEN required for socket mode")
-    router = Router()
+    # Initialize context (DB + Redis)
+    engine = engine_from_settings(s)
+    r = create_redis(s.redis_url)
+    ctx = AppContext(engine=engine, redis=r, bot_token=s.slack_bot_token, settings=s)
+    set_context(ctx)
+
+    router = _build_router(s, ctx)
     reg = Registry()
     _load_plugins(reg)
     # Bind registry handlers to router
     for etype, handlers in reg.event_handlers.items():
         for h in handlers:
-            router.on(etype, h)
-
-    # Initialize context (DB + Redis)
-    engine = create_engine(s.database_url)
-    r = create_redis(s.redis_url)
-    set_context(AppContext(engine=engine, redis=r, bot_token=s.slack_bot_token))
+            router.on(etype, h, **reg.handler_options.get(h, {}))
 
     app = SocketApp(s.slack_bot_token, s.slack_app_token, router, reg)
-    asyncio.run(app.run())
+    ctx.register_metrics()
+    if s.metrics_port:
+        metrics.serve(s.metrics_port)
+
+    async def run() -> None:
+        try:
+            await ctx.invite_settings().warm()
+            await app.run()
+        finally:
+            await ctx.aclose()
+
+    asyncio.run(run())
 
 
 @cli.command()
@@ -75,33 +106,93 @@ def socket() -> None:
 def http(host: str | None, port: int | None) -> None:
     """Run HTTP Events API server."""
     s = load_settings()
-    setup_logging(s.log_level)
+    setup_logging(s.log_level, s.log_format)
     if not s.slack_bot_token:
         raise SystemExit("SLACK_BOT_TOKEN required for http mode")
-    router = Router()
+    # Initialize context (DB + Redis)
+    engine = engine_from_settings(s)
+    r = create_redis(s.redis_url)
+    ctx = AppContext(engine=engine, redis=r, bot_token=s.slack_bot_token, settings=s)
+    set_context(ctx)
+
+    router = _build_router(s, ctx)
     reg = Registry()
     _load_plugins(reg)
     for etype, handlers in reg.event_handlers.items():
         for h in handlers:
-            router.on(etype, h)
-
-    # Initialize context (DB + Redis)
-    engine = create_engine(s.database_url)
-    r = create_redis(s.redis_url)
-    set_context(AppContext(engine=engine, redis=r, bot_token=s.slack_bot_token))
+            router.on(etype, h, **reg.handler_options.get(h, {}))
 
     app = create_app(router, s.slack_signing_secret, reg)
-    uvicorn.run(app, host=host or s.http_host, port=port or s.http_port)
+    # log_config=None: uvicorn's loggers propagate to the root handler set up above.
+    uvicorn.run(app, host=host or s.http_host, port=port or s.http_port, log_config=None)
 
 
 @cli.command()
-@click.option("--queue", default="zebras")
-def worker(queue: str) -> None:
-    """Run background job worker (RQ)."""
+@click.option("--channel", "channel_id", default=None, help="Channel id (C...).")
+@click.option("--user", "user_id", default=None, help="User id (U...).")
+@click.option("--type", "event_type", default=None, help="Event type, e.g. message.")
+@click.option("--subtype", default=None)
+@click.option("--since", default=None, help="ISO date/time or relative age (30m, 24h, 7d).")
+@click.option("--until", default=None, help="ISO date/time or relative age.")
+@click.option("--cursor", default=None, help="Continue after a previous page's next_cursor.")
+@click.option("--limit", default=0, type=int, help="Stop after N rows (0 streams everything).")
+@click.option("--raw/--no-raw", "include_raw", default=True, help="Include the stored Slack payload.")
+def logs(channel_id: str | None, user_id: str | None, event_type: str | None, subtype: str | None,
+         since: str | None, until: str | None, cursor: str | None, limit: int, include_raw: bool) -> None:
+    """Export event logs as NDJSON (oldest first) to stdout."""
     s = load_settings()
-    setup_logging(s.log_level)
+    setup_logging(s.log_level, s.log_format)
+    try:
+        query = EventLogQuery(
+            since=parse_time(since) if since else None,
+            until=parse_time(until) if until else None,
+            channel_id=channel_id,
+            user_id=user_id,
+            event_type=event_type,
+            subtype=subtype,
+            after=decode_cursor(cursor) if cursor else None,
+            limit=limit or None,
+            include_raw=include_raw,
+        )
+        query.validate()
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    async def run() -> None:
+        engine = engine_from_settings(s)
+        try:
+            async for line in export_ndjson(EventLogRepository(engine), query):
+                sys.stdout.write(line)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+@cli.command()
+@click.option("--queue", default=None, help="Queue name (default ZEBRAS_JOBS_QUEUE).")
+@click.option("--mode", type=click.Choice(["async", "rq"]), default=None, help="Worker runtime (default ZEBRAS_WORKER_MODE).")
+@click.option("--concurrency", default=None, type=int, help="Concurrent jobs in async mode (default ZEBRAS_WORKER_CONCURRENCY).")
+def worker(queue: str | None, mode: str | None, concurrency: int | None) -> None:
+    """Run background job worker."""
+    s = load_settings()
+    rq_mode = (mode or s.worker_mode) == "rq"
+    # RQ forks a work horse per job; log synchronously there so the horses' records are written.
+    setup_logging(s.log_level, s.log_format, background=not rq_mode)
     r = create_redis(s.redis_url)
-    start_worker(r, queue)
+    if rq_mode:
+        start_worker(r, queue or s.jobs_queue)
+        return
+    ctx = AppContext(engine=engine_from_settings(s), redis=r, bot_token=s.slack_bot_token, settings=s)
+    set_context(ctx)
+    ctx.register_metrics()
+    if s.metrics_port:
+        metrics.serve(s.metrics_port)
+
+    async def run() -> None:
+        await AsyncWorker(ctx, queue or s.jobs_queue, concurrency=concurrency or s.worker_concurrency).run()
+
+    asyncio.run(run())
 
 
 def _alembic_config() -> AlembicConfig:
@@ -133,5 +224,95 @@ def db_downgrade(revision: str) -> None:
     alembic_command.downgrade(cfg, revision)
 
 
+@db.command("maintain")
+@click.option("--retention-days", default=None, type=int, help="Override ZEBRAS_EVENT_LOG_RETENTION_DAYS (0 keeps everything).")
+@click.option("--dry-run", is_flag=True, help="Only report which partitions would be dropped.")
+def db_maintain(retention_days: int | None, dry_run: bool) -> None:
+    """Create upcoming event_logs partitions, roll up daily counts, apply retention."""
+    s = load_settings()
+    setup_logging(s.log_level, s.log_format)
+
+    async def run() -> MaintenanceReport:
+        engine = engine_from_settings(s)
+        try:
+            return await maintain(
+                engine,
+                granularity=s.event_log_partition,
+                ahead=s.event_log_partitions_ahead,
+                retention_days=s.event_log_retention_days if retention_days is None else retention_days,
+                compression=s.event_log_compression,
+                dry_run=dry_run,
+            )
+        finally:
+            await engine.dispose()
+
+    report = asyncio.run(run())
+    click.echo(f"created={len(report.created)} rolled_up={report.rolled_up} {'would_drop' if dry_run else 'dropped'}={len(report.dropped)}")
+
+
+@cli.group()
+def rules() -> None:
+    """Channel policy rules."""
+
+
+@rules.command("dry-run")
+@click.option("--channel", "channels", multiple=True, help="Channel id (repeatable). Default: every logged channel.")
+@click.option("--since", default="7d", show_default=True, help="ISO date/time or relative age (30m, 24h, 7d).")
+@click.option("--until", default=None, help="ISO date/time or relative age.")
+@click.option("--bots", type=click.Choice(["on", "off"]), default=None, help="Proposed bots setting for --channel.")
+@click.option("--top", type=click.Choice(["on", "off"]), default=None, help="Proposed top-level setting for --channel.")
+@click.option("--threads", type=click.Choice(["on", "off"]), default=None, help="Proposed threads setting for --channel.")
+@click.option("--workers", default=None, type=int, help="Evaluation processes (default: CPU count).")
+@click.option("--chunk-size", default=5_000, show_default=True, type=int)
+def rules_dry_run_cmd(channels: tuple[str, ...], since: str, until: str | None, bots: str | None, top: str | None,
+                      threads: str | None, workers: int | None, chunk_size: int) -> None:
+    """Replay logged messages against current (or proposed) channel policies."""
+    s = load_settings()
+    setup_logging(s.log_level, s.log_format)
+    overrides = {k: v == "on" for k, v in (("allow_bots", bots), ("allow_top_level_posts", top), ("allow_thread_replies", threads)) if v}
+    if overrides and not channels:
+        raise click.UsageError("--bots/--top/--threads need --channel")
+    try:
+        query = EventLogQuery(
+            since=parse_time(since),
+            until=parse_time(until) if until else None,
+            # One channel can use the (channel_id, created_at) index directly.
+            channel_id=channels[0] if len(channels) == 1 else None,
+            event_type="message",
+        )
+        query.validate()
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    async def run() -> tuple[BatchReport, float]:
+        engine = engine_from_settings(s)
+        try:
+            policies = await load_policies(engine)
+            for ch in channels:
+                policies[ch] = policies.get(ch, Policy())._replace(**overrides)
+            started = time.perf_counter()
+            report = await rules_dry_run(
+                engine, query, policies,
+                channels=set(channels) or None,
+                workers=workers or os.cpu_count() or 1,
+                chunk_size=chunk_size,
+            )
+            return report, time.perf_counter() - started
+        finally:
+            await engine.dispose()
+
+    report, elapsed = asyncio.run(run())
+    pct = 100.0 * report.denied / report.events if report.events else 0.0
+    click.echo(f"events={report.events} denied={report.denied} ({pct:.2f}%) elapsed={elapsed:.1f}s")
+    for rule, hits in sorted(report.hits.items(), key=lambda kv: -kv[1]):
+        click.echo(f"  rule {rule}: {hits}")
+    if report.events:
+        mean = report.latency_total_ns / report.events
+        click.echo(
+            f"decision latency: mean={mean:.0f}ns p50<={report.latency_percentile(0.5)}ns "
+            f"p99<={report.latency_percentile(0.99)}ns max={report.latency_max_ns}ns"
+        )
+
+
 def main() -> None:
     cli(standalone_mode=True)
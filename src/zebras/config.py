@@ -13,6 +13,30 @@ class AppSettings(BaseSettings):
     slack_bot_token: Optional[str] = Field(default=None, alias="SLACK_BOT_TOKEN")
     slack_app_token: Optional[str] = Field(default=None, alias="SLACK_APP_TOKEN")
     slack_signing_secret: Optional[str] = Field(default=None, alias="SLACK_SIGNING_SECRET")
+    # Workspace admin's user token (xoxp-, chat:write) for deleting members' messages;
+    # a bot token can only delete the bot's own messages
+    slack_admin_token: Optional[str] = Field(default=None, alias="ZEBRAS_SLACK_ADMIN_TOKEN")
+
+    # Slack Web API pacing (see slack/client.py)
+    slack_max_concurrency: int = Field(default=10, alias="ZEBRAS_SLACK_MAX_CONCURRENCY")
+    slack_max_retries: int = Field(default=3, alias="ZEBRAS_SLACK_MAX_RETRIES")
+
+    # Shared outbound HTTP pool (response_url posts, webhooks, Slack Web API)
+    outbound_pool_size: int = Field(default=100, alias="ZEBRAS_OUTBOUND_POOL_SIZE")
+    outbound_timeout: float = Field(default=10.0, alias="ZEBRAS_OUTBOUND_TIMEOUT")
+    outbound_retries: int = Field(default=3, alias="ZEBRAS_OUTBOUND_RETRIES")
+
+    # Channel directory full re-read interval in seconds (0 loads once; events keep it current)
+    channel_directory_refresh: float = Field(default=21_600.0, alias="ZEBRAS_CHANNEL_DIRECTORY_REFRESH")
+
+    # Background jobs: `inline` runs them as tasks in this process, `queue` sends them to `zebras worker`
+    jobs_mode: Literal["inline", "queue"] = Field(default="inline", alias="ZEBRAS_JOBS_MODE")
+    jobs_queue: str = Field(default="zebras", alias="ZEBRAS_JOBS_QUEUE")
+    jobs_idempotency_ttl: int = Field(default=86_400, alias="ZEBRAS_JOBS_IDEMPOTENCY_TTL")
+    jobs_inline_concurrency: int = Field(default=100, alias="ZEBRAS_JOBS_INLINE_CONCURRENCY")
+    # `zebras worker`: `async` runs jobs concurrently on one event loop, `rq` uses the forking RQ worker
+    worker_mode: Literal["async", "rq"] = Field(default="async", alias="ZEBRAS_WORKER_MODE")
+    worker_concurrency: int = Field(default=50, alias="ZEBRAS_WORKER_CONCURRENCY")
 
     # Mode: socket or http
     mode: Literal["socket", "http"] = Field(default="socket", alias="ZEBRAS_MODE")
@@ -21,8 +45,29 @@ class AppSettings(BaseSettings):
     http_host: str = Field(default="0.0.0.0", alias="ZEBRAS_HTTP_HOST")
     http_port: int = Field(default=3000, alias="ZEBRAS_HTTP_PORT")
 
+    # Event dispatch: run the handlers for an event concurrently or one by one
+    dispatch_mode: Literal["concurrent", "sequential"] = Field(default="concurrent", alias="ZEBRAS_DISPATCH_MODE")
+    handler_timeout: Optional[float] = Field(default=None, alias="ZEBRAS_HANDLER_TIMEOUT")
+
+    # Event deduplication window in seconds (0 disables) and in-process front cache size
+    dedupe_ttl: int = Field(default=600, alias="ZEBRAS_DEDUPE_TTL")
+    dedupe_local_size: int = Field(default=10_000, alias="ZEBRAS_DEDUPE_LOCAL_SIZE")
+
+    # HTTP mode: bounded queue between /slack/events and dispatch
+    event_queue_size: int = Field(default=1000, alias="ZEBRAS_EVENT_QUEUE_SIZE")
+    event_workers: int = Field(default=8, alias="ZEBRAS_EVENT_WORKERS")
+    event_queue_overflow: Literal["shed", "block", "spill"] = Field(default="block", alias="ZEBRAS_EVENT_QUEUE_OVERFLOW")
+
+    # Prometheus listener for processes without the HTTP app (socket mode, worker); 0 disables.
+    # HTTP mode serves /metrics on its own port.
+    metrics_port: int = Field(default=0, alias="ZEBRAS_METRICS_PORT")
+
     # Redis / RQ
     redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
+    # Pool size of the asyncio client shared by dedupe, caches, spill and job claims.
+    redis_max_connections: int = Field(default=50, alias="ZEBRAS_REDIS_MAX_CONNECTIONS")
+    # Seconds to wait for a free pooled connection before raising
+    redis_pool_timeout: float = Field(default=5.0, alias="ZEBRAS_REDIS_POOL_TIMEOUT")
 
     # Database (Postgres). For Neon, paste your Neon DSN here
     database_url: str = Field(
@@ -30,8 +75,51 @@ class AppSettings(BaseSettings):
         alias="DATABASE_URL",
     )
 
+    # SQLAlchemy pool. A pool size of 0 opens a connection per checkout (no client-side pool).
+    db_pool_size: int = Field(default=5, alias="ZEBRAS_DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=5, alias="ZEBRAS_DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30.0, alias="ZEBRAS_DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=-1, alias="ZEBRAS_DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, alias="ZEBRAS_DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(default=100, alias="ZEBRAS_DB_STATEMENT_CACHE_SIZE")
+    # Transaction-pooling proxy in front of Postgres (PgBouncer, Neon pooler endpoint)
+    db_pgbouncer: bool = Field(default=False, alias="ZEBRAS_DB_PGBOUNCER")
+
+    # Caches (per process; kept coherent across processes via Redis pub/sub)
+    channel_rule_cache_ttl: float = Field(default=300.0, alias="ZEBRAS_CHANNEL_RULE_CACHE_TTL")
+    channel_rule_cache_size: int = Field(default=10_000, alias="ZEBRAS_CHANNEL_RULE_CACHE_SIZE")
+
+    # Flood rule: answer in-process while a sender is under this fraction of the limit,
+    # for at most this many seconds since the last Redis check
+    flood_headroom: float = Field(default=0.5, alias="ZEBRAS_FLOOD_HEADROOM")
+    flood_local_lag: float = Field(default=2.0, alias="ZEBRAS_FLOOD_LOCAL_LAG")
+
+    # Auto-responder rule index: rebuilt on rule changes, and at least this often (seconds)
+    auto_index_max_age: float = Field(default=300.0, alias="ZEBRAS_AUTO_INDEX_MAX_AGE")
+
+    # Auto-responder regex rules without RE2: seconds per search, and pool processes running them
+    auto_regex_timeout: float = Field(default=0.1, alias="ZEBRAS_AUTO_REGEX_TIMEOUT")
+    auto_regex_workers: int = Field(default=1, alias="ZEBRAS_AUTO_REGEX_WORKERS")
+
+    # Event log batching (logging plugin)
+    event_log_batch_size: int = Field(default=200, alias="ZEBRAS_EVENT_LOG_BATCH_SIZE")
+    event_log_flush_interval: float = Field(default=1.0, alias="ZEBRAS_EVENT_LOG_FLUSH_INTERVAL")
+    event_log_buffer_size: int = Field(default=10_000, alias="ZEBRAS_EVENT_LOG_BUFFER_SIZE")
+    # What to keep in event_logs.raw: the whole envelope, only the inner event, or nothing
+    event_log_raw: Literal["full", "event", "none"] = Field(default="full", alias="ZEBRAS_EVENT_LOG_RAW")
+
+    # Bearer token for the read-only event log API (`GET /admin/logs`); unset disables it
+    logs_api_token: Optional[str] = Field(default=None, alias="ZEBRAS_LOGS_API_TOKEN")
+
+    # Event log partitions and retention (`zebras db maintain`)
+    event_log_partition: Literal["month", "day"] = Field(default="month", alias="ZEBRAS_EVENT_LOG_PARTITION")
+    event_log_partitions_ahead: int = Field(default=2, alias="ZEBRAS_EVENT_LOG_PARTITIONS_AHEAD")
+    event_log_retention_days: int = Field(default=0, alias="ZEBRAS_EVENT_LOG_RETENTION_DAYS")
+    event_log_compression: Optional[Literal["pglz", "lz4"]] = Field(default=None, alias="ZEBRAS_EVENT_LOG_COMPRESSION")
+
     # Logging
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
+    log_format: Literal["text", "json"] = Field(default="text", alias="LOG_FORMAT")
 
 
 def load_settings() -> AppSettings:
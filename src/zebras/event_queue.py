@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Literal, Optional
+
+from redis.asyncio import Redis
+
+from .router import Router
+
+
+OverflowPolicy = Literal["shed", "block", "spill"]
+
+SPILL_KEY = "zebras:events:spill"
+
+
+class EventQueue:
+    """Bounded in-process queue between event ingestion and `Router.dispatch`.
+
+    Ingestion acknowledges Slack as soon as the event is queued; a pool of consumer
+    tasks does the actual dispatch. When the queue is full the overflow policy
+    decides: `shed` drops the event, `block` waits for room, `spill` pushes it to a
+    Redis list that any replica drains back once it has capacity.
+    """
+
+    def __init__(self, router: Router, *, maxsize: int = 1000, workers: int = 8, overflow: OverflowPolicy = "block", redis: Optional[Redis] = None) -> None:
+        if overflow == "spill" and redis is None:
+            raise ValueError("spill overflow policy requires a Redis connection")
+        self.log = logging.getLogger("zebras.event_queue")
+        self.router = router
+        self.maxsize = maxsize
+        self.workers = workers
+        self.overflow = overflow
+        self._redis = redis
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._tasks: List[asyncio.Task] = []
+        self.processed = 0
+        self.shed = 0
+        self.spilled = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._consume(), name=f"zebras-events-{i}") for i in range(self.workers)]
+        if self.overflow == "spill":
+            self._tasks.append(asyncio.create_task(self._drain_spill(), name="zebras-events-spill"))
+
+    async def submit(self, payload: Dict[str, Any]) -> bool:
+        """Queue an event for dispatch. Returns False when it was shed."""
+        item = (time.monotonic(), payload)
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self.overflow == "block":
+            await self._queue.put(item)
+            return True
+        if self.overflow == "spill":
+            try:
+                data = json.dumps({"t": time.time(), "p": payload})
+                await self._redis.rpush(SPILL_KEY, data)  # type: ignore[union-attr]
+                self.spilled += 1
+                return True
+            except Exception:
+                self.log.warning("Failed to spill event to Redis; shedding", exc_info=True)
+        self.shed += 1
+        self.log.warning("Event queue full (%d); shed event", self.maxsize)
+        return False
+
+    async def _consume(self) -> None:
+        while True:
+            enqueued, payload = await self._queue.get()
+            lag = time.monotonic() - enqueued
+            self.last_lag = lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            try:
+                await self.router.dispatch(payload)
+            except Exception:
+                self.log.exception("Event dispatch failed")
+            finally:
+                self.processed += 1
+                self._queue.task_done()
+
+    async def _drain_spill(self) -> None:
+        while True:
+            room = self.maxsize // 2 - self._queue.qsize()
+            if room <= 0:
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                batch = await self._redis.lpop(SPILL_KEY, min(room, 100))  # type: ignore[union-attr]
+            except Exception:
+                self.log.warning("Failed to read spilled events", exc_info=True)
+                batch = None
+            if not batch:
+                await asyncio.sleep(0.5)
+                continue
+            for raw in batch:
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    continue
+                # Carry the original enqueue time over so lag includes time spent in Redis.
+                enqueued = time.monotonic() - max(0.0, time.time() - data.get("t", time.time()))
+                await self._queue.put((enqueued, data.get("p") or {}))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._queue.qsize(),
+            "capacity": self.maxsize,
+            "workers": self.workers,
+            "overflow": self.overflow,
+            "processed": self.processed,
+            "shed": self.shed,
+            "spilled": self.spilled,
+            "last_lag_seconds": round(self.last_lag, 4),
+            "max_lag_seconds": round(self.max_lag, 4),
+        }
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Give queued events up to `timeout` seconds to finish, then cancel consumers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            self.log.warning("Stopping with %d events still queued", self._queue.qsize())
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
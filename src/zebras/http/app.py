@@ -1,64 +1,154 @@
 from __future__ import annotations
 
+import asyncio
 import hmac
 import hashlib
 import logging
 import time
-from typing import Any, Dict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import parse_qsl, urlencode
 
 from fastapi import FastAPI, Request, HTTPException, Form
-from fastapi.responses import JSONResponse, PlainTextResponse, HTMLResponse, RedirectResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, HTMLResponse, RedirectResponse, Response, StreamingResponse
+from sqlalchemy import text
 from starlette.datastructures import FormData
-import json
+import orjson
 
 from ..router import Router
+from .. import metrics
 from ..app_context import get_context
-from ..plugins.invite.repository import InviteSettingsRepository
-from ..rules.repository import ChannelRuleRepository
+from ..config import AppSettings
+from ..event_queue import EventQueue
 from ..plugins.autoresponder.repository import AutoResponderRepository
+from ..plugins.autoresponder.safe_regex import PatternRejected, validate_pattern
+from ..storage.cache import MISSING, TTLCache
+from ..storage.datastore import pool_stats
+from ..storage.repositories import EventLogQuery, EventLogRepository, QueryRejected, decode_cursor, export_ndjson, parse_time
 from ..plugin.registry import Registry
 
 
 log = logging.getLogger("zebras.http")
 
+# Seconds each /readyz dependency check may take before it counts as down.
+READY_TIMEOUT = 2.0
 
-def verify_slack_signature(req: Request, signing_secret: str, body: bytes) -> None:
-    ts = req.headers.get("X-Slack-Request-Timestamp")
-    sig = req.headers.get("X-Slack-Signature")
-    if not ts or not sig:
-        raise HTTPException(status_code=401, detail="Missing Slack signature")
-    if abs(time.time() - int(ts)) > 60 * 5:
-        raise HTTPException(status_code=401, detail="Stale request")
-    base = f"v0:{ts}:{body.decode()}".encode()
-    digest = hmac.new(signing_secret.encode(), base, hashlib.sha256).hexdigest()
-    expected = f"v0={digest}"
-    if not hmac.compare_digest(expected, sig):
-        raise HTTPException(status_code=401, detail="Invalid signature")
+
+class SlackSignatureVerifier:
+    """Checks `X-Slack-Signature` over the raw body bytes.
+
+    The HMAC key schedule is computed once and copied per request. Signatures seen
+    within the freshness window are remembered, so a captured request cannot be
+    replayed to this process (Slack re-signs its own retries).
+    """
+
+    def __init__(self, signing_secret: str, *, max_age: int = 60 * 5, replay_size: int = 10_000) -> None:
+        self._mac = hmac.new(signing_secret.encode(), digestmod=hashlib.sha256)
+        self.max_age = max_age
+        # Older requests fail the timestamp check, so entries only need to outlive it.
+        self._seen = TTLCache(ttl=2 * max_age, max_size=replay_size)
+
+    def verify(self, req: Request, body: bytes) -> None:
+        ts = req.headers.get("X-Slack-Request-Timestamp")
+        sig = req.headers.get("X-Slack-Signature")
+        if not ts or not sig:
+            raise HTTPException(status_code=401, detail="Missing Slack signature")
+        try:
+            stamp = int(ts)
+        except ValueError:
+            raise HTTPException(status_code=401, detail="Invalid timestamp")
+        if abs(time.time() - stamp) > self.max_age:
+            raise HTTPException(status_code=401, detail="Stale request")
+        mac = self._mac.copy()
+        mac.update(b"v0:" + ts.encode() + b":")
+        mac.update(body)
+        if not hmac.compare_digest(b"v0=" + mac.hexdigest().encode(), sig.encode()):
+            raise HTTPException(status_code=401, detail="Invalid signature")
+        key = (stamp, sig)
+        if self._seen.get(key) is not MISSING:
+            raise HTTPException(status_code=401, detail="Replayed request")
+        self._seen.set(key, True)
+
+
+def parse_form(body: bytes) -> Dict[str, str]:
+    """Slack's application/x-www-form-urlencoded bodies, from the bytes already read."""
+    return dict(parse_qsl(body.decode(), keep_blank_values=True))
 
 
 def create_app(router: Router, signing_secret: str | None, registry: Registry) -> FastAPI:
-    app = FastAPI()
+    ctx = get_context()
+    s = ctx.settings or AppSettings()
+    verifier: Optional[SlackSignatureVerifier] = SlackSignatureVerifier(signing_secret) if signing_secret else None
+    events = EventQueue(
+        router,
+        maxsize=s.event_queue_size,
+        workers=s.event_workers,
+        overflow=s.event_queue_overflow,
+        redis=ctx.aredis(),
+    )
+    ctx.register_metrics()
+    metrics.register_stats("event_queue", events.stats, counters={"processed", "shed", "spilled"})
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+        events.start()
+        if get_context().bot_token:
+            get_context().channel_directory().start()
+        await get_context().invite_settings().warm()
+        yield
+        await events.stop()
+        await get_context().aclose()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/metrics")
+    async def metrics_endpoint(request: Request) -> Response:
+        body, content_type = metrics.render(request.headers.get("accept"))
+        return Response(content=body, media_type=content_type)
 
     @app.get("/healthz")
-    async def healthz() -> Dict[str, str]:
+    async def healthz() -> Dict[str, Any]:
+        # Liveness only: never touches a dependency, so a slow one cannot get a
+        # healthy process restarted. Dependencies are checked by /readyz.
         return {"status": "ok"}
 
+    @app.get("/readyz")
+    async def readyz() -> JSONResponse:
+        ctx = get_context()
+        checks: Dict[str, str] = {}
+
+        async def _check(name: str, probe: Any) -> None:
+            try:
+                await asyncio.wait_for(probe(), READY_TIMEOUT)
+                checks[name] = "ok"
+            except Exception as e:
+                checks[name] = f"error: {type(e).__name__}"
+
+        async def _db() -> None:
+            async with ctx.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        await asyncio.gather(_check("db", _db), _check("redis", ctx.aredis().ping))
+        ready = all(v == "ok" for v in checks.values())
+        out: Dict[str, Any] = {"status": "ok" if ready else "unavailable", "checks": checks, "event_queue": events.stats(), "jobs": ctx.jobs().stats()}
+        db_pool = pool_stats(ctx.engine)
+        if db_pool is not None:
+            out["db_pool"] = db_pool
+        if s.dedupe_ttl > 0:
+            out["dedupe"] = ctx.dedupe().stats()
+        if ctx.bot_token:
+            out["slack"] = (await ctx.web_client()).stats()
+            out["channel_directory"] = ctx.channel_directory().stats()
+        return JSONResponse(out, status_code=200 if ready else 503)
+
     async def _list_channels() -> list[dict]:
-        try:
-            client = await get_context().web_client()
-        except Exception:
+        ctx = get_context()
+        if not ctx.bot_token:
             return []
-        channels: list[dict] = []
-        cursor = None
-        types = "public_channel,private_channel"
-        for _ in range(3):  # fetch up to ~3 pages to keep it light
-            resp = await client.conversations_list(limit=200, cursor=cursor, types=types)
-            channels.extend([{"id": c.get("id"), "name": c.get("name")} for c in resp.get("channels", [])])
-            cursor = resp.get("response_metadata", {}).get("next_cursor")
-            if not cursor:
-                break
-        channels.sort(key=lambda x: (x.get("name") or ""))
-        return channels
+        directory = ctx.channel_directory()
+        # Only the first request after startup can wait, and only for the background load.
+        await directory.wait_loaded(timeout=5.0)
+        return directory.channels()
 
     def _option_list(name: str, items: list[dict], selected: str | None) -> str:
         opts = [f"<option value=\"\">-- select {name} --</option>"]
@@ -70,15 +160,14 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
     @app.get("/")
     async def admin_index(request: Request) -> HTMLResponse:
         ctx = get_context()
-        inv_repo = InviteSettingsRepository(ctx.engine)
-        rules_repo = ChannelRuleRepository(ctx.engine)
         auto_repo = AutoResponderRepository(ctx.engine)
-        settings = await inv_repo.get()
+        settings = await ctx.invite_settings().get()
         channels = await _list_channels()
         # Auto-responder selected channel (None=GLOBAL)
         auto_sel = request.query_params.get("auto_channel_id")
         auto_sel = auto_sel if auto_sel else None
         auto_rules = await auto_repo.list(channel_id=auto_sel)
+        auto_error = request.query_params.get("auto_error")
 
         channel_options_admin = _option_list("admin channel", channels, settings.admin_channel_id if settings else None)
         channel_options_audit = _option_list("audit channel", channels, settings.audit_channel_id if settings else None)
@@ -95,7 +184,7 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
 
         rows = []
         for r in auto_rules:
-            scope = 'GLOBAL' if r.get('channel_id') is None else f"# {next((c['name'] for c in channels if c['id']==r.get('channel_id')), r.get('channel_id'))}"
+            scope = 'GLOBAL' if r.get('channel_id') is None else f"# {ctx.channel_directory().name(r.get('channel_id')) or r.get('channel_id')}"
             rows.append(
                 f"<tr>"
                 f"<td>{r.get('id')}</td>"
@@ -141,7 +230,7 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
           </head>
           <body>
             <h1>ZEBRAS Admin</h1>
-            <p><a href="/healthz">Health</a></p>
+            <p><a href="/readyz">Health</a></p>
 
             <div class="section">
               <h2>Invite Helper</h2>
@@ -175,6 +264,11 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
                   <div><label><input type="checkbox" name="allow_top" checked/> Allow top-level posts</label></div>
                   <div><label><input type="checkbox" name="allow_threads" checked/> Allow thread replies</label></div>
                 </div>
+                <div class="row">
+                  <div><label>Flood limit per user</label><input type="number" min="0" name="flood_user_limit" placeholder="unchanged"/></div>
+                  <div><label>Flood limit per channel</label><input type="number" min="0" name="flood_channel_limit" placeholder="unchanged"/></div>
+                  <div><label>Flood window (seconds)</label><input type="number" min="1" name="flood_window" placeholder="unchanged"/></div>
+                </div>
                 <div class="actions"><button type="submit">Save Channel Rules</button></div>
                 <p style="color:#666">Note: current values are not auto-loaded when you change the channel in this basic UI. Use /rules list in Slack to verify, or submit desired settings here.</p>
               </form>
@@ -189,6 +283,7 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
               </form>
 
               <h3>Add Rule</h3>
+              {f'<p style="color:#b00">Rule not added: {_escape(auto_error)}</p>' if auto_error else ''}
               <form method="post" action="/admin/auto/add">
                 <div class="row">
                   <div>
@@ -215,7 +310,7 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
                 <div class="actions"><button type="submit">Add Rule</button></div>
               </form>
 
-              <h3>Rules ({'GLOBAL' if not auto_sel else '# ' + (next((c['name'] for c in channels if c['id']==auto_sel), auto_sel))})</h3>
+              <h3>Rules ({'GLOBAL' if not auto_sel else '# ' + (ctx.channel_directory().name(auto_sel) or auto_sel)})</h3>
               <table>
                 <thead><tr><th>ID</th><th>Enabled</th><th>Match</th><th>Case</th><th>Scope</th><th>Phrase</th><th>Response</th><th>Actions</th></tr></thead>
                 <tbody>
@@ -236,8 +331,7 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
         notify_on_join = True if form.get("notify_on_join") is not None else False
         dm_message = form.get("dm_message") or None
         ctx = get_context()
-        repo = InviteSettingsRepository(ctx.engine)
-        await repo.upsert(admin_channel_id=admin_channel_id, audit_channel_id=audit_channel_id, notify_on_join=notify_on_join, dm_message=dm_message)
+        await ctx.invite_settings().upsert(admin_channel_id=admin_channel_id, audit_channel_id=audit_channel_id, notify_on_join=notify_on_join, dm_message=dm_message)
         return RedirectResponse(url="/", status_code=303)
 
     @app.post("/admin/rules")
@@ -247,10 +341,23 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
         allow_bots = form.get("allow_bots") is not None
         allow_top = form.get("allow_top") is not None
         allow_threads = form.get("allow_threads") is not None
+
+        def _limit(name: str, minimum: int) -> Optional[int]:
+            # Blank keeps the stored value; messages per window, 0 = no limit.
+            value = (form.get(name) or "").strip()
+            return max(minimum, int(value)) if value.isdigit() else None
+
         if channel_id:
             ctx = get_context()
-            repo = ChannelRuleRepository(ctx.engine)
-            await repo.upsert(channel_id, allow_bots=allow_bots, allow_top_level_posts=allow_top, allow_thread_replies=allow_threads)
+            await ctx.channel_rules().upsert(
+                channel_id,
+                allow_bots=allow_bots,
+                allow_top_level_posts=allow_top,
+                allow_thread_replies=allow_threads,
+                flood_user_limit=_limit("flood_user_limit", 0),
+                flood_channel_limit=_limit("flood_channel_limit", 0),
+                flood_window=_limit("flood_window", 1),
+            )
         return RedirectResponse(url="/", status_code=303)
 
     @app.post("/admin/auto/add")
@@ -262,12 +369,19 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
         case_sensitive = (form.get("case_sensitive") == "1")
         channel_id = form.get("channel_id") or None
         ctx = get_context()
-        repo = AutoResponderRepository(ctx.engine)
-        if phrase and response_text and match_type in ("contains", "exact", "regex"):
+        repo = AutoResponderRepository(ctx.engine, ctx.invalidator())
+        # Preserve selected scope via query string; errors are shown above the form.
+        params = {"auto_channel_id": channel_id} if channel_id else {}
+        if match_type == "regex":
+            try:
+                validate_pattern(phrase, case_sensitive)
+            except PatternRejected as e:
+                # Same check as `/auto add`.
+                params["auto_error"] = str(e)
+        if "auto_error" not in params and phrase and response_text and match_type in ("contains", "exact", "regex"):
             await repo.add(phrase=phrase, response_text=response_text, match_type=match_type, case_sensitive=case_sensitive, channel_id=channel_id if channel_id else None)
-        # Preserve selected scope via query string
-        scope_qs = f"?auto_channel_id={channel_id}" if channel_id else ""
-        return RedirectResponse(url=f"/{scope_qs}", status_code=303)
+        qs = f"?{urlencode(params)}" if params else ""
+        return RedirectResponse(url=f"/{qs}", status_code=303)
 
     @app.post("/admin/auto/toggle")
     async def admin_auto_toggle(request: Request) -> RedirectResponse:
@@ -275,7 +389,7 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
         rid = int(form.get("id"))
         enabled = form.get("enabled") == "1"
         ctx = get_context()
-        repo = AutoResponderRepository(ctx.engine)
+        repo = AutoResponderRepository(ctx.engine, ctx.invalidator())
         await repo.toggle(rid, enabled)
         return RedirectResponse(url="/", status_code=303)
 
@@ -284,32 +398,69 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
         form: FormData = await request.form()
         rid = int(form.get("id"))
         ctx = get_context()
-        repo = AutoResponderRepository(ctx.engine)
+        repo = AutoResponderRepository(ctx.engine, ctx.invalidator())
         await repo.remove(rid)
         return RedirectResponse(url="/", status_code=303)
 
+    @app.get("/admin/logs")
+    async def admin_logs(request: Request) -> StreamingResponse:
+        """Event log export as NDJSON, oldest first; see docs/PLUGINS-LOGGING.md."""
+        if not s.logs_api_token:
+            raise HTTPException(status_code=404)
+        auth = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth.encode(), f"Bearer {s.logs_api_token}".encode()):
+            raise HTTPException(status_code=401, detail="Invalid token")
+        q = request.query_params
+        try:
+            limit = int(q.get("limit") or 1000)
+            query = EventLogQuery(
+                since=parse_time(q["since"]) if q.get("since") else None,
+                until=parse_time(q["until"]) if q.get("until") else None,
+                channel_id=q.get("channel_id") or None,
+                user_id=q.get("user_id") or None,
+                event_type=q.get("event_type") or None,
+                subtype=q.get("subtype") or None,
+                after=decode_cursor(q["cursor"]) if q.get("cursor") else None,
+                limit=min(max(limit, 1), 50_000),
+                include_raw=q.get("raw", "true").lower() not in ("0", "false", "no"),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            query.validate()
+        except QueryRejected as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        repo = EventLogRepository(get_context().engine)
+        return StreamingResponse(export_ndjson(repo, query), media_type="application/x-ndjson")
+
     @app.post("/slack/events")
     async def slack_events(request: Request) -> Any:
         body = await request.body()
-        if signing_secret:
-            verify_slack_signature(request, signing_secret, body)
-
-        payload = await request.json()
+        if verifier is not None:
+            verifier.verify(request, body)
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
         # URL verification challenge
         if payload.get("type") == "url_verification":
             return PlainTextResponse(payload.get("challenge", ""))
+        retry_num = request.headers.get("X-Slack-Retry-Num")
+        if retry_num:
+            # Same field Socket Mode envelopes carry; lets dedupe count dropped retries.
+            payload["retry_attempt"] = int(retry_num) if retry_num.isdigit() else retry_num
 
-        await router.dispatch(payload)
+        # Ack immediately; Slack retries anything not acknowledged within 3 seconds.
+        await events.submit(payload)
         return JSONResponse({"ok": True})
 
     @app.post("/slack/commands")
     async def slack_commands(request: Request) -> Any:
         body = await request.body()
-        if signing_secret:
-            verify_slack_signature(request, signing_secret, body)
+        if verifier is not None:
+            verifier.verify(request, body)
         # Slack sends application/x-www-form-urlencoded
-        form: FormData = await request.form()
-        data = {k: form.get(k) for k in form.keys()}
+        data = parse_form(body)
         cmd = data.get("command")
         if not cmd:
             return JSONResponse({"error": "missing command"}, status_code=400)
@@ -329,15 +480,14 @@ def create_app(router: Router, signing_secret: str | None, registry: Registry) -
     @app.post("/slack/interactivity")
     async def slack_interactivity(request: Request) -> Any:
         body = await request.body()
-        if signing_secret:
-            verify_slack_signature(request, signing_secret, body)
-        form: FormData = await request.form()
-        payload_raw = form.get("payload")
+        if verifier is not None:
+            verifier.verify(request, body)
+        payload_raw = parse_form(body).get("payload")
         if not payload_raw:
             return JSONResponse({"error": "missing payload"}, status_code=400)
         try:
-            payload = json.loads(payload_raw)
-        except Exception:
+            payload = orjson.loads(payload_raw)
+        except orjson.JSONDecodeError:
             return JSONResponse({"error": "invalid payload"}, status_code=400)
         t = payload.get("type")
         if t == "block_actions":
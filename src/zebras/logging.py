@@ -1,18 +1,110 @@
 from __future__ import annotations
 
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Literal, Optional, Tuple
 
+LogFormat = Literal["text", "json"]
 
-def setup_logging(level: str = "INFO") -> None:
+# (event_id, event_type) of the event being dispatched; set by `Router.dispatch`
+# and inherited by handler tasks and anything they spawn.
+event_context: ContextVar[Optional[Tuple[Optional[str], str]]] = ContextVar("zebras_event", default=None)
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`.
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "event_id", "event_type"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _EventContextFilter(logging.Filter):
+    """Copies the current event context onto records in the emitting task."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        current = event_context.get()
+        record.event_id, record.event_type = current if current is not None else (None, None)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including `extra` fields and the event context."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "event_id", None):
+            out["event_id"] = record.event_id
+        if getattr(record, "event_type", None):
+            out["event_type"] = record.event_type
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        if record.stack_info:
+            out["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(out, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the message now (args may be mutated after the call returns);
+        # formatting and tracebacks are left to the listener thread.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level: str = "INFO", fmt: LogFormat = "text", *, background: bool = True) -> None:
+    """Log through a queue: callers only enqueue records, and a listener thread
+    formats them and writes to stdout, so the event loop never blocks on I/O.
+
+    `background=False` writes directly instead, for processes that fork workers
+    (the listener thread does not survive a fork).
+    """
+    global _listener
     root = logging.getLogger()
     if root.handlers:
         # Avoid duplicate handlers if reconfigured
         for h in list(root.handlers):
             root.removeHandler(h)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
     handler = logging.StreamHandler(sys.stdout)
-    fmt = "%(asctime)s %(levelname)s %(name)s %(message)s"
-    handler.setFormatter(logging.Formatter(fmt))
-    root.addHandler(handler)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
     root.setLevel(level.upper())
+    if not background:
+        handler.addFilter(_EventContextFilter())
+        root.addHandler(handler)
+        return
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    qh = _QueueHandler(q)
+    qh.addFilter(_EventContextFilter())
+    root.addHandler(qh)
+    _listener = logging.handlers.QueueListener(q, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    # Flush what is still queued at interpreter exit.
+    if _listener is not None:
+        _listener.stop()
+
 
+atexit.register(_stop_listener)
@@ -0,0 +1,127 @@
+"""Prometheus metrics for dispatch, handlers, Slack calls, DB queries and queues.
+
+Latencies are histograms fed directly on the hot path (label children are
+resolved once, so an observation is a perf_counter pair and a bucket increment).
+Counters and depths that components already keep in their `stats()` dicts are
+read at scrape time instead, via `register_stats`.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import time
+from typing import AbstractSet, Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from prometheus_client import REGISTRY, Counter, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.exposition import choose_encoder
+from prometheus_client.registry import Collector
+
+log = logging.getLogger("zebras.metrics")
+
+T = TypeVar("T")
+
+EVENT_SECONDS = Histogram(
+    "zebras_event_dispatch_seconds", "Time to dispatch one event through middleware and handlers", ["event_type"],
+)
+HANDLER_SECONDS = Histogram(
+    "zebras_handler_seconds", "Time spent in one event handler", ["event_type", "handler"],
+)
+HANDLER_ERRORS = Counter(
+    "zebras_handler_errors", "Event handlers that raised or timed out", ["event_type", "handler", "kind"],
+)
+SLACK_SECONDS = Histogram(
+    "zebras_slack_api_seconds", "Slack Web API request latency (per HTTP attempt)", ["method", "outcome"],
+)
+DB_SECONDS = Histogram(
+    "zebras_db_query_seconds", "Repository call latency", ["operation"],
+)
+
+
+StatsSource = Callable[[], Optional[Dict[str, Any]]]
+
+_SOURCES: Dict[str, Tuple[StatsSource, Optional[str], AbstractSet[str]]] = {}
+
+
+def register_stats(name: str, source: StatsSource, *, label: Optional[str] = None, counters: Iterable[str] = ()) -> None:
+    """Export the numeric entries of `source()` as `zebras_<name>_<key>` gauges.
+
+    With `label`, `source()` returns `{label_value: {key: number}}` (e.g. per Slack
+    method) and each inner key becomes one gauge labelled by `label`. Keys listed in
+    `counters` only ever grow and are exported as counters instead
+    (`zebras_<name>_<key>_total`), so `rate()` handles process restarts. Registering
+    the same name again replaces the source.
+    """
+    _SOURCES[name] = (source, label, frozenset(counters))
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def _family(name: str, key: str, counters: AbstractSet[str], labels: Optional[List[str]] = None, value: Optional[float] = None) -> Metric:
+    kind = CounterMetricFamily if key in counters else GaugeMetricFamily
+    return kind(f"zebras_{name}_{key}", f"{name} {key}", value=value, labels=labels)
+
+
+class _StatsCollector(Collector):
+    def collect(self) -> Iterator[Metric]:
+        for name, (source, label, counters) in list(_SOURCES.items()):
+            try:
+                stats = source()
+            except Exception:
+                log.debug("Stats source %s failed", name, exc_info=True)
+                continue
+            if not stats:
+                continue
+            if label is None:
+                for key, value in stats.items():
+                    v = _number(value)
+                    if v is not None:
+                        yield _family(name, key, counters, value=v)
+                continue
+            families: Dict[str, Metric] = {}
+            for label_value, inner in stats.items():
+                for key, value in (inner or {}).items():
+                    v = _number(value)
+                    if v is None:
+                        continue
+                    fam = families.get(key)
+                    if fam is None:
+                        fam = families[key] = _family(name, key, counters, labels=[label])
+                    fam.add_metric([str(label_value)], v)
+            yield from families.values()
+
+
+REGISTRY.register(_StatsCollector())
+
+
+def timed_query(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Record a repository coroutine's latency under its qualified name."""
+    child = DB_SECONDS.labels(fn.__qualname__)
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            child.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def render(accept: Optional[str]) -> Tuple[bytes, str]:
+    """Exposition body and content type, OpenMetrics when the scraper asks for it."""
+    encoder, content_type = choose_encoder(accept or "")
+    return encoder(REGISTRY), content_type
+
+
+def serve(port: int, addr: str = "0.0.0.0") -> None:
+    """Serve /metrics from a background thread (socket mode and workers have no HTTP app)."""
+    start_http_server(port, addr=addr)
+    log.info("Metrics listening on %s:%d", addr, port)
@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+from .dedupe import DedupeMiddleware
+from .metrics import DispatchMetrics
+
+__all__ = ["DedupeMiddleware", "DispatchMetrics"]
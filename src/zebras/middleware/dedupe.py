@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional
+
+from redis.asyncio import Redis
+
+from ..router import Next
+from ..storage.cache import MISSING, TTLCache
+
+
+def event_key(event: Dict[str, Any]) -> Optional[str]:
+    """Stable identity of a Slack delivery, shared by all of its retries."""
+    if event.get("event_id"):
+        return str(event["event_id"])
+    inner = event.get("event")
+    if isinstance(inner, dict) and inner.get("client_msg_id"):
+        return f"msg:{inner['client_msg_id']}"
+    if event.get("envelope_id"):
+        return f"env:{event['envelope_id']}"
+    return None
+
+
+class DedupeMiddleware:
+    """Router middleware that drops redeliveries of an event already being handled.
+
+    The first delivery claims its key in Redis (`SET NX EX`), so the claim holds
+    across socket and http processes. Recently seen keys are also remembered
+    in-process, which answers hot duplicates without a Redis round-trip. If Redis is
+    unavailable the event is processed (fail open).
+    """
+
+    def __init__(self, redis: Redis, *, ttl: int = 600, local_size: int = 10_000, prefix: str = "zebras:dedupe:") -> None:
+        self.log = logging.getLogger("zebras.middleware.dedupe")
+        self._redis = redis
+        self._ttl = ttl
+        self._prefix = prefix
+        self._seen = TTLCache(ttl=ttl, max_size=local_size)
+        self.claimed = 0
+        self.duplicates = 0
+        self.duplicates_local = 0
+        self.retries_dropped = 0
+        self.redis_errors = 0
+
+    async def _claim(self, key: str) -> bool:
+        return bool(await self._redis.set(self._prefix + key, b"1", nx=True, ex=self._ttl))
+
+    async def __call__(self, event: Dict[str, Any], nxt: Next) -> None:
+        key = event_key(event)
+        if key is None:
+            await nxt(event)
+            return
+        if self._seen.get(key) is not MISSING:
+            self.duplicates_local += 1
+            self._drop(key, event)
+            return
+        try:
+            claimed = await self._claim(key)
+        except Exception:
+            self.redis_errors += 1
+            self.log.warning("Dedupe claim failed for %s; processing anyway", key, exc_info=True)
+            claimed = True
+        self._seen.set(key, True)
+        if not claimed:
+            self._drop(key, event)
+            return
+        self.claimed += 1
+        await nxt(event)
+
+    def _drop(self, key: str, event: Dict[str, Any]) -> None:
+        self.duplicates += 1
+        if event.get("retry_attempt"):
+            self.retries_dropped += 1
+        self.log.debug("Dropping duplicate delivery %s (retry=%s)", key, event.get("retry_attempt"))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "claimed": self.claimed,
+            "duplicates": self.duplicates,
+            "duplicates_local": self.duplicates_local,
+            "retries_dropped": self.retries_dropped,
+            "redis_errors": self.redis_errors,
+        }
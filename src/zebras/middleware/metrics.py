@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict
+
+from ..metrics import EVENT_SECONDS
+from ..router import Next, event_type
+
+
+class DispatchMetrics:
+    """Router middleware timing each event through the rest of the chain.
+
+    Added first, so the measurement covers later middleware (dedupe) and every
+    handler stage.
+    """
+
+    def __init__(self) -> None:
+        self._children: Dict[str, Any] = {}
+
+    async def __call__(self, event: Dict[str, Any], nxt: Next) -> None:
+        etype = event_type(event) or "unknown"
+        child = self._children.get(etype)
+        if child is None:
+            child = self._children[etype] = EVENT_SECONDS.labels(etype)
+        start = time.perf_counter()
+        try:
+            await nxt(event)
+        finally:
+            child.observe(time.perf_counter() - start)
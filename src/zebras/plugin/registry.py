@@ -17,6 +17,8 @@ class Registry:
     def __init__(self) -> None:
         self.log = logging.getLogger("zebras.plugin.registry")
         self.event_handlers: Dict[str, List[Handler]] = {}
+        # Router binding options per event handler (stage, timeout).
+        self.handler_options: Dict[Handler, Dict[str, Any]] = {}
         self.slash_commands: Dict[str, Handler] = {}
         self.actions: Dict[str, Handler] = {}
         self.views: Dict[str, Handler] = {}
@@ -25,9 +27,16 @@ class Registry:
         def __init__(self, outer: "Registry") -> None:
             self._outer = outer
 
-        def on(self, event_type: str, **filters: Any):  # noqa: ARG002
+        def on(self, event_type: str, *, stage: int = 0, timeout: Optional[float] = None, **filters: Any):  # noqa: ARG002
+            """Register an event handler.
+
+            Handlers run concurrently with the other handlers of the same `stage`;
+            use a higher stage to run after them. `timeout` (seconds) overrides the
+            router default for this handler.
+            """
             def decorator(fn: Handler) -> Handler:
                 self._outer.event_handlers.setdefault(event_type, []).append(fn)
+                self._outer.handler_options[fn] = {"stage": stage, "timeout": timeout}
                 return fn
 
             return decorator
@@ -7,7 +7,6 @@ import logging
 
 from ...plugin import Registry
 from ...app_context import get_context
-from ..invite.repository import InviteSettingsRepository
 
 
 async def _client() -> AsyncWebClient:
@@ -20,8 +19,7 @@ def register(reg: Registry) -> None:
 
     async def build_home_view() -> dict:
         ctx = get_context()
-        repo = InviteSettingsRepository(ctx.engine)
-        s = await repo.get()
+        s = await ctx.invite_settings().get()
         admin_ch = s.admin_channel_id if s else None
         audit_ch = s.audit_channel_id if s else None
         notify = (s.notify_on_join if s else False)
@@ -58,8 +56,7 @@ def register(reg: Registry) -> None:
         trigger_id = payload.get("trigger_id")
         client = await _client()
         ctx = get_context()
-        repo = InviteSettingsRepository(ctx.engine)
-        s = await repo.get()
+        s = await ctx.invite_settings().get()
         view = {
             "type": "modal",
             "callback_id": "admin_settings",
@@ -122,8 +119,7 @@ def register(reg: Registry) -> None:
         dm_message = _text("dm_message")
 
         ctx = get_context()
-        repo = InviteSettingsRepository(ctx.engine)
-        await repo.upsert(admin_channel_id=admin_channel, audit_channel_id=audit_channel, notify_on_join=notify, dm_message=dm_message)
+        await ctx.invite_settings().upsert(admin_channel_id=admin_channel, audit_channel_id=audit_channel, notify_on_join=notify, dm_message=dm_message)
 
     @reg.commands.slash("/zebras-home")
     async def zebras_home_cmd(payload: Dict[str, Any]) -> Dict[str, Any]:
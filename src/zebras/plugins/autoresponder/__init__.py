@@ -8,6 +8,9 @@ from slack_sdk.web.async_client import AsyncWebClient
 from ...plugin import Registry
 from ...app_context import get_context
 from .repository import AutoResponderRepository
+from .matcher import INDEX_MAX_AGE, get_index
+from .cooldown import parse_duration
+from .safe_regex import PatternRejected, validate_pattern
 
 
 async def _client() -> AsyncWebClient:
@@ -15,29 +18,10 @@ async def _client() -> AsyncWebClient:
     return await ctx.web_client()
 
 
-def _matches(rule, text: str) -> bool:
-    if not rule.case_sensitive:
-        text_cmp = text.lower()
-        phrase = (rule.phrase or "").lower()
-    else:
-        text_cmp = text
-        phrase = rule.phrase or ""
-    if rule.match_type == "contains":
-        return phrase in text_cmp
-    if rule.match_type == "exact":
-        return text_cmp == phrase
-    if rule.match_type == "regex":
-        flags = 0 if rule.case_sensitive else re.IGNORECASE
-        try:
-            return re.search(rule.phrase, text, flags) is not None
-        except re.error:
-            return False
-    return False
-
-
 def register(reg: Registry) -> None:
     async def repo() -> AutoResponderRepository:
-        return AutoResponderRepository(get_context().engine)
+        ctx = get_context()
+        return AutoResponderRepository(ctx.engine, ctx.invalidator())
 
     @reg.events.on("message")
     async def on_message(payload: Dict[str, Any]) -> None:
@@ -49,15 +33,16 @@ def register(reg: Registry) -> None:
             return
         channel = e.get("channel")
         ts = e.get("ts")
-        rules = await (await repo()).enabled_for_channel(channel)
-        for r in rules:
-            # Defensive: ensure we have a rule object with expected attrs
-            if not hasattr(r, "phrase") or not hasattr(r, "response_text") or not hasattr(r, "match_type") or not hasattr(r, "case_sensitive"):
-                continue
-            if _matches(r, text):
-                client = await _client()
-                await client.chat_postMessage(channel=channel, text=r.response_text, thread_ts=ts)
-                break  # respond once per message
+        ctx = get_context()
+        index = await get_index(await repo(), max_age=ctx.settings.auto_index_max_age if ctx.settings else INDEX_MAX_AGE)
+        rule = await index.match(channel, text, ctx.auto_regex().search)  # respond once per message
+        if rule is None:
+            return
+        thread_ts = e.get("thread_ts") or ts
+        if not await ctx.auto_cooldowns().acquire(rule, channel, thread_ts):
+            return
+        client = await _client()
+        await client.chat_postMessage(channel=channel, text=rule.response_text, thread_ts=thread_ts)
 
     @reg.commands.slash("/auto")
     async def auto_cmd(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -66,7 +51,10 @@ def register(reg: Registry) -> None:
         Usage:
         /auto add phrase:"hello" reply:"Hi there" match:contains scope:here case:off
         /auto list [here|global]
+        /auto cooldown <id> [cooldown:5m] [channel_cooldown:1h] [thread_cooldown:10m] [once:on|off]
         /auto enable <id> | disable <id> | delete <id>
+
+        `add` takes the same cooldown options.
         """
         text = (payload.get("text") or "").strip()
         channel_id = payload.get("channel_id")
@@ -82,6 +70,15 @@ def register(reg: Registry) -> None:
                 out.setdefault(m.group(1), m.group(2))
             return out
 
+        def parse_cooldowns(args: dict) -> dict:
+            out = {}
+            for key in ("cooldown", "channel_cooldown", "thread_cooldown"):
+                if key in args:
+                    out[key] = parse_duration(args[key])
+            if "once" in args:
+                out["once_per_thread"] = args["once"].lower() in ("on", "true", "1", "thread")
+            return out
+
         if text.startswith("add "):
             args = parse_kv(text[4:])
             phrase = args.get("phrase") or args.get("p")
@@ -93,10 +90,23 @@ def register(reg: Registry) -> None:
                 return {"response_type": "ephemeral", "text": "match must be one of: contains|exact|regex"}
             if not phrase or not reply:
                 return {"response_type": "ephemeral", "text": "Provide phrase:" + '".."' + " and reply:" + '".."'}
+            try:
+                cooldowns = parse_cooldowns(args)
+            except ValueError as exc:
+                return {"response_type": "ephemeral", "text": f"{exc}. Use seconds or 30s / 5m / 2h / 1d."}
+            warnings = []
+            if match == "regex":
+                try:
+                    warnings = validate_pattern(phrase, case)
+                except PatternRejected as exc:
+                    return {"response_type": "ephemeral", "text": f"Regex not added: {exc}. Simplify the pattern or use match:contains."}
             target = None if scope == "global" else channel_id
-            rid = await r.add(phrase=phrase, response_text=reply, match_type=match, case_sensitive=case, channel_id=target)
+            rid = await r.add(phrase=phrase, response_text=reply, match_type=match, case_sensitive=case, channel_id=target, **cooldowns)
             scope_label = "global" if target is None else f"<#{channel_id}>"
-            return {"response_type": "ephemeral", "text": f"Added rule #{rid} ({match}, case={'on' if case else 'off'}) in {scope_label}"}
+            text = f"Added rule #{rid} ({match}, case={'on' if case else 'off'}) in {scope_label}"
+            if warnings:
+                text += "\nWarning: " + "; ".join(warnings) + "."
+            return {"response_type": "ephemeral", "text": text}
 
         if text.startswith("list"):
             scope = text.split(" ", 1)[1].strip() if " " in text else "here"
@@ -104,9 +114,41 @@ def register(reg: Registry) -> None:
             rules = await r.list(channel_id=target)
             if not rules:
                 return {"response_type": "ephemeral", "text": "No rules found."}
-            lines = [f"#{x.id} [{'on' if x.enabled else 'off'}] ({x.match_type}) {'GLOBAL' if x.channel_id is None else '<#'+x.channel_id+'>'} — {x.phrase!r} -> {x.response_text!r}" for x in rules]
+            cooldowns = get_context().auto_cooldowns()
+            regex = get_context().auto_regex()
+            totals = await cooldowns.counts(x["id"] for x in rules)
+            lines = []
+            for x in rules:
+                line = f"#{x['id']} [{'on' if x['enabled'] else 'off'}] ({x['match_type']}) {'GLOBAL' if x['channel_id'] is None else '<#'+x['channel_id']+'>'} — {x['phrase']!r} -> {x['response_text']!r}"
+                limits = [f"{label} {x[key]}s" for key, label in (("cooldown", "cooldown"), ("channel_cooldown", "channel"), ("thread_cooldown", "thread")) if x[key]]
+                if x["once_per_thread"]:
+                    limits.append("once per thread")
+                if limits:
+                    line += f" [{', '.join(limits)}]"
+                counts = totals.get(x["id"])
+                if counts:
+                    line += f" — hits {counts['hits']}, replies {counts['replies']}, suppressed {counts['suppressed'] + counts['suppressed_local']}"
+                timing = regex.timing(x["id"]) if x["match_type"] == "regex" else None
+                if timing:
+                    line += f" — regex avg {1000 * timing['seconds'] / timing['calls']:.2f}ms, max {1000 * timing['max_seconds']:.2f}ms"
+                    if timing["timeouts"]:
+                        line += f", {timing['timeouts']} timeouts"
+                lines.append(line)
             return {"response_type": "ephemeral", "text": "\n".join(lines)}
 
+        m = re.match(r"^cooldown\s+(\d+)(.*)$", text)
+        if m:
+            sid = int(m.group(1))
+            try:
+                cooldowns = parse_cooldowns(parse_kv(m.group(2)))
+            except ValueError as exc:
+                return {"response_type": "ephemeral", "text": f"{exc}. Use seconds or 30s / 5m / 2h / 1d."}
+            if not cooldowns:
+                return {"response_type": "ephemeral", "text": "Usage: /auto cooldown <id> [cooldown:5m] [channel_cooldown:1h] [thread_cooldown:10m] [once:on|off]  (0 = none)"}
+            if not await r.set_cooldowns(sid, **cooldowns):
+                return {"response_type": "ephemeral", "text": f"No rule #{sid}"}
+            return {"response_type": "ephemeral", "text": f"Updated cooldowns for rule #{sid}"}
+
         m = re.match(r"^(enable|disable)\s+(\d+)$", text)
         if m:
             action, sid = m.group(1), int(m.group(2))
@@ -121,5 +163,5 @@ def register(reg: Registry) -> None:
 
         return {
             "response_type": "ephemeral",
-            "text": "Usage:\n/auto add phrase:\"hello\" reply:\"Hi\" match:contains scope:here case:off\n/auto list [here|global]\n/auto enable <id> | disable <id> | delete <id>",
+            "text": "Usage:\n/auto add phrase:\"hello\" reply:\"Hi\" match:contains scope:here case:off [cooldown:5m] [channel_cooldown:1h] [thread_cooldown:10m] [once:on]\n/auto list [here|global]\n/auto cooldown <id> [cooldown:…] [channel_cooldown:…] [thread_cooldown:…] [once:on|off]\n/auto enable <id> | disable <id> | delete <id>",
         }
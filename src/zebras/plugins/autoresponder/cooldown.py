@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from redis.asyncio import Redis
+
+from ...storage.cache import MISSING, TTLCache
+from .matcher import CompiledRule
+
+
+# How long "once per thread" remembers a thread.
+ONCE_PER_THREAD_TTL = 7 * 86_400
+
+COUNT_FIELDS = ("hits", "replies", "suppressed", "suppressed_local")
+
+_DURATION = re.compile(r"^(\d+)([smhd]?)$")
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3_600, "d": 86_400}
+
+
+def parse_duration(value: str) -> int:
+    """Seconds from `90`, `90s`, `5m`, `2h` or `1d`."""
+    m = _DURATION.match(value.strip().lower())
+    if not m:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return int(m.group(1)) * _UNITS[m.group(2)]
+
+
+class ReplyCooldowns:
+    """Decides whether a matched rule may reply, before any Slack call is made.
+
+    Each of a rule's cooldowns (anywhere, per channel, per thread) is a Redis key
+    claimed with `SET NX EX`; the reply goes out only if every key was free. All
+    claims for a message are one pipelined round-trip, which also reads back each
+    key's remaining TTL so this process can answer later matches for a held key
+    without Redis. If Redis is unavailable the cooldowns are kept in-process only.
+
+    Per-rule totals for `/auto list` are Redis hashes (`<prefix>counts:<rule>`)
+    shared by every process. Outcomes are added with `HINCRBY` in the next claim
+    pipeline, or by a flush `flush_interval` seconds later if none comes first.
+    """
+
+    def __init__(self, redis: Redis, *, local_size: int = 10_000, prefix: str = "zebras:auto:cooldown:", flush_interval: float = 1.0) -> None:
+        self.log = logging.getLogger("zebras.plugins.autoresponder")
+        self._redis = redis
+        self._prefix = prefix
+        self.flush_interval = flush_interval
+        # key -> monotonic time the cooldown ends
+        self._held = TTLCache(ttl=ONCE_PER_THREAD_TTL, max_size=local_size)
+        # This process's counts (for /metrics) and those not yet written to Redis.
+        self._counts: Dict[int, Dict[str, int]] = {}
+        self._pending: Dict[int, Dict[str, int]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self.redis_errors = 0
+
+    def _keys(self, rule: CompiledRule, channel_id: str, thread_ts: Optional[str]) -> List[Tuple[str, int]]:
+        base = f"{self._prefix}{rule.id}"
+        keys: List[Tuple[str, int]] = []
+        if rule.cooldown > 0:
+            keys.append((base, rule.cooldown))
+        if rule.channel_cooldown > 0:
+            keys.append((f"{base}:{channel_id}", rule.channel_cooldown))
+        thread_ttl = ONCE_PER_THREAD_TTL if rule.once_per_thread else rule.thread_cooldown
+        if thread_ttl > 0 and thread_ts:
+            keys.append((f"{base}:{channel_id}:{thread_ts}", thread_ttl))
+        return keys
+
+    def _count(self, rule: CompiledRule, outcome: str) -> None:
+        for table in (self._counts, self._pending):
+            counts = table.get(rule.id)
+            if counts is None:
+                counts = table[rule.id] = dict.fromkeys(COUNT_FIELDS, 0)
+            counts["hits"] += 1
+            counts[outcome] += 1
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_later())
+
+    def _counts_key(self, rule_id: int) -> str:
+        return f"{self._prefix}counts:{rule_id}"
+
+    def _queue_counts(self, pipe: Any) -> Dict[int, Dict[str, int]]:
+        pending, self._pending = self._pending, {}
+        for rule_id, counts in pending.items():
+            key = self._counts_key(rule_id)
+            for field, n in counts.items():
+                if n:
+                    pipe.hincrby(key, field, n)
+        return pending
+
+    def _requeue(self, pending: Dict[int, Dict[str, int]]) -> None:
+        for rule_id, counts in pending.items():
+            mine = self._pending.setdefault(rule_id, dict.fromkeys(COUNT_FIELDS, 0))
+            for field, n in counts.items():
+                mine[field] += n
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+        finally:
+            self._flusher = None
+
+    async def flush(self) -> None:
+        """Write counts not yet carried by a claim pipeline."""
+        if not self._pending:
+            return
+        pipe = self._redis.pipeline(transaction=False)
+        pending = self._queue_counts(pipe)
+        try:
+            await pipe.execute()
+        except Exception:
+            self.redis_errors += 1
+            self._requeue(pending)
+
+    async def acquire(self, rule: CompiledRule, channel_id: str, thread_ts: Optional[str]) -> bool:
+        keys = self._keys(rule, channel_id, thread_ts)
+        if not keys:
+            self._count(rule, "replies")
+            return True
+        now = time.monotonic()
+        for key, _ in keys:
+            until = self._held.get(key)
+            if until is not MISSING and until > now:
+                self._count(rule, "suppressed_local")
+                return False
+
+        pipe = self._redis.pipeline(transaction=False)
+        for key, ttl in keys:
+            pipe.set(key, b"1", nx=True, ex=ttl)
+            pipe.pttl(key)
+        pending = self._queue_counts(pipe)
+        try:
+            results = await pipe.execute()
+        except Exception:
+            self.redis_errors += 1
+            self._requeue(pending)
+            self.log.warning("Cooldown claim failed for rule #%s; using local cooldowns", rule.id, exc_info=True)
+            for key, ttl in keys:
+                self._held.set(key, now + ttl)
+            self._count(rule, "replies")
+            return True
+
+        claimed: List[str] = []
+        for i, (key, _) in enumerate(keys):
+            if results[2 * i]:
+                claimed.append(key)
+            remaining = results[2 * i + 1]
+            if remaining and remaining > 0:
+                self._held.set(key, now + remaining / 1000)
+        if len(claimed) == len(keys):
+            self._count(rule, "replies")
+            return True
+        if claimed:
+            # No reply goes out, so give back the cooldowns this message took.
+            for key in claimed:
+                self._held.pop(key)
+            try:
+                await self._redis.delete(*claimed)
+            except Exception:
+                self.redis_errors += 1
+        self._count(rule, "suppressed")
+        return False
+
+    async def counts(self, rule_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        """Totals across all processes, for rules that have matched at least once."""
+        rule_ids = list(rule_ids)
+        pipe = self._redis.pipeline(transaction=False)
+        for rule_id in rule_ids:
+            pipe.hgetall(self._counts_key(rule_id))
+        try:
+            rows = await pipe.execute()
+        except Exception:
+            self.redis_errors += 1
+            return {rid: dict(self._counts[rid]) for rid in rule_ids if rid in self._counts}
+        totals: Dict[int, Dict[str, int]] = {}
+        for rule_id, row in zip(rule_ids, rows):
+            pending = self._pending.get(rule_id)
+            if not row and not pending:
+                continue
+            counts = {field: int(row.get(field.encode(), row.get(field, 0))) for field in COUNT_FIELDS}
+            for field, n in (pending or {}).items():
+                counts[field] += n
+            totals[rule_id] = counts
+        return totals
+
+    async def close(self) -> None:
+        """Write outstanding counts (waits for a scheduled flush rather than cutting it off)."""
+        if self._flusher is not None:
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> Dict[int, Dict[str, int]]:
+        return {rid: dict(c) for rid, c in self._counts.items()}
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .safe_regex import SafePattern, compile_pattern
+
+
+# Below this many phrases a plain `in` scan (C speed per phrase) beats walking the
+# automaton character by character in Python.
+_AUTOMATON_MIN_PHRASES = 8
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    response_text: str
+    # Carried on the rule so the reply path never goes back to the database.
+    cooldown: int = 0
+    channel_cooldown: int = 0
+    thread_cooldown: int = 0
+    once_per_thread: bool = False
+
+
+def _better(a: Optional[CompiledRule], b: Optional[CompiledRule]) -> Optional[CompiledRule]:
+    # Rules are evaluated in id order, so the lowest id wins.
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a if a.id <= b.id else b
+
+
+class _PhraseScan:
+    def __init__(self, pairs: Sequence[Tuple[str, CompiledRule]]) -> None:
+        self._pairs = tuple(sorted(pairs, key=lambda p: p[1].id))
+
+    def search(self, text: str) -> Optional[CompiledRule]:
+        for phrase, rule in self._pairs:
+            if phrase in text:
+                return rule
+        return None
+
+
+class _Automaton:
+    """Aho-Corasick automaton over `contains` phrases; one pass per message."""
+
+    def __init__(self, pairs: Sequence[Tuple[str, CompiledRule]]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        fail: List[int] = [0]
+        out: List[Optional[CompiledRule]] = [None]
+        for phrase, rule in pairs:
+            s = 0
+            for ch in phrase:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[s][ch] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    out.append(None)
+                s = nxt
+            out[s] = _better(out[s], rule)
+
+        queue = deque(goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, t in goto[s].items():
+                queue.append(t)
+                f = fail[s]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[t] = goto[f].get(ch, 0)
+                out[t] = _better(out[t], out[fail[t]])
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._min_id = min(rule.id for _, rule in pairs)
+
+    def search(self, text: str) -> Optional[CompiledRule]:
+        goto, fail, out = self._goto, self._fail, self._out
+        best: Optional[CompiledRule] = None
+        s = 0
+        for ch in text:
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            hit = out[s]
+            if hit is not None and (best is None or hit.id < best.id):
+                best = hit
+                if best.id == self._min_id:
+                    break
+        return best
+
+
+def _phrase_index(pairs: List[Tuple[str, CompiledRule]]):
+    if not pairs:
+        return None
+    if len(pairs) < _AUTOMATON_MIN_PHRASES:
+        return _PhraseScan(pairs)
+    return _Automaton(pairs)
+
+
+class RuleSet:
+    """Precompiled rules for a single scope (global or one channel)."""
+
+    def __init__(self, rules: Iterable) -> None:
+        exact_cs: Dict[str, CompiledRule] = {}
+        exact_ci: Dict[str, CompiledRule] = {}
+        contains_cs: List[Tuple[str, CompiledRule]] = []
+        contains_ci: List[Tuple[str, CompiledRule]] = []
+        regex: List[Tuple[CompiledRule, SafePattern]] = []
+        always: Optional[CompiledRule] = None
+
+        for r in rules:
+            rule = CompiledRule(
+                id=int(r.id),
+                response_text=r.response_text,
+                cooldown=r.cooldown or 0,
+                channel_cooldown=r.channel_cooldown or 0,
+                thread_cooldown=r.thread_cooldown or 0,
+                once_per_thread=bool(r.once_per_thread),
+            )
+            phrase = r.phrase or ""
+            if r.match_type == "regex":
+                try:
+                    pattern = compile_pattern(phrase, bool(r.case_sensitive))
+                except re.error:
+                    continue
+                regex.append((rule, pattern))
+                continue
+            key = phrase if r.case_sensitive else phrase.lower()
+            if r.match_type == "exact":
+                target = exact_cs if r.case_sensitive else exact_ci
+                target[key] = _better(target.get(key), rule)
+            elif r.match_type == "contains":
+                if not key:
+                    # An empty phrase is contained in every message.
+                    always = _better(always, rule)
+                elif r.case_sensitive:
+                    contains_cs.append((key, rule))
+                else:
+                    contains_ci.append((key, rule))
+
+        regex.sort(key=lambda p: p[0].id)
+        self._exact_cs = exact_cs
+        self._exact_ci = exact_ci
+        self._contains_cs = _phrase_index(contains_cs)
+        self._contains_ci = _phrase_index(contains_ci)
+        self.regex = tuple(regex)
+        self._always = always
+        self._needs_lower = bool(exact_ci or contains_ci)
+
+    def __bool__(self) -> bool:
+        return bool(
+            self._exact_cs or self._exact_ci or self._contains_cs or self._contains_ci
+            or self.regex or self._always
+        )
+
+    def match_static(self, text: str) -> Optional[CompiledRule]:
+        """Best exact/contains match; regex rules are left to `AutoResponderIndex.match`."""
+        best = self._always
+        if self._exact_cs:
+            best = _better(best, self._exact_cs.get(text))
+        if self._contains_cs is not None:
+            best = _better(best, self._contains_cs.search(text))
+        if self._needs_lower:
+            lowered = text.lower()
+            if self._exact_ci:
+                best = _better(best, self._exact_ci.get(lowered))
+            if self._contains_ci is not None:
+                best = _better(best, self._contains_ci.search(lowered))
+        return best
+
+
+_EMPTY = RuleSet(())
+
+# `RegexRunner.search`: (rule id, pattern, text) -> matched, time-bounded.
+RegexSearch = Callable[[int, SafePattern, str], Awaitable[bool]]
+
+
+class AutoResponderIndex:
+    """Enabled rules grouped by scope; `None` is the global scope."""
+
+    def __init__(self, rules: Iterable) -> None:
+        grouped: Dict[Optional[str], list] = {}
+        for r in rules:
+            grouped.setdefault(r.channel_id, []).append(r)
+        self._scopes = {scope: RuleSet(rs) for scope, rs in grouped.items()}
+        self._global = self._scopes.get(None, _EMPTY)
+        # Regex rules a channel sees (its own and global ones), in id order.
+        self._regex = {
+            scope: tuple(sorted(self._global.regex + rs.regex, key=lambda p: p[0].id))
+            for scope, rs in self._scopes.items() if scope is not None
+        }
+
+    async def match(self, channel_id: Optional[str], text: str, search: RegexSearch) -> Optional[CompiledRule]:
+        best = self._global.match_static(text) if self._global else None
+        scoped = self._scopes.get(channel_id) if channel_id is not None else None
+        if scoped:
+            best = _better(best, scoped.match_static(text))
+        regex = self._regex.get(channel_id, self._global.regex) if channel_id is not None else self._global.regex
+        for rule, pattern in regex:
+            # Only a lower id than the best static match can still win.
+            if best is not None and rule.id > best.id:
+                break
+            if await search(rule.id, pattern, text):
+                return rule
+        return best
+
+
+AUTO_RESPONDER_TOPIC = "auto_responder"
+
+# Rebuilt at least this often even without an invalidation: pub/sub messages sent
+# while a process's listener is reconnecting are lost.
+INDEX_MAX_AGE = 300.0
+
+_index: Optional[AutoResponderIndex] = None
+_built_at = 0.0
+_generation = 0
+_subscribed: object = None
+_lock = asyncio.Lock()
+
+
+def invalidate(_key: Optional[str] = None) -> None:
+    """Drop the compiled index; the next message rebuilds it from the database."""
+    global _index, _generation
+    _generation += 1
+    _index = None
+
+
+def _fresh(max_age: float) -> Optional[AutoResponderIndex]:
+    index = _index
+    if index is not None and time.monotonic() - _built_at < max_age:
+        return index
+    return None
+
+
+async def get_index(repo, *, max_age: float = INDEX_MAX_AGE) -> AutoResponderIndex:
+    global _index, _built_at, _subscribed
+    index = _fresh(max_age)
+    if index is not None:
+        return index
+    async with _lock:
+        index = _fresh(max_age)
+        if index is not None:
+            return index
+        if repo.invalidator is not None and _subscribed is not repo.invalidator:
+            repo.invalidator.subscribe(AUTO_RESPONDER_TOPIC, invalidate)
+            _subscribed = repo.invalidator
+        generation = _generation
+        built_at = time.monotonic()
+        index = AutoResponderIndex(await repo.enabled_rules())
+        # A write that landed while we were loading leaves the index stale; serve it
+        # for this message but rebuild on the next one.
+        if generation == _generation:
+            _index, _built_at = index, built_at
+        return index
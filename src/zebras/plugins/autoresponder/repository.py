@@ -6,14 +6,25 @@ from datetime import datetime, timezone
 from sqlalchemy import insert, select, update, delete
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from ...metrics import timed_query
+from ...storage.cache import CacheInvalidator
 from ...storage.models import AutoResponderRule
+from . import matcher
 
 
 class AutoResponderRepository:
-    def __init__(self, engine: AsyncEngine) -> None:
+    def __init__(self, engine: AsyncEngine, invalidator: Optional[CacheInvalidator] = None) -> None:
         self.engine = engine
+        self.invalidator = invalidator
 
-    async def add(self, *, phrase: str, response_text: str, match_type: str = "contains", case_sensitive: bool = False, channel_id: Optional[str] = None) -> int:
+    async def _changed(self) -> None:
+        matcher.invalidate()
+        if self.invalidator is not None:
+            await self.invalidator.publish(matcher.AUTO_RESPONDER_TOPIC)
+
+    @timed_query
+    async def add(self, *, phrase: str, response_text: str, match_type: str = "contains", case_sensitive: bool = False, channel_id: Optional[str] = None,
+                  cooldown: int = 0, channel_cooldown: int = 0, thread_cooldown: int = 0, once_per_thread: bool = False) -> int:
         now = datetime.now(timezone.utc)
         async with self.engine.begin() as conn:
             res = await conn.execute(
@@ -25,14 +36,20 @@ class AutoResponderRepository:
                     case_sensitive=case_sensitive,
                     channel_id=channel_id,
                     enabled=True,
+                    cooldown=cooldown,
+                    channel_cooldown=channel_cooldown,
+                    thread_cooldown=thread_cooldown,
+                    once_per_thread=once_per_thread,
                     created_at=now,
                     updated_at=now,
                 )
                 .returning(AutoResponderRule.id)
             )
             rid = res.scalar_one()
-            return int(rid)
+        await self._changed()
+        return int(rid)
 
+    @timed_query
     async def list(self, *, channel_id: Optional[str] = None, limit: int = 50) -> List[dict]:
         async with self.engine.connect() as conn:
             stmt = select(
@@ -43,6 +60,10 @@ class AutoResponderRepository:
                 AutoResponderRule.channel_id,
                 AutoResponderRule.phrase,
                 AutoResponderRule.response_text,
+                AutoResponderRule.cooldown,
+                AutoResponderRule.channel_cooldown,
+                AutoResponderRule.thread_cooldown,
+                AutoResponderRule.once_per_thread,
             ).order_by(AutoResponderRule.id.desc()).limit(limit)
             if channel_id is None:
                 stmt = stmt.where(AutoResponderRule.channel_id.is_(None))
@@ -51,6 +72,7 @@ class AutoResponderRepository:
             res = await conn.execute(stmt)
             return [dict(row._mapping) for row in res.all()]
 
+    @timed_query
     async def enabled_for_channel(self, channel_id: str) -> List[AutoResponderRule]:
         async with self.engine.connect() as conn:
             stmt = select(AutoResponderRule).where(
@@ -59,6 +81,26 @@ class AutoResponderRepository:
             res = await conn.execute(stmt)
             return list(res.scalars())
 
+    @timed_query
+    async def enabled_rules(self) -> List:
+        """All enabled rules across every scope, in evaluation (id) order."""
+        async with self.engine.connect() as conn:
+            stmt = select(
+                AutoResponderRule.id,
+                AutoResponderRule.match_type,
+                AutoResponderRule.case_sensitive,
+                AutoResponderRule.channel_id,
+                AutoResponderRule.phrase,
+                AutoResponderRule.response_text,
+                AutoResponderRule.cooldown,
+                AutoResponderRule.channel_cooldown,
+                AutoResponderRule.thread_cooldown,
+                AutoResponderRule.once_per_thread,
+            ).where(AutoResponderRule.enabled == True).order_by(AutoResponderRule.id.asc())  # noqa: E712
+            res = await conn.execute(stmt)
+            return list(res.all())
+
+    @timed_query
     async def toggle(self, rid: int, enabled: bool) -> None:
         async with self.engine.begin() as conn:
             await conn.execute(
@@ -66,7 +108,33 @@ class AutoResponderRepository:
                 .where(AutoResponderRule.id == rid)
                 .values(enabled=enabled, updated_at=datetime.now(timezone.utc))
             )
+        await self._changed()
+
+    @timed_query
+    async def set_cooldowns(self, rid: int, *,
+                            cooldown: Optional[int] = None,
+                            channel_cooldown: Optional[int] = None,
+                            thread_cooldown: Optional[int] = None,
+                            once_per_thread: Optional[bool] = None) -> bool:
+        values = {
+            k: v for k, v in (
+                ("cooldown", cooldown),
+                ("channel_cooldown", channel_cooldown),
+                ("thread_cooldown", thread_cooldown),
+                ("once_per_thread", once_per_thread),
+            ) if v is not None
+        }
+        async with self.engine.begin() as conn:
+            res = await conn.execute(
+                update(AutoResponderRule)
+                .where(AutoResponderRule.id == rid)
+                .values(**values, updated_at=datetime.now(timezone.utc))
+            )
+        await self._changed()
+        return bool(res.rowcount)
 
+    @timed_query
     async def remove(self, rid: int) -> None:
         async with self.engine.begin() as conn:
             await conn.execute(delete(AutoResponderRule).where(AutoResponderRule.id == rid))
+        await self._changed()
@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import re
+import time
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+try:  # google-re2: linear-time matching, no backtracking
+    import re2
+except ImportError:  # pragma: no cover - optional
+    re2 = None
+
+
+class PatternRejected(ValueError):
+    """A regex rule pattern that does not compile or can backtrack catastrophically."""
+
+
+def _unbounded(hi: int) -> bool:
+    return hi == sre_parse.MAXREPEAT
+
+
+_REPEATS = ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+_ZERO_WIDTH = ("AT", "ASSERT", "ASSERT_NOT")
+
+# Stand-ins for "any character" when asking whether two parts can match the same text.
+_SAMPLE = frozenset(map(chr, range(256))) | frozenset("\u00a0\u2003\u0436\u03a3\u0663\u4e2d")
+_CATEGORIES = {
+    "CATEGORY_DIGIT": r"\d",
+    "CATEGORY_NOT_DIGIT": r"\D",
+    "CATEGORY_SPACE": r"\s",
+    "CATEGORY_NOT_SPACE": r"\S",
+    "CATEGORY_WORD": r"\w",
+    "CATEGORY_NOT_WORD": r"\W",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _category(name: str) -> FrozenSet[str]:
+    rx = re.compile(_CATEGORIES[name])
+    return frozenset(c for c in _SAMPLE if rx.match(c))
+
+
+def _fold(chars: Iterable[str]) -> FrozenSet[str]:
+    # Case-insensitive rules match both cases; assume that everywhere.
+    chars = set(chars)
+    return frozenset(chars | {c.lower() for c in chars} | {c.upper() for c in chars})
+
+
+def _leaf(name: str, av: Any) -> Optional[FrozenSet[str]]:
+    """Characters a single-character item can match; None for anything else."""
+    if name == "LITERAL":
+        return _fold(chr(av))
+    if name == "NOT_LITERAL":
+        return _SAMPLE - {chr(av)}
+    if name == "ANY":
+        return _SAMPLE
+    if name != "IN":
+        return None
+    chars: Set[str] = set()
+    negate = False
+    for op, v in av:
+        kind = str(op)
+        if kind == "NEGATE":
+            negate = True
+        elif kind == "LITERAL":
+            chars.add(chr(v))
+        elif kind == "RANGE":
+            chars.update({chr(v[0]), chr(v[1])}, (c for c in _SAMPLE if v[0] <= ord(c) <= v[1]))
+        elif kind == "CATEGORY":
+            chars |= _category(str(v))
+        else:
+            return _SAMPLE
+    return _SAMPLE - chars if negate else _fold(chars)
+
+
+def _overlapping_class(items: Any) -> bool:
+    # `(\w|\d)` is parsed into the class `[\w\d]`; overlapping members are how
+    # such alternatives show up.
+    parts = [_leaf("IN", [item]) for item in items if str(item[0]) != "NEGATE"]
+    return any(a & b for i, a in enumerate(parts) for b in parts[i + 1:])
+
+
+def _chars(items: Any) -> FrozenSet[str]:
+    """Every character some part of `items` can consume (over-approximated)."""
+    out: Set[str] = set()
+    for op, av in items:
+        name = str(op)
+        leaf = _leaf(name, av)
+        if leaf is not None:
+            out |= leaf
+        elif name in _REPEATS:
+            out |= _chars(av[2])
+        elif name == "SUBPATTERN":
+            out |= _chars(av[-1])
+        elif name == "ATOMIC_GROUP":
+            out |= _chars(av)
+        elif name == "BRANCH":
+            for b in av[1]:
+                out |= _chars(b)
+        elif name not in _ZERO_WIDTH:
+            return _SAMPLE
+    return frozenset(out)
+
+
+def _nullable(items: Any) -> bool:
+    """Whether `items` can match the empty string (over-approximated)."""
+    for op, av in items:
+        name = str(op)
+        if _leaf(name, av) is not None:
+            return False
+        if name in _REPEATS and av[0] > 0 and not _nullable(av[2]):
+            return False
+        if name == "SUBPATTERN" and not _nullable(av[-1]):
+            return False
+        if name == "ATOMIC_GROUP" and not _nullable(av):
+            return False
+        if name == "BRANCH" and not any(_nullable(b) for b in av[1]):
+            return False
+    return True
+
+
+def _first(items: Any) -> FrozenSet[str]:
+    """Characters `items` can start with (over-approximated)."""
+    out: Set[str] = set()
+    for op, av in items:
+        name = str(op)
+        leaf = _leaf(name, av)
+        if leaf is not None:
+            return frozenset(out | leaf)
+        if name in _REPEATS:
+            out |= _first(av[2])
+        elif name == "SUBPATTERN":
+            out |= _first(av[-1])
+        elif name == "ATOMIC_GROUP":
+            out |= _first(av)
+        elif name == "BRANCH":
+            for b in av[1]:
+                out |= _first(b)
+        elif name not in _ZERO_WIDTH:
+            return _SAMPLE
+        if not _nullable([(op, av)]):
+            break
+    return frozenset(out)
+
+
+def _check(items: Any, repeated: bool, warnings: List[str]) -> None:
+    """Walk a parsed pattern; `repeated` is set inside a group that can repeat.
+
+    Deliberately conservative: a pattern is refused if it merely looks like one
+    of the shapes behind runaway backtracking.
+    """
+    # Characters of the last unbounded repeat, while only empty-matchable parts follow it.
+    previous: Optional[FrozenSet[str]] = None
+    for op, av in items:
+        name = str(op)
+        if name in ("MAX_REPEAT", "MIN_REPEAT"):
+            lo, hi, body = av
+            if repeated and _unbounded(hi):
+                raise PatternRejected("a quantifier inside a repeated group, such as (a+)+ or (.*a){8}, can take exponential time")
+            if repeated and lo == 0:
+                warnings.append("an optional part inside a repeated group can be slow on long messages")
+            if _unbounded(hi):
+                chars = _chars(body)
+                if previous is not None and previous & chars:
+                    raise PatternRejected("repeats next to each other that match the same characters, such as \\w*\\w*, can take polynomial time")
+                previous = chars
+            elif not _nullable([(op, av)]):
+                previous = None
+            _check(body, repeated or hi > 1, warnings)
+            continue
+        if name == "SUBPATTERN":
+            _check(av[-1], repeated, warnings)
+        elif name == "BRANCH":
+            branches = av[1]
+            if repeated:
+                firsts = [_first(b) for b in branches]
+                if any(_nullable(b) for b in branches) or any(
+                    a & b for i, a in enumerate(firsts) for b in firsts[i + 1:]
+                ):
+                    raise PatternRejected("alternatives that can match the same text, inside a repeat, can take exponential time")
+            for b in branches:
+                _check(b, repeated, warnings)
+        elif name == "IN" and repeated and _overlapping_class(av):
+            raise PatternRejected("alternatives that can match the same text, inside a repeat, can take exponential time")
+        elif name in ("ASSERT", "ASSERT_NOT"):
+            _check(av[1], repeated, warnings)
+        elif name == "GROUPREF_EXISTS":
+            _check(av[1], repeated, warnings)
+            if av[2] is not None:
+                _check(av[2], repeated, warnings)
+        # ATOMIC_GROUP and POSSESSIVE_REPEAT never backtrack into themselves.
+        if not _nullable([(op, av)]):
+            previous = None
+
+
+def validate_pattern(pattern: str, case_sensitive: bool = False) -> List[str]:
+    """Raise `PatternRejected` for unusable patterns; return warnings for risky ones.
+
+    Rejected: patterns that do not compile, and the shapes behind catastrophic
+    backtracking (a quantifier inside a repeated group, adjacent repeats over the
+    same characters, overlapping alternatives inside a repeat). With RE2
+    available matching is linear anyway, so only patterns neither engine can
+    compile are rejected. Passing is no guarantee of speed: without RE2 every
+    search still runs time-bounded in `RegexRunner`'s pool.
+    """
+    try:
+        compiled = compile_pattern(pattern, case_sensitive)
+    except re.error as exc:
+        raise PatternRejected(f"invalid regex: {exc}") from None
+    if compiled.linear:
+        return []
+    warnings: List[str] = []
+    _check(sre_parse.parse(pattern).data, False, warnings)
+    return sorted(set(warnings))
+
+
+class SafePattern:
+    """A compiled rule pattern; `linear` when RE2 compiled it."""
+
+    __slots__ = ("source", "flags", "compiled", "linear")
+
+    def __init__(self, source: str, flags: int, compiled: Any, linear: bool) -> None:
+        self.source = source
+        self.flags = flags
+        self.compiled = compiled
+        self.linear = linear
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_pattern(pattern: str, case_sensitive: bool = False) -> SafePattern:
+    """Compile once per (pattern, case); index rebuilds reuse the cached object."""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if re2 is not None:
+        try:
+            return SafePattern(pattern, flags, re2.compile(pattern if case_sensitive else f"(?i){pattern}"), True)
+        except Exception:
+            # Backreferences, lookaround: RE2 cannot run these; use `re` off-loop.
+            pass
+    return SafePattern(pattern, flags, re.compile(pattern, flags), False)
+
+
+def _search(source: str, flags: int, text: str) -> bool:
+    # Runs in a pool process; `re` keeps its own compile cache there.
+    return re.compile(source, flags).search(text) is not None
+
+
+def _mp_context() -> Any:
+    # Never fork the bot itself (threads, sockets); a fork server forks clean workers.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+class _Abandoned(Exception):
+    """The pool running this search was killed for another rule's runaway search."""
+
+
+class RegexRunner:
+    """Time-bounded regex search for auto-responder rules.
+
+    RE2 patterns run inline (linear time). Anything else runs in a small process
+    pool, however harmless it looks to `validate_pattern`, and is abandoned after
+    `timeout` seconds: the pool is terminated (killing the runaway search) and
+    recreated on demand. At most `workers` searches are submitted at once, so a
+    search's clock only starts when a process is free to run it and a timeout is
+    charged to the rule that actually ran too long. A rule that times out
+    `max_timeouts` times is skipped in this process until the index is rebuilt.
+    Per-rule timings are kept for `/auto list` and /metrics.
+    """
+
+    def __init__(self, *, timeout: float = 0.1, workers: int = 1, max_timeouts: int = 3) -> None:
+        self.log = logging.getLogger("zebras.plugins.autoresponder")
+        self.timeout = timeout
+        self.workers = workers
+        self.max_timeouts = max_timeouts
+        self._pool: Any = None
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(workers)
+        self._inflight: Set[asyncio.Future] = set()
+        self._closing: Set[asyncio.Future] = set()
+        self._timings: Dict[int, Dict[str, float]] = {}
+        self._skipped: Set[int] = set()
+
+    async def _get_pool(self) -> Any:
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    # Starting the fork server imports this package; keep that off the loop.
+                    loop = asyncio.get_running_loop()
+                    self._pool = await loop.run_in_executor(None, lambda: _mp_context().Pool(self.workers))
+        return self._pool
+
+    def _record(self, rule_id: int, elapsed: float, *, timed_out: bool = False) -> None:
+        t = self._timings.get(rule_id)
+        if t is None:
+            t = self._timings[rule_id] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "timeouts": 0}
+        t["calls"] += 1
+        t["seconds"] += elapsed
+        if elapsed > t["max_seconds"]:
+            t["max_seconds"] = elapsed
+        if timed_out:
+            t["timeouts"] += 1
+
+    def _terminate(self, pool: Any) -> None:
+        if pool is self._pool:
+            self._pool = None
+        # Searches still running on this pool will never answer; release them now.
+        for fut in self._inflight:
+            if not fut.done():
+                fut.set_exception(_Abandoned())
+        self._inflight.clear()
+        # terminate() joins the workers; do it on a thread.
+        fut = asyncio.get_running_loop().run_in_executor(None, pool.terminate)
+        self._closing.add(fut)
+        fut.add_done_callback(self._closing.discard)
+
+    async def search(self, rule_id: int, pattern: SafePattern, text: str) -> bool:
+        if rule_id in self._skipped:
+            return False
+        if pattern.linear:
+            start = time.perf_counter()
+            found = pattern.compiled.search(text) is not None
+            self._record(rule_id, time.perf_counter() - start)
+            return found
+
+        async with self._slots:
+            pool = await self._get_pool()
+            loop = asyncio.get_running_loop()
+            fut: asyncio.Future = loop.create_future()
+
+            def _resolve(value: Any, error: bool = False) -> None:
+                if fut.done():
+                    return
+                if error:
+                    fut.set_exception(value)
+                else:
+                    fut.set_result(value)
+
+            self._inflight.add(fut)
+            start = time.perf_counter()
+            pool.apply_async(
+                _search,
+                (pattern.source, pattern.flags, text),
+                callback=lambda v: loop.call_soon_threadsafe(_resolve, v),
+                error_callback=lambda e: loop.call_soon_threadsafe(_resolve, e, True),
+            )
+            try:
+                # shield: a timeout must not cancel `fut` before _terminate sees it.
+                found = await asyncio.wait_for(asyncio.shield(fut), self.timeout)
+            except _Abandoned:
+                return False
+            except asyncio.TimeoutError:
+                self._record(rule_id, time.perf_counter() - start, timed_out=True)
+                self._inflight.discard(fut)
+                self._terminate(pool)
+                if self._timings[rule_id]["timeouts"] >= self.max_timeouts:
+                    self._skipped.add(rule_id)
+                    self.log.warning("Regex rule #%s timed out %d times; skipping it", rule_id, self.max_timeouts)
+                else:
+                    self.log.warning("Regex rule #%s timed out after %.3fs", rule_id, self.timeout)
+                return False
+            finally:
+                self._inflight.discard(fut)
+            self._record(rule_id, time.perf_counter() - start)
+            return bool(found)
+
+    def reset(self, _key: Optional[str] = None) -> None:
+        """Give skipped rules another chance (rules changed)."""
+        self._skipped.clear()
+
+    def timing(self, rule_id: int) -> Dict[str, float]:
+        return self._timings.get(rule_id) or {}
+
+    def stats(self) -> Dict[int, Dict[str, float]]:
+        return {rid: dict(t) for rid, t in self._timings.items()}
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            self._terminate(self._pool)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 from typing import Any, Dict
 import importlib
 import importlib.metadata as md
@@ -51,10 +50,9 @@ def register(reg: Registry) -> None:
         except Exception as e:  # pragma: no cover
             results.append(f"db: ERROR ({e.__class__.__name__}: {e})")
 
-        # Redis check (sync client; run in executor)
+        # Redis check
         try:
-            loop = asyncio.get_running_loop()
-            pong = await loop.run_in_executor(None, ctx.redis.ping)
+            pong = await ctx.aredis().ping()
             results.append("redis: ok" if pong else "redis: ERROR (no PONG)")
         except Exception as e:  # pragma: no cover
             results.append(f"redis: ERROR ({e.__class__.__name__}: {e})")
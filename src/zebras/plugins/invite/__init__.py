@@ -7,7 +7,8 @@ from slack_sdk.web.async_client import AsyncWebClient
 
 from ...plugin import Registry
 from ...app_context import get_context
-from .repository import InviteSettingsRepository
+from ...middleware.dedupe import event_key
+from ...worker import tasks
 
 
 async def _client() -> AsyncWebClient:
@@ -20,7 +21,7 @@ def register(reg: Registry) -> None:
     async def invite_cmd(payload: Dict[str, Any]) -> Dict[str, Any]:
         text = (payload.get("text") or "").strip()
         ctx = get_context()
-        repo = InviteSettingsRepository(ctx.engine)
+        repo = ctx.invite_settings()
         channel_id = payload.get("channel_id")
 
         if text.startswith("set-channel "):
@@ -59,31 +60,21 @@ def register(reg: Registry) -> None:
     @reg.events.on("team_join")
     async def on_team_join(payload: Dict[str, Any]) -> None:
         ctx = get_context()
-        repo = InviteSettingsRepository(ctx.engine)
-        s = await repo.get()
+        s = await ctx.invite_settings().get()
         if not s:
             return
-        client = await _client()
         user = payload.get("event", {}).get("user", {})
         user_id = user.get("id") if isinstance(user, dict) else None
+        key = event_key(payload)
 
         # Notify admins
         if s.notify_on_join and s.admin_channel_id:
-            try:
-                await client.chat_postMessage(
-                    channel=s.admin_channel_id,
-                    text=f"New member joined: <@{user_id}>",
-                )
-            except Exception:
-                pass
+            await tasks.post_message.enqueue(
+                key and f"{key}:notify",
+                channel=s.admin_channel_id,
+                text=f"New member joined: <@{user_id}>",
+            )
 
         # DM onboarding message
         if s.dm_message and user_id:
-            try:
-                resp = await client.conversations_open(users=user_id)
-                dm = resp.get("channel", {}).get("id")
-                if dm:
-                    await client.chat_postMessage(channel=dm, text=s.dm_message)
-            except Exception:
-                pass
-
+            await tasks.send_dm.enqueue(key, user_id=user_id, text=s.dm_message)
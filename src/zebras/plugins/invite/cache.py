@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ...storage.cache import MISSING, CacheInvalidator
+from .repository import INVITE_SETTINGS_TOPIC, InviteSettingsRepository
+
+
+class InviteSettingsCache:
+    """Process-local copy of the singleton `InviteSettings` row.
+
+    Loaded once, reloaded after `upsert`, and refreshed in the background when
+    another process publishes an invalidation. Until the reload completes the
+    previous value keeps being served, so hot paths (audit posting on rule
+    violations) never wait on Postgres.
+    """
+
+    def __init__(self, engine: AsyncEngine, invalidator: CacheInvalidator) -> None:
+        self.log = logging.getLogger("zebras.invite.cache")
+        self.repo = InviteSettingsRepository(engine, invalidator)
+        self._value: Any = MISSING
+        self._lock = asyncio.Lock()
+        self._generation = 0
+        self._refresh: Optional[asyncio.Task] = None
+        invalidator.subscribe(INVITE_SETTINGS_TOPIC, self.invalidate)
+
+    def invalidate(self, _key: Optional[str] = None) -> None:
+        self._generation += 1
+        if self._value is MISSING:
+            return
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.get_running_loop().create_task(self.warm())
+
+    async def warm(self) -> None:
+        """Load (or refresh) without raising; used at startup and for invalidations."""
+        try:
+            await self.reload()
+        except Exception:
+            self.log.warning("Failed to refresh invite settings; serving cached copy", exc_info=True)
+
+    async def reload(self) -> Optional[Any]:
+        async with self._lock:
+            generation = self._generation
+            value = await self.repo.get()
+            self._value = value
+        # An invalidation that raced the read means this copy may already be stale.
+        if generation != self._generation:
+            self._refresh = asyncio.get_running_loop().create_task(self.warm())
+        return value
+
+    async def get(self) -> Optional[Any]:
+        if self._value is MISSING:
+            return await self.reload()
+        return self._value
+
+    async def upsert(self, **values: Any) -> Optional[Any]:
+        await self.repo.upsert(**values)
+        return await self.reload()
@@ -2,24 +2,39 @@ from __future__ import annotations
 
 from typing import Optional
 from datetime import datetime, timezone
-from sqlalchemy import insert, select, update
+from sqlalchemy import Row, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from ...metrics import timed_query
+from ...storage.cache import CacheInvalidator
 from ...storage.models import InviteSettings
 
 
+INVITE_SETTINGS_TOPIC = "invite_settings"
+
+
 class InviteSettingsRepository:
-    def __init__(self, engine: AsyncEngine) -> None:
+    def __init__(self, engine: AsyncEngine, invalidator: Optional[CacheInvalidator] = None) -> None:
         self.engine = engine
+        self.invalidator = invalidator
 
-    async def get(self) -> Optional[InviteSettings]:
+    @timed_query
+    async def get(self) -> Optional[Row]:
         async with self.engine.connect() as conn:
-            res = await conn.execute(select(InviteSettings).limit(1))
-            return res.scalar_one_or_none()
+            res = await conn.execute(
+                select(
+                    InviteSettings.admin_channel_id,
+                    InviteSettings.audit_channel_id,
+                    InviteSettings.notify_on_join,
+                    InviteSettings.dm_message,
+                ).order_by(InviteSettings.id).limit(1)
+            )
+            return res.one_or_none()
 
+    @timed_query
     async def upsert(self, *, admin_channel_id: Optional[str] = None, audit_channel_id: Optional[str] = None, notify_on_join: Optional[bool] = None, dm_message: Optional[str] = None) -> None:
         async with self.engine.begin() as conn:
-            existing = (await conn.execute(select(InviteSettings).limit(1))).scalar_one_or_none()
+            existing = (await conn.execute(select(InviteSettings.id).order_by(InviteSettings.id).limit(1))).scalar_one_or_none()
             if existing is None:
                 await conn.execute(
                     insert(InviteSettings).values(
@@ -30,14 +45,16 @@ class InviteSettingsRepository:
                         updated_at=datetime.now(timezone.utc),
                     )
                 )
-                return
-            values = {"updated_at": datetime.now(timezone.utc)}
-            if admin_channel_id is not None:
-                values["admin_channel_id"] = admin_channel_id
-            if audit_channel_id is not None:
-                values["audit_channel_id"] = audit_channel_id
-            if notify_on_join is not None:
-                values["notify_on_join"] = notify_on_join
-            if dm_message is not None:
-                values["dm_message"] = dm_message
-            await conn.execute(update(InviteSettings).where(InviteSettings.id == existing.id).values(**values))
+            else:
+                values = {"updated_at": datetime.now(timezone.utc)}
+                if admin_channel_id is not None:
+                    values["admin_channel_id"] = admin_channel_id
+                if audit_channel_id is not None:
+                    values["audit_channel_id"] = audit_channel_id
+                if notify_on_join is not None:
+                    values["notify_on_join"] = notify_on_join
+                if dm_message is not None:
+                    values["dm_message"] = dm_message
+                await conn.execute(update(InviteSettings).where(InviteSettings.id == existing).values(**values))
+        if self.invalidator is not None:
+            await self.invalidator.publish(INVITE_SETTINGS_TOPIC)
@@ -5,23 +5,22 @@ from typing import Any, Dict
 
 from ...plugin import Registry
 from ...app_context import get_context
-from ...storage.repositories import EventLogRepository
 
 
 def register(reg: Registry) -> None:
     log = logging.getLogger("zebras.plugins.logging")
 
     async def _persist(event_type: str, payload: Dict[str, Any]) -> None:
-        ctx = get_context()
-        repo = EventLogRepository(ctx.engine)
         e = payload.get("event", payload)
-        await repo.log(
+        # Straight into the batching writer: redeliveries were already dropped by the
+        # dedupe middleware, and a job per event would cost a Redis round-trip each.
+        await get_context().event_log_writer().write(
             event_type=event_type,
             raw=payload,
             subtype=e.get("subtype"),
             team_id=payload.get("team_id") or e.get("team"),
             channel_id=(e.get("channel") if isinstance(e.get("channel"), str) else (e.get("channel", {}) or {}).get("id")),
-            user_id=e.get("user"),
+            user_id=(e.get("user") if not isinstance(e.get("user"), dict) else e["user"].get("id")),
             message_ts=e.get("ts"),
             thread_ts=e.get("thread_ts"),
         )
@@ -36,30 +35,35 @@ def register(reg: Registry) -> None:
     async def on_channel_created(event: Dict[str, Any]) -> None:
         e = event.get("event", event)
         log.info("channel_created", extra={"channel": e.get("channel")})
+        get_context().channel_directory().apply("channel_created", e)
         await _persist("channel_created", event)
 
     @reg.events.on("channel_rename")
     async def on_channel_rename(event: Dict[str, Any]) -> None:
         e = event.get("event", event)
         log.info("channel_rename", extra={"channel": e.get("channel")})
+        get_context().channel_directory().apply("channel_rename", e)
         await _persist("channel_rename", event)
 
     @reg.events.on("channel_deleted")
     async def on_channel_deleted(event: Dict[str, Any]) -> None:
         e = event.get("event", event)
         log.info("channel_deleted", extra={"channel": e.get("channel")})
+        get_context().channel_directory().apply("channel_deleted", e)
         await _persist("channel_deleted", event)
 
     @reg.events.on("channel_archive")
     async def on_channel_archive(event: Dict[str, Any]) -> None:
         e = event.get("event", event)
         log.info("channel_archive", extra={"channel": e.get("channel")})
+        get_context().channel_directory().apply("channel_archive", e)
         await _persist("channel_archive", event)
 
     @reg.events.on("channel_unarchive")
     async def on_channel_unarchive(event: Dict[str, Any]) -> None:
         e = event.get("event", event)
         log.info("channel_unarchive", extra={"channel": e.get("channel")})
+        get_context().channel_directory().apply("channel_unarchive", e)
         await _persist("channel_unarchive", event)
 
     @reg.events.on("team_join")
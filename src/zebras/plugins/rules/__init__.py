@@ -1,54 +1,117 @@
 from __future__ import annotations
 
+import logging
 from typing import Dict, Any, Optional
 
 from ...plugin import Registry
 from ...app_context import get_context
-from ...rules.repository import ChannelRuleRepository
+from ...middleware.dedupe import event_key
+from ...rules.engine import Decision, message_facts
+from ...worker import tasks
 from ...storage.repositories import EventLogRepository
+from slack_sdk.errors import SlackApiError
 from slack_sdk.models.views import View
-from slack_sdk.web.async_client import AsyncWebClient
+from ...slack.client import RateLimitedWebClient
+from ...storage.cache import MISSING, TTLCache
+
+log = logging.getLogger("zebras.plugins.rules")
+
+# Audit a failing delete once per channel and error, not once per message.
+DELETE_FAILURE_AUDIT_TTL = 3600.0
 
 
 def register(reg: Registry) -> None:
-    async def _client() -> AsyncWebClient:
+    async def _client() -> RateLimitedWebClient:
         ctx = get_context()
         return await ctx.web_client()
 
+    delete_failures = TTLCache(ttl=DELETE_FAILURE_AUDIT_TTL, max_size=10_000)
+
+    async def _audit_channel() -> Optional[str]:
+        s = await get_context().invite_settings().get()
+        return s.audit_channel_id if s else None
+
+    async def _delete(payload: Dict[str, Any], channel: str, ts: str, rule: str) -> None:
+        engine = get_context().rules_engine()
+        try:
+            # A bot token can only delete the bot's own messages; members' messages
+            # need ZEBRAS_SLACK_ADMIN_TOKEN.
+            await (await get_context().admin_web_client()).chat_delete(channel=channel, ts=ts)
+        except SlackApiError as e:
+            error = e.response.get("error") or "unknown"
+        except Exception as e:
+            error = type(e).__name__
+        else:
+            engine.deleted += 1
+            return
+        engine.delete_failed += 1
+        log.warning("Could not delete message %s in %s for rule %s: %s", ts, channel, rule, error)
+        if delete_failures.get((channel, error)) is not MISSING:
+            return
+        delete_failures.set((channel, error), True)
+        audit_ch = await _audit_channel()
+        if audit_ch:
+            # No delivery id (None) means no idempotency key, not a shared "None:delete".
+            key = event_key(payload)
+            await tasks.post_audit.enqueue(
+                key and f"{key}:delete",
+                channel=audit_ch,
+                text=f"Rule({rule}) could not delete a message in <#{channel}> ({error}). Deleting members' messages needs ZEBRAS_SLACK_ADMIN_TOKEN.",
+            )
+
     @reg.commands.slash("/rules")
     async def rules_cmd(payload: Dict[str, Any]) -> Dict[str, Any]:
         text = (payload.get("text") or "").strip()
         channel_id = payload.get("channel_id")
         user_id = payload.get("user_id")
-        ctx = get_context()
-        repo = ChannelRuleRepository(ctx.engine)
+        rules = get_context().channel_rules()
 
         if text.startswith("bots "):
             val = text.split(" ", 1)[1].lower() in ("on", "true", "allow")
-            await repo.upsert(channel_id, allow_bots=val)
+            await rules.upsert(channel_id, allow_bots=val)
             return {"response_type": "ephemeral", "text": f"Bots {'allowed' if val else 'blocked'} in <#{channel_id}>"}
         if text.startswith("top "):
             val = text.split(" ", 1)[1].lower() in ("on", "true", "allow")
-            await repo.upsert(channel_id, allow_top_level_posts=val)
+            await rules.upsert(channel_id, allow_top_level_posts=val)
             return {"response_type": "ephemeral", "text": f"Top-level posts {'allowed' if val else 'blocked'} in <#{channel_id}>"}
         if text.startswith("threads "):
             val = text.split(" ", 1)[1].lower() in ("on", "true", "allow")
-            await repo.upsert(channel_id, allow_thread_replies=val)
+            await rules.upsert(channel_id, allow_thread_replies=val)
             return {"response_type": "ephemeral", "text": f"Thread replies {'allowed' if val else 'blocked'} in <#{channel_id}>"}
+        if text == "flood" or text.startswith("flood "):
+            parts = text.split()[1:]
+            if parts == ["off"]:
+                await rules.upsert(channel_id, flood_user_limit=0, flood_channel_limit=0)
+                return {"response_type": "ephemeral", "text": f"Flood limits removed in <#{channel_id}>"}
+            if len(parts) == 2 and parts[0] in ("user", "channel", "window") and parts[1].isdigit():
+                n = int(parts[1])
+                if parts[0] == "window":
+                    if n < 1:
+                        return {"response_type": "ephemeral", "text": "Window must be at least 1 second."}
+                    await rules.upsert(channel_id, flood_window=n)
+                    return {"response_type": "ephemeral", "text": f"Flood window set to {n}s in <#{channel_id}>"}
+                await rules.upsert(channel_id, **{f"flood_{parts[0]}_limit": n})
+                what = "per user" if parts[0] == "user" else "for the channel"
+                return {"response_type": "ephemeral", "text": f"Flood limit {what} set to {n or 'off'} in <#{channel_id}>"}
+            return {"response_type": "ephemeral", "text": "Usage: /rules flood user N | channel N | window SECONDS | off  (N = messages per window, 0 = no limit)"}
         if text == "list":
-            r = await repo.get(channel_id)
-            if not r or not hasattr(r, "allow_bots"):
-                return {"response_type": "ephemeral", "text": "No rules set. Defaults: bots ON, top-level ON, threads ON"}
+            r = await rules.get(channel_id)
+            if not r:
+                return {"response_type": "ephemeral", "text": "No rules set. Defaults: bots ON, top-level ON, threads ON, flood OFF"}
+            if r.flood_user_limit or r.flood_channel_limit:
+                flood = f"{r.flood_user_limit or '-'}/user, {r.flood_channel_limit or '-'}/channel per {r.flood_window}s"
+            else:
+                flood = "OFF"
             return {
                 "response_type": "ephemeral",
-                "text": f"Rules for <#{channel_id}> — bots: {'ON' if r.allow_bots else 'OFF'}, top: {'ON' if r.allow_top_level_posts else 'OFF'}, threads: {'ON' if r.allow_thread_replies else 'OFF'}",
+                "text": f"Rules for <#{channel_id}> — bots: {'ON' if r.allow_bots else 'OFF'}, top: {'ON' if r.allow_top_level_posts else 'OFF'}, threads: {'ON' if r.allow_thread_replies else 'OFF'}, flood: {flood}",
             }
         if text == "manage":
             # Minimal placeholder modal
             trigger_id = payload.get("trigger_id")
             client = await _client()
             # Preload current values
-            r = await repo.get(channel_id)
+            r = await rules.get(channel_id)
             bots_on = (r.allow_bots if r else True)
             top_on = (r.allow_top_level_posts if r else True)
             threads_on = (r.allow_thread_replies if r else True)
@@ -94,7 +157,7 @@ def register(reg: Registry) -> None:
 
         return {
             "response_type": "ephemeral",
-            "text": "Usage: /rules list | bots on|off | top on|off | threads on|off | manage",
+            "text": "Usage: /rules list | bots on|off | top on|off | threads on|off | flood user|channel N | flood window S | flood off | manage",
         }
 
     @reg.interactions.view_submission("rules_manage")
@@ -110,9 +173,7 @@ def register(reg: Registry) -> None:
         bots = _val("bots")
         top = _val("top")
         threads = _val("threads")
-        ctx = get_context()
-        repo = ChannelRuleRepository(ctx.engine)
-        await repo.upsert(channel_id, allow_bots=bots, allow_top_level_posts=top, allow_thread_replies=threads)
+        await get_context().channel_rules().upsert(channel_id, allow_bots=bots, allow_top_level_posts=top, allow_thread_replies=threads)
 
     @reg.events.on("message")
     async def enforce_rules(payload: Dict[str, Any]) -> None:
@@ -121,47 +182,21 @@ def register(reg: Registry) -> None:
         if not channel:
             return
         ctx = get_context()
-        repo = ChannelRuleRepository(ctx.engine)
-        rules = await repo.get(channel)
-        if not rules or not hasattr(rules, "allow_bots"):
+        engine = ctx.rules_engine()
+        facts = message_facts(e)
+        # Table hit for every message after the first of its kind in the channel.
+        result = engine.cached(channel, facts) or await engine.decide(channel, e, facts)
+        if result.decision is not Decision.DENY:
             return
-        subtype = e.get("subtype")
         ts = e.get("ts")
         user = e.get("user")
-        thread_ts = e.get("thread_ts")
-        client = await _client()
-
-        # Helper to audit
-        async def audit(msg: str) -> None:
-            from ..invite.repository import InviteSettingsRepository
-            srepo = InviteSettingsRepository(ctx.engine)
-            s = await srepo.get()
-            audit_ch = s.audit_channel_id if s else None
-            if audit_ch:
-                try:
-                    await client.chat_postMessage(channel=audit_ch, text=msg)
-                except Exception:
-                    pass
-
-        # 1) Block bots
-        if subtype == "bot_message" and not rules.allow_bots:
-            # Bot messages can be deleted by the bot
-            try:
-                await client.chat_delete(channel=channel, ts=ts)
-            except Exception:
-                pass
-            await client.chat_postEphemeral(channel=channel, user=user, text="Bot messages are not allowed in this channel.")
-            await audit(f"Rule(bots) in <#{channel}> triggered by <@{user}> at {ts}")
-            return
-
-        # 2) Block top-level posts
-        if not thread_ts and not rules.allow_top_level_posts:
-            await client.chat_postEphemeral(channel=channel, user=user, text="Top-level posts are disabled here. Please use a thread.")
-            await audit(f"Rule(top) in <#{channel}> triggered by <@{user}> at {ts}")
-            return
-
-        # 3) Block thread replies
-        if thread_ts and not rules.allow_thread_replies:
-            await client.chat_postEphemeral(channel=channel, user=user, text="Thread replies are disabled here.")
-            await audit(f"Rule(threads) in <#{channel}> triggered by <@{user}> at {ts}")
+        if result.delete:
+            await _delete(payload, channel, ts, result.rule)
+        if not result.notify:
             return
+        client = await _client()
+        await client.chat_postEphemeral(channel=channel, user=user, text=result.reason)
+        audit_ch = await _audit_channel()
+        if audit_ch:
+            # Posted by the job runner (with retries), not on the event path.
+            await tasks.post_audit.enqueue(event_key(payload), channel=audit_ch, text=f"Rule({result.rule}) in <#{channel}> triggered by <@{user}> at {ts}")
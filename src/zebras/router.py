@@ -1,56 +1,128 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from itertools import groupby
 from typing import Any, Awaitable, Callable, Dict, List, Optional
 import asyncio
 import logging
+import time
+
+from .logging import event_context
+from .metrics import HANDLER_ERRORS, HANDLER_SECONDS
 
 
 EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
-Middleware = Callable[[Dict[str, Any], Callable[[Dict[str, Any]], Awaitable[None]]], Awaitable[None]]
+Next = Callable[[Dict[str, Any]], Awaitable[None]]
+Middleware = Callable[[Dict[str, Any], Next], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class _Binding:
+    handler: EventHandler
+    stage: int
+    timeout: Optional[float]
+    name: str
+
+
+def _handler_name(handler: EventHandler) -> str:
+    qualname = getattr(handler, "__qualname__", None) or type(handler).__qualname__
+    return f"{getattr(handler, '__module__', '?')}.{qualname}"
+
+
+def event_type(event: Dict[str, Any]) -> Optional[str]:
+    # Slack Events API wraps real events in { type: "event_callback", event: { type: "message", ... } }
+    # Prefer the inner event.type when present.
+    outer_type = event.get("type")
+    if outer_type == "event_callback" and isinstance(event.get("event"), dict):
+        return event.get("event", {}).get("type")
+    return outer_type or event.get("event", {}).get("type")
+
+
+def _link(mw: Middleware, nxt: Next) -> Next:
+    # Plain function returning the middleware's coroutine: no extra frame per hop.
+    def composed(e: Dict[str, Any]) -> Awaitable[None]:
+        return mw(e, nxt)
+
+    return composed
 
 
 class Router:
-    """Simple async event router with middleware pipeline."""
+    """Simple async event router with middleware pipeline.
+
+    Handlers for an event type are grouped into stages (ascending). In concurrent
+    mode the handlers within a stage run together and the next stage starts once
+    they have all finished; a plugin that must run after another declares a higher
+    stage. In sequential mode every handler is awaited in turn.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, *, concurrent: bool = True, handler_timeout: Optional[float] = None) -> None:
         self._log = logging.getLogger("zebras.router")
-        self._handlers: Dict[str, List[EventHandler]] = {}
+        self._handlers: Dict[str, List[_Binding]] = {}
         self._middleware: List[Middleware] = []
+        self._concurrent = concurrent
+        self._handler_timeout = handler_timeout
+        # Per event type: middleware chain composed once, invalidated on registration.
+        self._chains: Dict[str, Next] = {}
 
     def add_middleware(self, mw: Middleware) -> None:
         self._middleware.append(mw)
+        self._chains.clear()
 
-    def on(self, event_type: str, handler: EventHandler) -> None:
-        self._handlers.setdefault(event_type, []).append(handler)
+    def on(self, event_type: str, handler: EventHandler, *, stage: int = 0, timeout: Optional[float] = None) -> None:
+        bindings = self._handlers.setdefault(event_type, [])
+        bindings.append(_Binding(handler, stage, timeout if timeout is not None else self._handler_timeout, _handler_name(handler)))
+        # Stable sort keeps registration order within a stage.
+        bindings.sort(key=lambda b: b.stage)
+        self._chains.clear()
 
-    async def dispatch(self, event: Dict[str, Any]) -> None:
-        # Slack Events API wraps real events in { type: "event_callback", event: { type: "message", ... } }
-        # Prefer the inner event.type when present.
-        etype = None
-        outer_type = event.get("type")
-        if outer_type == "event_callback" and isinstance(event.get("event"), dict):
-            etype = event.get("event", {}).get("type")
+    async def _call(self, binding: _Binding, etype: str, evt: Dict[str, Any], seconds: Any) -> None:
+        start = time.perf_counter()
+        try:
+            if binding.timeout is None:
+                await binding.handler(evt)
+            else:
+                await asyncio.wait_for(binding.handler(evt), binding.timeout)
+        except asyncio.TimeoutError:
+            HANDLER_ERRORS.labels(etype, binding.name, "timeout").inc()
+            self._log.error("Handler %s timed out after %ss for %s", binding.name, binding.timeout, etype)
+        except Exception:
+            HANDLER_ERRORS.labels(etype, binding.name, "error").inc()
+            self._log.exception("Handler error for %s", etype)
+        finally:
+            seconds.observe(time.perf_counter() - start)
+
+    def _compile(self, etype: str) -> Next:
+        # Histogram children resolved here, once per event type, not per call.
+        bindings = [(b, HANDLER_SECONDS.labels(etype, b.name)) for b in self._handlers.get(etype, [])]
+        if self._concurrent:
+            stages = tuple(tuple(group) for _, group in groupby(bindings, key=lambda b: b[0].stage))
         else:
-            etype = outer_type or event.get("event", {}).get("type")
-        if not etype:
-            self._log.debug("Ignoring event without type: %s", event)
-            return
+            stages = tuple((b,) for b in bindings)
+        call = self._call
 
         async def call_handlers(evt: Dict[str, Any]) -> None:
-            for h in self._handlers.get(etype, []):
-                try:
-                    await h(evt)
-                except Exception:
-                    self._log.exception("Handler error for %s", etype)
-
-        # Compose middleware chain
-        handler = call_handlers
-        for mw in reversed(self._middleware):
-            next_handler = handler
+            for stage in stages:
+                if len(stage) == 1:
+                    await call(stage[0][0], etype, evt, stage[0][1])
+                else:
+                    await asyncio.gather(*(call(b, etype, evt, seconds) for b, seconds in stage))
 
-            async def composed(e: Dict[str, Any], mw=mw, nxt=next_handler) -> None:
-                await mw(e, nxt)
+        handler: Next = call_handlers
+        for mw in reversed(self._middleware):
+            handler = _link(mw, handler)
+        return handler
 
-            handler = composed
+    async def dispatch(self, event: Dict[str, Any]) -> None:
+        etype = event_type(event)
+        if not etype:
+            self._log.debug("Ignoring event without type: %s", event)
+            return
 
-        await handler(event)
+        chain = self._chains.get(etype)
+        if chain is None:
+            chain = self._chains[etype] = self._compile(etype)
+        token = event_context.set((event.get("event_id") or event.get("envelope_id"), etype))
+        try:
+            await chain(event)
+        finally:
+            event_context.reset(token)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..storage.cache import MISSING, CacheInvalidator, TTLCache
+from .repository import CHANNEL_RULES_TOPIC, ChannelRuleRepository
+
+
+class ChannelRuleCache:
+    """Read-through cache in front of `ChannelRuleRepository`.
+
+    Channels without a rule are cached as `None` so the common case never reaches
+    Postgres. Writes go through the repository, which publishes an invalidation to
+    every process sharing the Redis instance.
+    """
+
+    def __init__(self, engine: AsyncEngine, invalidator: CacheInvalidator, *, ttl: float = 300.0, max_size: int = 10_000) -> None:
+        self.repo = ChannelRuleRepository(engine, invalidator)
+        self._cache = TTLCache(ttl=ttl, max_size=max_size)
+        self._generation = 0
+        invalidator.subscribe(CHANNEL_RULES_TOPIC, self.invalidate)
+
+    def invalidate(self, channel_id: Optional[str] = None) -> None:
+        self._generation += 1
+        if channel_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(channel_id)
+
+    async def get(self, channel_id: str) -> Optional[Any]:
+        rule = self._cache.get(channel_id)
+        if rule is MISSING:
+            generation = self._generation
+            rule = await self.repo.get(channel_id)
+            # An invalidation that landed during the read means the row may be stale;
+            # serve it for this call but do not cache it.
+            if generation == self._generation:
+                self._cache.set(channel_id, rule)
+        return rule
+
+    async def upsert(self, channel_id: str, **values: Any) -> None:
+        await self.repo.upsert(channel_id, **values)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..storage.repositories import EventLogQuery, EventLogRepository
+from .engine import BatchReport, Engine, channel_policy_rules
+from .repository import ChannelRuleRepository
+
+
+log = logging.getLogger("zebras.rules.dry_run")
+
+
+class Policy(NamedTuple):
+    """Picklable stand-in for a `channel_rules` row."""
+
+    allow_top_level_posts: bool = True
+    allow_thread_replies: bool = True
+    allow_bots: bool = True
+
+
+async def load_policies(engine: AsyncEngine) -> Dict[str, Policy]:
+    rows = await ChannelRuleRepository(engine).all()
+    return {r.channel_id: Policy(r.allow_top_level_posts, r.allow_thread_replies, r.allow_bots) for r in rows}
+
+
+# --- worker process side ---
+
+_engine: Optional[Engine] = None
+_policies: Dict[str, Policy] = {}
+
+
+def _init_worker(policies: Dict[str, Policy]) -> None:
+    # Rules hold lambdas, so each process builds its own engine instead of receiving one.
+    global _engine, _policies
+    _engine = Engine()
+    for rule in channel_policy_rules():
+        _engine.add(rule)
+    _policies = policies
+
+
+def _evaluate_chunk(chunk: List[Tuple[str, Dict[str, Any]]]) -> BatchReport:
+    assert _engine is not None
+    return _engine.evaluate_batch(chunk, _policies)
+
+
+# --- driver ---
+
+async def dry_run(
+    engine: AsyncEngine,
+    query: EventLogQuery,
+    policies: Dict[str, Policy],
+    *,
+    channels: Optional[Set[str]] = None,
+    workers: int = 4,
+    chunk_size: int = 5_000,
+) -> BatchReport:
+    """Replay logged messages through the channel policy rules.
+
+    Rows are streamed from `event_logs` and handed to a process pool in chunks;
+    at most two chunks per worker are in flight, so memory stays flat however
+    many rows match. Only the columns the rules look at are read (no `raw`).
+    """
+    query.include_raw = False
+    report = BatchReport()
+    loop = asyncio.get_running_loop()
+    pending: Set[asyncio.Future] = set()
+
+    async def drain(until: int) -> None:
+        nonlocal pending
+        while len(pending) > until:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                report.merge(fut.result())
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(policies,)) as pool:
+        chunk: List[Tuple[str, Dict[str, Any]]] = []
+        async for row in EventLogRepository(engine).stream(query, chunk_size=min(chunk_size, 2_000)):
+            channel_id = row["channel_id"]
+            if not channel_id or (channels is not None and channel_id not in channels):
+                continue
+            chunk.append((channel_id, {
+                "channel": channel_id,
+                "subtype": row["subtype"],
+                "thread_ts": row["thread_ts"],
+                "user": row["user_id"],
+                "ts": row["message_ts"],
+            }))
+            if len(chunk) >= chunk_size:
+                pending.add(loop.run_in_executor(pool, _evaluate_chunk, chunk))
+                chunk = []
+                await drain(2 * workers)
+        if chunk:
+            pending.add(loop.run_in_executor(pool, _evaluate_chunk, chunk))
+        await drain(0)
+    return report
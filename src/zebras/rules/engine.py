@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from ..storage.cache import MISSING, TTLCache
 
 
 class Decision(Enum):
@@ -11,27 +14,272 @@ class Decision(Enum):
     NEUTRAL = "neutral"
 
 
-@dataclass
+@dataclass(frozen=True)
 class Result:
     decision: Decision
     reason: Optional[str] = None
+    rule: Optional[str] = None
+    # Whether enforcement should also remove the offending message.
+    delete: bool = False
+    # Whether to tell the user and audit (off for the rest of a flood once reported).
+    notify: bool = True
+
+
+NEUTRAL = Result(Decision.NEUTRAL)
+
+
+class Facts(NamedTuple):
+    """The parts of a message that channel policies decide on."""
+
+    is_bot: bool
+    is_thread: bool
+    subtype: Optional[str]
+
+
+def message_facts(event: Dict[str, Any]) -> Facts:
+    subtype = event.get("subtype")
+    return Facts(subtype == "bot_message", bool(event.get("thread_ts")), subtype)
+
+
+# Message events that are not somebody posting (edits, deletions, membership
+# notices); channel posting policies never apply to them.
+NON_POSTS = frozenset({
+    "message_changed",
+    "message_deleted",
+    "message_replied",
+    "channel_join",
+    "channel_leave",
+    "channel_topic",
+    "channel_purpose",
+    "channel_name",
+    "channel_archive",
+    "channel_unarchive",
+    "pinned_item",
+    "unpinned_item",
+})
 
 
 class Rule:
+    """A rule evaluated per event (it may look at anything, so nothing is cached)."""
+
+    name = "rule"
+
     async def evaluate(self, context: Dict[str, Any], event: Dict[str, Any]) -> Result:  # noqa: D401
         """Return a decision for the event."""
-        return Result(Decision.NEUTRAL)
+        return NEUTRAL
+
+
+Predicate = Callable[[Any, Facts], bool]
+
+
+class PredicateRule(Rule):
+    """Synchronous rule over a channel policy and the message facts.
+
+    Its outcome depends only on `(policy, facts)`, so the engine evaluates it once
+    per distinct key and serves later messages from the decision table.
+    `priority` orders rules ahead of the deny-rate ordering (higher first).
+    """
+
+    def __init__(self, name: str, predicate: Predicate, message: str, *, priority: int = 0, delete: bool = False) -> None:
+        self.name = name
+        self.predicate = predicate
+        self.priority = priority
+        self.denial = Result(Decision.DENY, message, name, delete)
+        self.evaluations = 0
+        self.denies = 0
+
+    def check(self, policy: Any, facts: Facts) -> Optional[Result]:
+        self.evaluations += 1
+        if self.predicate(policy, facts):
+            self.denies += 1
+            return self.denial
+        return None
+
+    def deny_rate(self) -> float:
+        return self.denies / self.evaluations if self.evaluations else 0.0
+
+    async def evaluate(self, context: Dict[str, Any], event: Dict[str, Any]) -> Result:
+        return self.check(context.get("policy"), message_facts(event)) or NEUTRAL
+
+
+def _allows(policy: Any, field: str) -> bool:
+    # No policy row means the defaults: everything allowed.
+    return policy is None or bool(getattr(policy, field))
+
+
+def channel_policy_rules() -> List[PredicateRule]:
+    """The `channel_rules` table's bots / top / threads switches, as rules."""
+    return [
+        PredicateRule(
+            "bots",
+            lambda p, f: f.is_bot and not _allows(p, "allow_bots"),
+            "Bot messages are not allowed in this channel.",
+            # Ahead of the others: only this rule removes the message.
+            priority=1,
+            delete=True,
+        ),
+        PredicateRule(
+            "top",
+            lambda p, f: not f.is_thread and not _allows(p, "allow_top_level_posts"),
+            "Top-level posts are disabled here. Please use a thread.",
+        ),
+        PredicateRule(
+            "threads",
+            lambda p, f: f.is_thread and not _allows(p, "allow_thread_replies"),
+            "Thread replies are disabled here.",
+        ),
+    ]
+
+
+PolicySource = Callable[[str], Awaitable[Any]]
+
+
+@dataclass
+class BatchReport:
+    """Outcome of `Engine.evaluate_batch`; reports from several batches `merge`.
+
+    Decision latency is kept as a log2 histogram in nanoseconds so reports from
+    many chunks combine without keeping samples.
+    """
+
+    events: int = 0
+    denied: int = 0
+    hits: Dict[str, int] = field(default_factory=dict)
+    latency_total_ns: int = 0
+    latency_max_ns: int = 0
+    latency_buckets: Dict[int, int] = field(default_factory=dict)
+
+    def record(self, result: Result, elapsed_ns: int) -> None:
+        self.events += 1
+        if result.decision is Decision.DENY:
+            self.denied += 1
+            self.hits[result.rule or "?"] = self.hits.get(result.rule or "?", 0) + 1
+        self.latency_total_ns += elapsed_ns
+        if elapsed_ns > self.latency_max_ns:
+            self.latency_max_ns = elapsed_ns
+        bucket = elapsed_ns.bit_length()
+        self.latency_buckets[bucket] = self.latency_buckets.get(bucket, 0) + 1
+
+    def merge(self, other: "BatchReport") -> None:
+        self.events += other.events
+        self.denied += other.denied
+        for rule, n in other.hits.items():
+            self.hits[rule] = self.hits.get(rule, 0) + n
+        self.latency_total_ns += other.latency_total_ns
+        self.latency_max_ns = max(self.latency_max_ns, other.latency_max_ns)
+        for bucket, n in other.latency_buckets.items():
+            self.latency_buckets[bucket] = self.latency_buckets.get(bucket, 0) + n
+
+    def latency_percentile(self, q: float) -> int:
+        """Upper bound (ns) of the bucket holding the q-th quantile."""
+        target = q * self.events
+        seen = 0
+        for bucket in sorted(self.latency_buckets):
+            seen += self.latency_buckets[bucket]
+            if seen >= target:
+                return 1 << bucket
+        return self.latency_max_ns
 
 
 class Engine:
-    def __init__(self) -> None:
+    """Channel policy runtime.
+
+    Predicate rules are compiled, per channel, into a decision table keyed on the
+    message facts `(is_bot, is_thread, subtype)`; once a key has been seen, a
+    decision is a dict lookup (`cached`). Rules run in priority order, then by
+    observed deny rate, so the rule most likely to deny is tried first. Other
+    `Rule`s run per event after the table, unless it already denied.
+    """
+
+    def __init__(self, policies: Optional[PolicySource] = None, *, ttl: float = 300.0, max_channels: int = 10_000, resort_every: int = 1_000) -> None:
+        self._policies = policies
+        self._static: List[PredicateRule] = []
         self._rules: List[Rule] = []
+        self._tables = TTLCache(ttl=ttl, max_size=max_channels)
+        self._generation = 0
+        self._resort_every = resort_every
+        self._since_sort = 0
+        self.table_hits = 0
+        self.table_misses = 0
+        # Filled in by the rules plugin, which makes the chat.delete calls.
+        self.deleted = 0
+        self.delete_failed = 0
 
     def add(self, rule: Rule) -> None:
-        self._rules.append(rule)
+        if isinstance(rule, PredicateRule):
+            self._static.append(rule)
+            self._sort()
+        else:
+            self._rules.append(rule)
+        self.invalidate()
 
-    async def evaluate(self, context: Dict[str, Any], event: Dict[str, Any]) -> Result:
-        final = Result(Decision.NEUTRAL)
+    @property
+    def rules(self) -> List[Rule]:
+        return [*self._static, *self._rules]
+
+    def invalidate(self, channel_id: Optional[str] = None) -> None:
+        """Drop compiled decisions (subscribed to channel rule changes)."""
+        self._generation += 1
+        if channel_id is None:
+            self._tables.clear()
+        else:
+            self._tables.pop(channel_id)
+
+    def _sort(self) -> None:
+        self._static.sort(key=lambda r: (-r.priority, -r.deny_rate()))
+        self._since_sort = 0
+
+    def decide_static(self, policy: Any, facts: Facts) -> Result:
+        """Evaluate the predicate rules for one key (no caching)."""
+        if facts.subtype in NON_POSTS:
+            return NEUTRAL
+        self._since_sort += 1
+        if self._since_sort >= self._resort_every:
+            self._sort()
+        for rule in self._static:
+            denied = rule.check(policy, facts)
+            if denied is not None:
+                return denied
+        return NEUTRAL
+
+    def cached(self, channel_id: str, facts: Facts) -> Optional[Result]:
+        """The decision for a message from the table alone, or None when it needs
+        `decide` (key not compiled yet, or per-event rules still have to run)."""
+        table = self._tables.get(channel_id)
+        if table is MISSING:
+            return None
+        result = table.get(facts)
+        if result is None or (self._rules and result.decision is not Decision.DENY):
+            return None
+        self.table_hits += 1
+        return result
+
+    async def decide(self, channel_id: str, event: Dict[str, Any], facts: Optional[Facts] = None) -> Result:
+        facts = facts or message_facts(event)
+        table = self._tables.get(channel_id)
+        result = None if table is MISSING else table.get(facts)
+        policy = MISSING
+        if result is not None:
+            self.table_hits += 1
+        else:
+            self.table_misses += 1
+            generation = self._generation
+            policy = await self._policies(channel_id) if self._policies is not None else None
+            result = self.decide_static(policy, facts)
+            # A policy change while loading leaves this decision stale; use it once only.
+            if generation == self._generation:
+                table = self._tables.get(channel_id)
+                if table is MISSING:
+                    table = {}
+                    self._tables.set(channel_id, table)
+                table[facts] = result
+        if result.decision is Decision.DENY or not self._rules:
+            return result
+        if policy is MISSING:
+            policy = await self._policies(channel_id) if self._policies is not None else None
+        return await self._evaluate_rules({"channel_id": channel_id, "policy": policy}, event, result)
+
+    async def _evaluate_rules(self, context: Dict[str, Any], event: Dict[str, Any], final: Result) -> Result:
         for rule in self._rules:
             r = await rule.evaluate(context, event)
             if r.decision == Decision.DENY:
@@ -40,3 +288,41 @@ class Engine:
                 final = r
         return final
 
+    async def evaluate(self, context: Dict[str, Any], event: Dict[str, Any]) -> Result:
+        """Evaluate every rule for one event against `context["policy"]`, uncached."""
+        final = self.decide_static(context.get("policy"), message_facts(event))
+        if final.decision is Decision.DENY:
+            return final
+        return await self._evaluate_rules(context, event, final)
+
+    def evaluate_batch(self, events: Iterable[Tuple[str, Dict[str, Any]]], policies: Mapping[str, Any]) -> BatchReport:
+        """Decide `(channel_id, event)` pairs against the given channel policies.
+
+        For backfills and dry runs: nothing is awaited and the live tables are not
+        touched; decisions are memoised per batch the same way, so the reported
+        latency is what the live path pays. Only predicate rules take part.
+        """
+        report = BatchReport()
+        table: Dict[Tuple[str, Facts], Result] = {}
+        clock = time.perf_counter_ns
+        for channel_id, event in events:
+            start = clock()
+            facts = message_facts(event)
+            key = (channel_id, facts)
+            result = table.get(key)
+            if result is None:
+                result = table[key] = self.decide_static(policies.get(channel_id), facts)
+            report.record(result, clock() - start)
+        return report
+
+    def table_stats(self) -> Dict[str, int]:
+        return {"channels": len(self._tables), "hits": self.table_hits, "misses": self.table_misses}
+
+    def delete_stats(self) -> Dict[str, int]:
+        return {"deleted": self.deleted, "failed": self.delete_failed}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            r.name: {"evaluations": r.evaluations, "denies": r.denies, "deny_rate": round(r.deny_rate(), 4)}
+            for r in self._static
+        }
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from redis.asyncio import Redis
+
+from ..storage.cache import MISSING, TTLCache
+from .engine import NEUTRAL, NON_POSTS, Decision, Result, Rule
+
+
+class Violation(NamedTuple):
+    scope: str  # "user" or "channel"
+    count: int
+    limit: int
+    # The message that crossed the limit; later ones in the same flood are not reported again.
+    first: bool
+
+
+class _Window:
+    __slots__ = ("count", "checked", "pending", "window")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.checked = float("-inf")
+        # Messages let through locally, written to Redis on the next round-trip
+        # or by the background flush, whichever comes first.
+        self.pending: List[Tuple[str, float]] = []
+        self.window = 60
+
+
+class FloodLimiter:
+    """Sliding-window message rates in Redis sorted sets (one per user and per channel).
+
+    A check is one pipelined round-trip: trim the window, add the message, count,
+    refresh the expiry, for each key. Keys last seen well under their limit
+    (`headroom`) within the past `local_lag` seconds are answered in-process; those
+    messages are added to Redis with the next round-trip for the key, or by a
+    background flush `local_lag` seconds later if the sender goes quiet, so other
+    processes see them late by at most that long. If Redis is unavailable messages
+    are let through (fail open).
+    """
+
+    def __init__(self, redis: Redis, *, headroom: float = 0.5, local_lag: float = 2.0, local_size: int = 50_000, prefix: str = "zebras:flood:") -> None:
+        self.log = logging.getLogger("zebras.rules.flood")
+        self._redis = redis
+        self.headroom = headroom
+        self.local_lag = local_lag
+        self._prefix = prefix
+        self._windows = TTLCache(ttl=max(local_lag, 60.0), max_size=local_size)
+        self.checks = 0
+        self.local = 0
+        self.violations = 0
+        self.redis_errors = 0
+        # Keys with locally taken hits not yet written to Redis.
+        self._dirty: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _window(self, key: str) -> _Window:
+        w = self._windows.get(key)
+        if w is MISSING:
+            w = _Window()
+        # Re-set on every use so active keys (and their pending writes) stay cached.
+        self._windows.set(key, w)
+        return w
+
+    async def hit(self, channel_id: str, user_id: Optional[str], member: str, *, user_limit: int, channel_limit: int, window: int) -> Optional[Violation]:
+        """Record one message and return the limit it exceeds, if any."""
+        keys: List[Tuple[str, str, int]] = []
+        if user_limit > 0 and user_id:
+            keys.append(("user", f"{self._prefix}u:{channel_id}:{user_id}", user_limit))
+        if channel_limit > 0:
+            keys.append(("channel", f"{self._prefix}c:{channel_id}", channel_limit))
+        if not keys:
+            return None
+        now = time.time()
+        mono = time.monotonic()
+        windows = [self._window(key) for _, key, _ in keys]
+        if all(
+            mono - w.checked < self.local_lag and w.count + len(w.pending) + 1 <= limit * self.headroom
+            for (_, _, limit), w in zip(keys, windows)
+        ):
+            for (_, key, _), w in zip(keys, windows):
+                w.pending.append((member, now))
+                w.window = window
+                self._dirty.add(key)
+            self.local += 1
+            if self._flusher is None:
+                self._flusher = asyncio.get_running_loop().create_task(self._flush_later())
+            return None
+
+        self.checks += 1
+        start = now - window
+        pipe = self._redis.pipeline(transaction=False)
+        # Hits taken locally while this round-trip is in flight stay pending.
+        sent = [set(w.pending) for w in windows]
+        for (_, key, _), w in zip(keys, windows):
+            members: Dict[str, float] = {m: score for m, score in w.pending if score > start}
+            members[member] = now
+            pipe.zremrangebyscore(key, 0, start)
+            pipe.zadd(key, members)
+            pipe.zcard(key)
+            pipe.expire(key, window + 1)
+        try:
+            results = await pipe.execute()
+        except Exception:
+            self.redis_errors += 1
+            self.log.warning("Flood check failed for %s; allowing message", channel_id, exc_info=True)
+            return None
+
+        violation: Optional[Violation] = None
+        for i, ((scope, _, limit), w) in enumerate(zip(keys, windows)):
+            count = int(results[4 * i + 2])
+            w.pending = [p for p in w.pending if p not in sent[i]]
+            w.count, w.checked, w.window = count, mono, window
+            if count > limit and violation is None:
+                violation = Violation(scope, count, limit, count == limit + 1)
+        if violation is not None:
+            self.violations += 1
+        return violation
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.sleep(self.local_lag)
+            await self.flush()
+        finally:
+            self._flusher = None
+
+    async def flush(self) -> None:
+        """Write locally taken hits to Redis (for senders who went quiet)."""
+        dirty, self._dirty = self._dirty, set()
+        batches: List[Tuple[str, _Window, Set[Tuple[str, float]]]] = []
+        pipe = self._redis.pipeline(transaction=False)
+        now = time.time()
+        for key in dirty:
+            w = self._windows.get(key)
+            if w is MISSING or not w.pending:
+                continue
+            members = {m: score for m, score in w.pending if score > now - w.window}
+            if members:
+                pipe.zadd(key, members)
+                pipe.expire(key, w.window + 1)
+            batches.append((key, w, set(w.pending)))
+        if not batches:
+            return
+        try:
+            await pipe.execute()
+        except Exception:
+            self.redis_errors += 1
+            self._dirty.update(key for key, _, _ in batches)
+            self.log.warning("Flood flush failed; retrying with the next local hit", exc_info=True)
+            return
+        for _, w, sent in batches:
+            # A round-trip for the key may have carried (and counted) some already.
+            still = [p for p in w.pending if p not in sent]
+            w.count += len(w.pending) - len(still)
+            w.pending = still
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "checks": self.checks,
+            "local": self.local,
+            "violations": self.violations,
+            "redis_errors": self.redis_errors,
+            "keys": len(self._windows),
+        }
+
+
+class FloodRule(Rule):
+    """Deletes messages over the channel's `flood_user_limit` / `flood_channel_limit`."""
+
+    name = "flood"
+
+    def __init__(self, limiter: FloodLimiter) -> None:
+        self.limiter = limiter
+
+    async def evaluate(self, context: Dict[str, Any], event: Dict[str, Any]) -> Result:
+        policy = context.get("policy")
+        if policy is None:
+            return NEUTRAL
+        user_limit = policy.flood_user_limit or 0
+        channel_limit = policy.flood_channel_limit or 0
+        if not (user_limit or channel_limit) or event.get("subtype") in NON_POSTS:
+            return NEUTRAL
+        window = policy.flood_window or 60
+        v = await self.limiter.hit(
+            context["channel_id"],
+            event.get("user") or event.get("bot_id"),
+            event.get("ts") or uuid.uuid4().hex,
+            user_limit=user_limit,
+            channel_limit=channel_limit,
+            window=window,
+        )
+        if v is None:
+            return NEUTRAL
+        if v.scope == "user":
+            reason = f"You are posting too fast here (limit {v.limit} messages per {window}s). Please slow down."
+        else:
+            reason = f"This channel is limited to {v.limit} messages per {window}s right now. Please try again shortly."
+        return Result(Decision.DENY, reason, f"flood:{v.scope}", delete=True, notify=v.first)
@@ -1,27 +1,64 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, timezone
-from sqlalchemy import insert, select, update
+from sqlalchemy import Row, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from ..metrics import timed_query
+from ..storage.cache import CacheInvalidator
 from ..storage.models import ChannelRule
 
 
+CHANNEL_RULES_TOPIC = "channel_rules"
+
+
 class ChannelRuleRepository:
-    def __init__(self, engine: AsyncEngine) -> None:
+    def __init__(self, engine: AsyncEngine, invalidator: Optional[CacheInvalidator] = None) -> None:
         self.engine = engine
+        self.invalidator = invalidator
+
+    @timed_query
+    async def get(self, channel_id: str) -> Optional[Row]:
+        async with self.engine.connect() as conn:
+            res = await conn.execute(
+                select(
+                    ChannelRule.channel_id,
+                    ChannelRule.allow_top_level_posts,
+                    ChannelRule.allow_thread_replies,
+                    ChannelRule.allow_bots,
+                    ChannelRule.flood_user_limit,
+                    ChannelRule.flood_channel_limit,
+                    ChannelRule.flood_window,
+                ).where(ChannelRule.channel_id == channel_id)
+            )
+            return res.one_or_none()
 
-    async def get(self, channel_id: str) -> Optional[ChannelRule]:
+    @timed_query
+    async def all(self) -> List[Row]:
         async with self.engine.connect() as conn:
-            res = await conn.execute(select(ChannelRule).where(ChannelRule.channel_id == channel_id))
-            return res.scalar_one_or_none()
+            res = await conn.execute(
+                select(
+                    ChannelRule.channel_id,
+                    ChannelRule.allow_top_level_posts,
+                    ChannelRule.allow_thread_replies,
+                    ChannelRule.allow_bots,
+                    ChannelRule.flood_user_limit,
+                    ChannelRule.flood_channel_limit,
+                    ChannelRule.flood_window,
+                )
+            )
+            return list(res)
 
+    @timed_query
     async def upsert(self, channel_id: str,
                      *,
                      allow_top_level_posts: Optional[bool] = None,
                      allow_thread_replies: Optional[bool] = None,
-                     allow_bots: Optional[bool] = None) -> None:
+                     allow_bots: Optional[bool] = None,
+                     flood_user_limit: Optional[int] = None,
+                     flood_channel_limit: Optional[int] = None,
+                     flood_window: Optional[int] = None) -> None:
         async with self.engine.begin() as conn:
             existing = (await conn.execute(select(ChannelRule).where(ChannelRule.channel_id == channel_id))).scalar_one_or_none()
             if existing is None:
@@ -31,19 +68,29 @@ class ChannelRuleRepository:
                         allow_top_level_posts=allow_top_level_posts if allow_top_level_posts is not None else True,
                         allow_thread_replies=allow_thread_replies if allow_thread_replies is not None else True,
                         allow_bots=allow_bots if allow_bots is not None else True,
+                        flood_user_limit=flood_user_limit or 0,
+                        flood_channel_limit=flood_channel_limit or 0,
+                        flood_window=flood_window or 60,
                         updated_at=datetime.now(timezone.utc),
                     )
                 )
-                return
-            values = {
-                "updated_at": datetime.now(timezone.utc),
-            }
-            if allow_top_level_posts is not None:
-                values["allow_top_level_posts"] = allow_top_level_posts
-            if allow_thread_replies is not None:
-                values["allow_thread_replies"] = allow_thread_replies
-            if allow_bots is not None:
-                values["allow_bots"] = allow_bots
-            if values:
-                await conn.execute(update(ChannelRule).where(ChannelRule.channel_id == channel_id).values(**values))
-
+            else:
+                values = {
+                    "updated_at": datetime.now(timezone.utc),
+                }
+                if allow_top_level_posts is not None:
+                    values["allow_top_level_posts"] = allow_top_level_posts
+                if allow_thread_replies is not None:
+                    values["allow_thread_replies"] = allow_thread_replies
+                if allow_bots is not None:
+                    values["allow_bots"] = allow_bots
+                if flood_user_limit is not None:
+                    values["flood_user_limit"] = flood_user_limit
+                if flood_channel_limit is not None:
+                    values["flood_channel_limit"] = flood_channel_limit
+                if flood_window is not None:
+                    values["flood_window"] = flood_window
+                if values:
+                    await conn.execute(update(ChannelRule).where(ChannelRule.channel_id == channel_id).values(**values))
+        if self.invalidator is not None:
+            await self.invalidator.publish(CHANNEL_RULES_TOPIC, channel_id)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web.async_client import AsyncWebClient
+from slack_sdk.web.async_slack_response import AsyncSlackResponse
+
+from ..metrics import SLACK_SECONDS
+
+
+# Requests per minute for Slack's published Web API tiers.
+TIER_PER_MINUTE = {1: 1, 2: 20, 3: 50, 4: 100}
+
+METHOD_TIERS = {
+    "auth.test": 4,
+    "chat.delete": 3,
+    "chat.postEphemeral": 4,
+    "chat.update": 3,
+    "conversations.info": 3,
+    "conversations.list": 2,
+    "conversations.open": 3,
+    "users.info": 4,
+    "views.open": 4,
+    "views.publish": 4,
+}
+DEFAULT_TIER = 3
+
+# chat.postMessage is limited per channel (about one message per second).
+POST_MESSAGE_PER_SECOND = 1.0
+
+# Read-only methods whose identical in-flight calls can share one response.
+COALESCIBLE = frozenset({"auth.test", "conversations.info", "conversations.list", "users.info"})
+
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Honour a Retry-After: no tokens until `seconds` from now."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        # One request may go as soon as the pause ends; the rest refill at `rate`.
+        self._tokens = min(self._tokens, 1.0)
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping as needed. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                delay = self._blocked_until - now
+            else:
+                start = max(self._updated, self._blocked_until)
+                self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+class _MethodStats:
+    __slots__ = ("calls", "throttled", "waited", "wait_seconds", "max_wait")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.throttled = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+
+class RateLimitedWebClient(AsyncWebClient):
+    """`AsyncWebClient` that paces calls to Slack's rate limits.
+
+    Every Web API method goes through `api_call`, so all plugin calls are covered:
+    - per-method token buckets sized from the method's tier (chat.postMessage is
+      bucketed per channel),
+    - HTTP 429 responses pause the bucket for `Retry-After` and retry,
+    - a semaphore bounds concurrent in-flight requests,
+    - identical concurrent read calls share a single request.
+    """
+
+    def __init__(self, *args: Any, max_concurrency: int = 10, max_retries: int = 3, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._zlog = logging.getLogger("zebras.slack.client")
+        self._max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._buckets: Dict[Tuple[str, Optional[str]], TokenBucket] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._stats: Dict[str, _MethodStats] = {}
+
+    def _bucket(self, api_method: str, channel: Optional[str]) -> TokenBucket:
+        key = (api_method, channel if api_method == "chat.postMessage" else None)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if api_method == "chat.postMessage":
+                bucket = TokenBucket(POST_MESSAGE_PER_SECOND, 2)
+            else:
+                per_minute = TIER_PER_MINUTE[METHOD_TIERS.get(api_method, DEFAULT_TIER)]
+                bucket = TokenBucket(per_minute / 60.0, max(1, per_minute // 10))
+            self._buckets[key] = bucket
+        return bucket
+
+    async def api_call(self, api_method: str, **kwargs: Any) -> AsyncSlackResponse:  # type: ignore[override]
+        if api_method not in COALESCIBLE:
+            return await self._paced_call(api_method, kwargs)
+        key = (api_method, repr(sorted((k, repr(v)) for k, v in kwargs.items())))
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            resp = await self._paced_call(api_method, kwargs)
+            fut.set_result(resp)
+            return resp
+        except Exception as e:
+            fut.set_exception(e)
+            # Mark retrieved so an unobserved failure does not warn at GC.
+            fut.exception()
+            raise
+        except BaseException:
+            fut.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _paced_call(self, api_method: str, kwargs: Dict[str, Any]) -> AsyncSlackResponse:
+        body = kwargs.get("json") or kwargs.get("params") or kwargs.get("data") or {}
+        channel = body.get("channel") if isinstance(body, dict) else None
+        bucket = self._bucket(api_method, channel)
+        stats = self._stats.setdefault(api_method, _MethodStats())
+        stats.calls += 1
+        attempt = 0
+        while True:
+            waited = await bucket.acquire()
+            if waited:
+                stats.waited += 1
+                stats.wait_seconds += waited
+                stats.max_wait = max(stats.max_wait, waited)
+            try:
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    resp = await super().api_call(api_method, **kwargs)
+                SLACK_SECONDS.labels(api_method, "ok").observe(time.perf_counter() - start)
+                return resp
+            except SlackApiError as e:
+                throttled = e.response is not None and e.response.status_code == 429
+                SLACK_SECONDS.labels(api_method, "throttled" if throttled else "error").observe(time.perf_counter() - start)
+                if not throttled or attempt >= self._max_retries:
+                    raise
+                attempt += 1
+                stats.throttled += 1
+                retry_after = float(e.response.headers.get("Retry-After", 1))
+                self._zlog.warning("Slack throttled %s; retrying in %ss (attempt %d)", api_method, retry_after, attempt)
+                bucket.pause(retry_after)
+            except Exception:
+                # Transport failures (aiohttp errors, timeouts) never produce a Slack response.
+                SLACK_SECONDS.labels(api_method, "error").observe(time.perf_counter() - start)
+                raise
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            method: {
+                "calls": s.calls,
+                "throttled": s.throttled,
+                "waited": s.waited,
+                "wait_seconds": round(s.wait_seconds, 3),
+                "max_wait_seconds": round(s.max_wait, 3),
+            }
+            for method, s in self._stats.items()
+        }
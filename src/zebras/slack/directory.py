@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from slack_sdk.web.async_client import AsyncWebClient
+
+
+PAGE_SIZE = 200
+RETRY_DELAY = 60.0
+
+ClientFactory = Callable[[], Awaitable[AsyncWebClient]]
+
+
+def _fold(names: Dict[str, str], archived: Dict[str, str], event_type: str, event: Dict[str, Any]) -> bool:
+    """Apply one lifecycle event to the maps; False if it is not one."""
+    ch = event.get("channel")
+    if isinstance(ch, dict):
+        channel_id, name = ch.get("id"), ch.get("name")
+    else:
+        channel_id, name = ch, None
+    if not channel_id:
+        return False
+    if event_type in ("channel_created", "channel_rename"):
+        if name:
+            names[channel_id] = name
+            archived.pop(channel_id, None)
+    elif event_type == "channel_archive":
+        if channel_id in names:
+            archived[channel_id] = names.pop(channel_id)
+    elif event_type == "channel_unarchive":
+        if channel_id in archived:
+            names[channel_id] = archived.pop(channel_id)
+    elif event_type == "channel_deleted":
+        names.pop(channel_id, None)
+        archived.pop(channel_id, None)
+    else:
+        return False
+    return True
+
+
+class ChannelDirectory:
+    """In-memory id → name map of the workspace's channels.
+
+    The full list is paged in from `conversations.list` by a background task (the
+    Web API client paces the calls) and re-read every `refresh_interval` seconds to
+    catch anything missed. In between, channel lifecycle events keep it current via
+    `apply`. Lookups never call Slack.
+    """
+
+    def __init__(self, client_factory: ClientFactory, *, refresh_interval: float = 21_600.0) -> None:
+        self.log = logging.getLogger("zebras.slack.directory")
+        self._client_factory = client_factory
+        self._refresh_interval = refresh_interval
+        self._names: Dict[str, str] = {}
+        self._archived: Dict[str, str] = {}
+        self._sorted: Optional[List[Dict[str, str]]] = None
+        # Lifecycle events seen while a refresh is paging; replayed onto its result.
+        self._pending: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+        self._loaded = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.loaded_at: Optional[float] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="zebras-channel-directory")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                delay = self._refresh_interval
+            except Exception:
+                self.log.warning("Channel directory refresh failed; retrying in %ss", RETRY_DELAY, exc_info=True)
+                delay = RETRY_DELAY
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def refresh(self) -> None:
+        """Page through every channel and swap in the new map."""
+        client = await self._client_factory()
+        names: Dict[str, str] = {}
+        archived: Dict[str, str] = {}
+        cursor = None
+        self._pending = []
+        try:
+            while True:
+                resp = await client.conversations_list(limit=PAGE_SIZE, cursor=cursor, types="public_channel,private_channel")
+                for c in resp.get("channels", []):
+                    if c.get("id") and c.get("name"):
+                        (archived if c.get("is_archived") else names)[c["id"]] = c["name"]
+                cursor = (resp.get("response_metadata") or {}).get("next_cursor")
+                if not cursor:
+                    break
+            # Pages read before a rename/creation landed do not show it.
+            for event_type, event in self._pending:
+                _fold(names, archived, event_type, event)
+        finally:
+            self._pending = None
+        self._names = names
+        self._archived = archived
+        self._sorted = None
+        self.loaded_at = time.time()
+        self._loaded.set()
+        self.log.info("Loaded %d channels (%d archived)", len(names), len(archived))
+
+    async def wait_loaded(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._loaded.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def apply(self, event_type: str, event: Dict[str, Any]) -> None:
+        """Fold a channel lifecycle event into the map."""
+        if not _fold(self._names, self._archived, event_type, event):
+            return
+        if self._pending is not None:
+            self._pending.append((event_type, event))
+        self._sorted = None
+
+    def name(self, channel_id: str) -> Optional[str]:
+        return self._names.get(channel_id) or self._archived.get(channel_id)
+
+    def channels(self) -> List[Dict[str, str]]:
+        """Active channels sorted by name, as `{"id", "name"}` dicts."""
+        if self._sorted is None:
+            self._sorted = sorted(({"id": cid, "name": n} for cid, n in self._names.items()), key=lambda c: c["name"])
+        return self._sorted
+
+    def stats(self) -> Dict[str, Any]:
+        return {"channels": len(self._names), "archived": len(self._archived), "loaded_at": self.loaded_at}
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -11,7 +11,7 @@ from slack_sdk.socket_mode.response import SocketModeResponse
 
 from ..router import Router
 from ..plugin.registry import Registry
-import aiohttp
+from ..app_context import get_context
 
 
 class SocketApp:
@@ -29,7 +29,10 @@ class SocketApp:
             # Acknowledge first
             assert self.socket is not None
             await self.socket.send_socket_mode_response(SocketModeResponse(envelope_id=req.envelope_id))
-            await self.router.dispatch(req.payload)
+            payload = req.payload
+            if req.retry_attempt:
+                payload["retry_attempt"] = req.retry_attempt
+            await self.router.dispatch(payload)
         elif req.type == "slash_commands":
             # Acknowledge first
             assert self.socket is not None
@@ -48,11 +51,11 @@ class SocketApp:
                 self.log.exception("Slash command handler error for %s", cmd)
                 result = {"response_type": "ephemeral", "text": "An error occurred."}
 
-            # Respond via response_url if available
+            # Respond via response_url if available, in the background so a slow
+            # endpoint does not hold up the socket listener.
             response_url = payload.get("response_url")
             if response_url and result:
-                async with aiohttp.ClientSession() as session:
-                    await session.post(response_url, json=result)
+                get_context().webhooks().post_background(response_url, result)
         elif req.type == "interactive":
             payload = req.payload
             t = payload.get("type")
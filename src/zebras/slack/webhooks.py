@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+import aiohttp
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class WebhookSender:
+    """Long-lived, pooled HTTP session for outbound posts (slash command
+    `response_url`, incoming webhooks, ...).
+
+    Keeps connections alive between posts instead of paying DNS + TLS per request,
+    retries transient failures with backoff, and can run posts in the background so
+    the caller (e.g. the socket listener) is not held up by a slow endpoint.
+    """
+
+    def __init__(self, *, pool_size: int = 100, timeout: float = 10.0, retries: int = 3) -> None:
+        self.log = logging.getLogger("zebras.slack.webhooks")
+        self._pool_size = pool_size
+        self._timeout = timeout
+        self._retries = retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self._timeout),
+            )
+        return self._session
+
+    async def post_json(self, url: str, payload: Dict[str, Any]) -> bool:
+        """POST `payload` as JSON, retrying transient failures. Returns success."""
+        for attempt in range(self._retries + 1):
+            delay = 0.5 * (2 ** attempt)
+            try:
+                async with self.session.post(url, json=payload) as resp:
+                    if resp.status < 400:
+                        return True
+                    if resp.status not in RETRY_STATUSES:
+                        self.log.warning("POST to webhook failed with HTTP %s", resp.status)
+                        return False
+                    if resp.status == 429:
+                        delay = float(resp.headers.get("Retry-After", delay))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.log.debug("Webhook POST attempt %d failed: %s", attempt + 1, e)
+            if attempt < self._retries:
+                await asyncio.sleep(delay)
+        self.log.warning("Giving up on webhook POST after %d attempts", self._retries + 1)
+        return False
+
+    def post_background(self, url: str, payload: Dict[str, Any]) -> None:
+        task = asyncio.create_task(self.post_json(url, payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Wait briefly for background posts, then close the session."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
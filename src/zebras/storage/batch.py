@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Literal, Optional
+
+from .repositories import EventLogRepository
+
+
+_STOP: Any = object()
+
+RawMode = Literal["full", "event", "none"]
+
+
+def strip_raw(raw: Dict[str, Any], mode: RawMode) -> Dict[str, Any]:
+    """Trim a payload before it is stored; the normalized columns are kept either way."""
+    if mode == "none":
+        return {}
+    if mode == "event":
+        inner = raw.get("event")
+        return inner if isinstance(inner, dict) else raw
+    return raw
+
+
+class EventLogWriter:
+    """Buffers event log rows in memory and writes them in batches.
+
+    A batch is flushed when it reaches `batch_size` rows or `flush_interval` seconds
+    after its first row, whichever comes first. When `max_buffer` rows are waiting,
+    `write` blocks until the background task catches up. `raw_mode` controls how
+    much of each payload ends up in the `raw` column.
+    """
+
+    def __init__(self, repo: EventLogRepository, *, batch_size: int = 200, flush_interval: float = 1.0, max_buffer: int = 10_000, raw_mode: RawMode = "full") -> None:
+        self.log = logging.getLogger("zebras.storage.batch")
+        self.repo = repo
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.raw_mode = raw_mode
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffer)
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="zebras-event-log-writer")
+
+    async def write(self, *,
+                    event_type: str,
+                    raw: Dict[str, Any],
+                    subtype: Optional[str] = None,
+                    team_id: Optional[str] = None,
+                    channel_id: Optional[str] = None,
+                    user_id: Optional[str] = None,
+                    message_ts: Optional[str] = None,
+                    thread_ts: Optional[str] = None,
+                    action: Optional[str] = None,
+                    created_at: Optional[datetime] = None) -> None:
+        await self._queue.put({
+            "created_at": created_at or datetime.now(timezone.utc),
+            "event_type": event_type,
+            "subtype": subtype,
+            "team_id": team_id,
+            "channel_id": channel_id,
+            "user_id": user_id,
+            "message_ts": message_ts,
+            "thread_ts": thread_ts,
+            "action": action,
+            "raw": strip_raw(raw, self.raw_mode),
+        })
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch: List[Dict[str, Any]] = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        for attempt in range(2):
+            try:
+                await self.repo.log_many(batch)
+                self.written += len(batch)
+                return
+            except Exception:
+                if attempt == 0:
+                    await asyncio.sleep(0.5)
+                    continue
+                self.dropped += len(batch)
+                self.log.exception("Dropped %d event log rows after failed flush", len(batch))
+
+    def stats(self) -> Dict[str, int]:
+        return {"buffered": self._queue.qsize(), "written": self.written, "dropped": self.dropped}
+
+    async def close(self) -> None:
+        """Flush everything buffered so far and stop the background task."""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
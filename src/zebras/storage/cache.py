@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+from redis.asyncio import Redis as AsyncRedis
+
+
+INVALIDATION_CHANNEL = "zebras:cache:invalidate"
+
+MISSING: Any = object()
+
+
+class TTLCache:
+    """Size-bounded LRU with per-entry expiry. `None` is a valid (negative) value."""
+
+    def __init__(self, *, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return MISSING
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+Callback = Callable[[Optional[str]], None]
+
+
+class CacheInvalidator:
+    """Fans cache invalidations out to every process via Redis pub/sub.
+
+    Callbacks run on the event loop for both local and remote invalidations; a key
+    of `None` means "drop everything for this topic".
+    """
+
+    def __init__(self, redis: AsyncRedis) -> None:
+        self.log = logging.getLogger("zebras.storage.cache")
+        self._redis = redis
+        self._origin = uuid.uuid4().hex
+        self._callbacks: Dict[str, Set[Callback]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, topic: str, callback: Callback) -> None:
+        self._callbacks.setdefault(topic, set()).add(callback)
+        self._ensure_listener()
+
+    def _ensure_listener(self) -> None:
+        if self._listener is not None:
+            return
+        try:
+            self._listener = asyncio.get_running_loop().create_task(self._listen(), name="zebras-cache-invalidator")
+        except RuntimeError:
+            # Subscribed outside the loop; started by the next subscribe/publish on it.
+            pass
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    self._on_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Entries still expire via their TTL while the listener reconnects.
+                self.log.warning("Cache invalidation listener disconnected; retrying", exc_info=True)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(1.0)
+
+    def _on_message(self, message: Dict[str, Any]) -> None:
+        if message.get("type") != "message":
+            return
+        try:
+            data = json.loads(message["data"])
+        except Exception:
+            return
+        if data.get("origin") == self._origin:
+            return
+        self._deliver(data.get("topic"), data.get("key"))
+
+    def _deliver(self, topic: str, key: Optional[str]) -> None:
+        for cb in list(self._callbacks.get(topic, ())):
+            try:
+                cb(key)
+            except Exception:
+                self.log.exception("Cache invalidation callback failed for %s", topic)
+
+    async def publish(self, topic: str, key: Optional[str] = None) -> None:
+        self._ensure_listener()
+        self._deliver(topic, key)
+        data = json.dumps({"origin": self._origin, "topic": topic, "key": key})
+        try:
+            await self._redis.publish(INVALIDATION_CHANNEL, data)
+        except Exception:
+            self.log.warning("Failed to publish cache invalidation for %s", topic, exc_info=True)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
@@ -2,8 +2,25 @@ from __future__ import annotations
 
 from typing import Optional
 import redis
+import redis.asyncio as aioredis
 
 
 def create_redis(url: str) -> redis.Redis:
+    """Synchronous client; RQ (enqueueing and `zebras worker`) requires it."""
     return redis.from_url(url)
 
+
+def create_async_redis(url: str, *, max_connections: Optional[int] = None, pool_timeout: Optional[float] = 5.0) -> aioredis.Redis:
+    """asyncio client backed by a connection pool, for everything on the event loop.
+
+    When all `max_connections` are in use, callers wait up to `pool_timeout`
+    seconds for one to come back (None waits forever) instead of failing with
+    "Too many connections".
+
+    Batch commands with `async with client.pipeline(transaction=False) as pipe:`
+    to pay one round-trip for several commands.
+    """
+    kwargs = {} if max_connections is None else {"max_connections": max_connections}
+    pool = aioredis.BlockingConnectionPool.from_url(url, timeout=pool_timeout, **kwargs)
+    # from_pool: the client owns the pool and disconnects it on aclose().
+    return aioredis.Redis.from_pool(pool)
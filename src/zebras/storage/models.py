@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import String, Integer, DateTime, Text
+from sqlalchemy import BigInteger, Date, DateTime, Index, Integer, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -13,17 +13,24 @@ class Base(DeclarativeBase):
 
 
 class EventLog(Base):
+    # Range-partitioned on created_at (see migration 0006 and storage/partitions.py).
     __tablename__ = "event_logs"
+    __table_args__ = (
+        Index("ix_event_logs_channel_created", "channel_id", "created_at"),
+        Index("ix_event_logs_user_created", "user_id", "created_at"),
+        Index("ix_event_logs_type_created", "event_type", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
 
-    event_type: Mapped[str] = mapped_column(String(64), index=True)
+    event_type: Mapped[str] = mapped_column(String(64))
     subtype: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
-    team_id: Mapped[Optional[str]] = mapped_column(String(32), index=True)
-    channel_id: Mapped[Optional[str]] = mapped_column(String(32), index=True)
-    user_id: Mapped[Optional[str]] = mapped_column(String(32), index=True)
+    team_id: Mapped[Optional[str]] = mapped_column(String(32))
+    channel_id: Mapped[Optional[str]] = mapped_column(String(32))
+    user_id: Mapped[Optional[str]] = mapped_column(String(32))
 
     message_ts: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
     thread_ts: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
@@ -33,6 +40,18 @@ class EventLog(Base):
     raw: Mapped[dict] = mapped_column(JSONB)
 
 
+class EventLogDaily(Base):
+    """Per-day event counts, kept after the raw partitions are dropped."""
+
+    __tablename__ = "event_log_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    channel_id: Mapped[str] = mapped_column(String(32), primary_key=True, default="")  # "" = no channel
+    event_type: Mapped[str] = mapped_column(String(64), primary_key=True)
+    events: Mapped[int] = mapped_column(BigInteger)
+    users: Mapped[int] = mapped_column(Integer)
+
+
 class ChannelRule(Base):
     __tablename__ = "channel_rules"
 
@@ -41,6 +60,10 @@ class ChannelRule(Base):
     allow_top_level_posts: Mapped[bool] = mapped_column(default=True)
     allow_thread_replies: Mapped[bool] = mapped_column(default=True)
     allow_bots: Mapped[bool] = mapped_column(default=True)
+    # Messages allowed per `flood_window` seconds, per user and for the whole channel (0 = no limit)
+    flood_user_limit: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    flood_channel_limit: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    flood_window: Mapped[int] = mapped_column(Integer, default=60, server_default="60")
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
 
 
@@ -65,5 +88,10 @@ class AutoResponderRule(Base):
     case_sensitive: Mapped[bool] = mapped_column(default=False)
     channel_id: Mapped[Optional[str]] = mapped_column(String(32), nullable=True, index=True)  # NULL = global
     enabled: Mapped[bool] = mapped_column(default=True)
+    # Seconds between replies: anywhere, per channel, per thread (0 = none)
+    cooldown: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    channel_cooldown: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    thread_cooldown: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    once_per_thread: Mapped[bool] = mapped_column(default=False, server_default="false")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Literal, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+
+Granularity = Literal["month", "day"]
+
+PARENT = "event_logs"
+DEFAULT_PARTITION = "event_logs_default"
+
+# event_logs_p202509 (monthly) or event_logs_p20250914 (daily)
+_NAME = re.compile(r"^event_logs_p(\d{4})(\d{2})(\d{2})?$")
+
+log = logging.getLogger("zebras.storage.partitions")
+
+
+def period_start(day: date, granularity: Granularity) -> date:
+    return day if granularity == "day" else day.replace(day=1)
+
+
+def period_end(start: date, granularity: Granularity) -> date:
+    if granularity == "day":
+        return start + timedelta(days=1)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partition_name(start: date, granularity: Granularity) -> str:
+    return f"{PARENT}_p{start:%Y%m%d}" if granularity == "day" else f"{PARENT}_p{start:%Y%m}"
+
+
+def parse_partition(name: str) -> Optional[Tuple[date, date]]:
+    """Date range `[start, end)` covered by a partition created by this module."""
+    m = _NAME.match(name)
+    if m is None:
+        return None
+    year, month, day = int(m.group(1)), int(m.group(2)), m.group(3)
+    if day is None:
+        start = date(year, month, 1)
+        return start, period_end(start, "month")
+    start = date(year, month, int(day))
+    return start, period_end(start, "day")
+
+
+def _ts(d: date) -> str:
+    return datetime(d.year, d.month, d.day, tzinfo=timezone.utc).isoformat()
+
+
+async def list_partitions(conn: AsyncConnection) -> List[Tuple[str, date, date]]:
+    res = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent"
+    ), {"parent": PARENT})
+    out = []
+    for (name,) in res:
+        bounds = parse_partition(name)
+        if bounds is not None:
+            out.append((name, *bounds))
+    return sorted(out, key=lambda p: p[1])
+
+
+async def create_partition(conn: AsyncConnection, start: date, granularity: Granularity, *, compression: Optional[str] = None) -> str:
+    """Create and attach the partition starting at `start`.
+
+    Rows that already landed in the default partition for that range are moved
+    into the new table first, so attaching never fails on them.
+    """
+    name = partition_name(start, granularity)
+    lo, hi = _ts(start), _ts(period_end(start, granularity))
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    if compression:
+        await conn.execute(text(f"ALTER TABLE {name} ALTER COLUMN raw SET COMPRESSION {compression}"))
+    await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= '{lo}' AND created_at < '{hi}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    await conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+    return name
+
+
+async def ensure_partitions(engine: AsyncEngine, *, granularity: Granularity = "month", ahead: int = 2, compression: Optional[str] = None, today: Optional[date] = None) -> List[str]:
+    """Make sure the current period and `ahead` future periods have partitions."""
+    today = today or datetime.now(timezone.utc).date()
+    created: List[str] = []
+    async with engine.begin() as conn:
+        existing = await list_partitions(conn)
+        start = period_start(today, granularity)
+        for _ in range(ahead + 1):
+            end = period_end(start, granularity)
+            # Skip ranges already covered, e.g. by monthly partitions after switching to daily.
+            if not any(s < end and start < e for _, s, e in existing):
+                name = await create_partition(conn, start, granularity, compression=compression)
+                existing.append((name, start, end))
+                created.append(name)
+            start = end
+    return created
+
+
+async def rollup_daily(engine: AsyncEngine, *, through: Optional[date] = None) -> int:
+    """(Re)compute `event_log_daily` for complete days up to and including `through`.
+
+    Starts from the last day already rolled up, so it is cheap to run often and
+    idempotent to re-run.
+    """
+    through = through or datetime.now(timezone.utc).date() - timedelta(days=1)
+    async with engine.begin() as conn:
+        last = (await conn.execute(text("SELECT max(day) FROM event_log_daily"))).scalar()
+        if last is None:
+            first = (await conn.execute(text(f"SELECT min(created_at) FROM {PARENT}"))).scalar()
+            if first is None:
+                return 0
+            start = first.astimezone(timezone.utc).date()
+        else:
+            start = last + timedelta(days=1)
+        if start > through:
+            return 0
+        res = await conn.execute(text(
+            "INSERT INTO event_log_daily (day, channel_id, event_type, events, users) "
+            "SELECT (created_at AT TIME ZONE 'UTC')::date, COALESCE(channel_id, ''), event_type, count(*), count(DISTINCT user_id) "
+            f"FROM {PARENT} WHERE created_at >= :lo AND created_at < :hi "
+            "GROUP BY 1, 2, 3 "
+            "ON CONFLICT (day, channel_id, event_type) DO UPDATE SET events = EXCLUDED.events, users = EXCLUDED.users"
+        ), {
+            "lo": datetime(start.year, start.month, start.day, tzinfo=timezone.utc),
+            "hi": datetime(through.year, through.month, through.day, tzinfo=timezone.utc) + timedelta(days=1),
+        })
+        return res.rowcount or 0
+
+
+async def drop_partitions(engine: AsyncEngine, *, before: date, dry_run: bool = False) -> List[str]:
+    """Drop partitions whose whole range ends on or before `before`."""
+    dropped: List[str] = []
+    async with engine.begin() as conn:
+        for name, _, end in await list_partitions(conn):
+            if end <= before:
+                if not dry_run:
+                    await conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+        if not dry_run:
+            await conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff"), {
+                "cutoff": datetime(before.year, before.month, before.day, tzinfo=timezone.utc),
+            })
+    return dropped
+
+
+@dataclass
+class MaintenanceReport:
+    created: List[str] = field(default_factory=list)
+    rolled_up: int = 0
+    dropped: List[str] = field(default_factory=list)
+
+
+async def maintain(engine: AsyncEngine, *, granularity: Granularity = "month", ahead: int = 2, retention_days: int = 0, compression: Optional[str] = None, dry_run: bool = False) -> MaintenanceReport:
+    """Create upcoming partitions, refresh daily rollups, then apply retention.
+
+    Rollups run before anything is dropped, so per-day counts outlive the raw rows.
+    """
+    report = MaintenanceReport()
+    if not dry_run:
+        report.created = await ensure_partitions(engine, granularity=granularity, ahead=ahead, compression=compression)
+        report.rolled_up = await rollup_daily(engine)
+    if retention_days > 0:
+        cutoff = datetime.now(timezone.utc).date() - timedelta(days=retention_days)
+        report.dropped = await drop_partitions(engine, before=cutoff, dry_run=dry_run)
+    for name in report.created:
+        log.info("Created partition %s", name)
+    for name in report.dropped:
+        log.info("%s partition %s", "Would drop" if dry_run else "Dropped", name)
+    return report
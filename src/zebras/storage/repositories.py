@@ -1,18 +1,96 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+import base64
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from sqlalchemy import insert
+from sqlalchemy import and_, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from ..metrics import timed_query
 from .models import EventLog
 
 
+class QueryRejected(ValueError):
+    """The query cannot be served from an index (it would scan whole partitions)."""
+
+
+_RELATIVE = re.compile(r"^(\d+)([mhd])$")
+
+
+def parse_time(value: str, *, now: Optional[datetime] = None) -> datetime:
+    """ISO date/datetime (naive means UTC) or a relative age such as `30m`, `24h`, `7d`."""
+    m = _RELATIVE.match(value.strip())
+    if m:
+        unit = {"m": "minutes", "h": "hours", "d": "days"}[m.group(2)]
+        return (now or datetime.now(timezone.utc)) - timedelta(**{unit: int(m.group(1))})
+    dt = datetime.fromisoformat(value.strip())
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except ValueError as e:
+        raise QueryRejected(f"invalid cursor: {cursor!r}") from e
+
+
+@dataclass
+class EventLogQuery:
+    """Filters for reading `event_logs` back, oldest first.
+
+    Every query needs a lower time bound (so only the relevant partitions are
+    touched) and one of channel, user or event type (the leading column of a
+    composite index). `after` continues from a cursor returned by a previous page.
+    """
+
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    channel_id: Optional[str] = None
+    user_id: Optional[str] = None
+    event_type: Optional[str] = None
+    subtype: Optional[str] = None
+    after: Optional[Tuple[datetime, int]] = None
+    limit: Optional[int] = None
+    include_raw: bool = True
+
+    def validate(self) -> None:
+        if self.since is None and self.after is None:
+            raise QueryRejected("a start time (since) is required")
+        if not (self.channel_id or self.user_id or self.event_type):
+            raise QueryRejected("filter by channel, user or event type; other filters are not indexed")
+        if self.since and self.until and self.until <= self.since:
+            raise QueryRejected("until must be after since")
+
+
+LOG_COLUMNS = (
+    EventLog.id,
+    EventLog.created_at,
+    EventLog.event_type,
+    EventLog.subtype,
+    EventLog.team_id,
+    EventLog.channel_id,
+    EventLog.user_id,
+    EventLog.message_ts,
+    EventLog.thread_ts,
+    EventLog.action,
+)
+
+
 class EventLogRepository:
     def __init__(self, engine: AsyncEngine) -> None:
         self.engine = engine
 
+    @timed_query
     async def log(self, *,
                   event_type: str,
                   raw: Dict[str, Any],
@@ -39,3 +117,57 @@ class EventLogRepository:
         async with self.engine.begin() as conn:
             await conn.execute(stmt)
 
+    @timed_query
+    async def log_many(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert pre-built rows with a single multi-row INSERT."""
+        if not rows:
+            return
+        async with self.engine.begin() as conn:
+            await conn.execute(insert(EventLog).values(rows))
+
+    async def stream(self, query: EventLogQuery, *, chunk_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Yield matching rows ordered by (created_at, id) through a server-side cursor."""
+        query.validate()
+        cols = LOG_COLUMNS + ((EventLog.raw,) if query.include_raw else ())
+        stmt = select(*cols)
+        # The equality filter is chosen to match the leading column of one index.
+        if query.channel_id:
+            stmt = stmt.where(EventLog.channel_id == query.channel_id)
+        if query.user_id:
+            stmt = stmt.where(EventLog.user_id == query.user_id)
+        if query.event_type:
+            stmt = stmt.where(EventLog.event_type == query.event_type)
+        if query.subtype:
+            stmt = stmt.where(EventLog.subtype == query.subtype)
+        if query.since:
+            stmt = stmt.where(EventLog.created_at >= query.since)
+        if query.until:
+            stmt = stmt.where(EventLog.created_at < query.until)
+        if query.after:
+            ts, row_id = query.after
+            # The plain range keeps the index usable; the OR resolves ties on created_at.
+            stmt = stmt.where(
+                EventLog.created_at >= ts,
+                or_(EventLog.created_at > ts, and_(EventLog.created_at == ts, EventLog.id > row_id)),
+            )
+        stmt = stmt.order_by(EventLog.created_at, EventLog.id)
+        if query.limit:
+            stmt = stmt.limit(query.limit)
+        async with self.engine.connect() as conn:
+            result = await conn.stream(stmt.execution_options(yield_per=chunk_size))
+            async for row in result.mappings():
+                yield dict(row)
+
+
+async def export_ndjson(repo: EventLogRepository, query: EventLogQuery) -> AsyncIterator[str]:
+    """Stream a query as NDJSON lines. When `limit` cut the page short, a final
+    `{"next_cursor": ...}` line tells the caller where to continue."""
+    count = 0
+    last: Optional[Tuple[datetime, int]] = None
+    async for row in repo.stream(query):
+        count += 1
+        last = (row["created_at"], row["id"])
+        row["created_at"] = row["created_at"].isoformat()
+        yield json.dumps(row, default=str, separators=(",", ":")) + "\n"
+    if query.limit and count >= query.limit and last is not None:
+        yield json.dumps({"next_cursor": encode_cursor(*last)}) + "\n"
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+import socket
+import sys
+import traceback
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set, Tuple
+
+from rq import Queue
+from rq.exceptions import DequeueTimeout
+from rq.job import Job, JobStatus
+from rq.scheduler import RQScheduler
+
+try:  # RQ >= 2.0 tracks each run of a job as an Execution
+    from rq.executions import Execution
+except ImportError:  # pragma: no cover - RQ 1.x
+    Execution = None
+
+from ..metrics import register_stats
+from .jobs import get_job, on_job_failure, run_job
+
+if TYPE_CHECKING:
+    from ..app_context import AppContext
+
+
+RUN_JOB = f"{run_job.__module__}.{run_job.__name__}"
+
+# Running jobs stay in the started registry this long past their last heartbeat;
+# after that RQ's registry cleanup treats them as abandoned (failed, or retried).
+HEARTBEAT_INTERVAL = 15
+HEARTBEAT_TTL = 60
+CLEANUP_INTERVAL = 60
+
+
+class AsyncWorker:
+    """Runs RQ jobs concurrently on one long-lived event loop.
+
+    Zebras jobs (`run_job` entries) are awaited directly with the shared
+    `AppContext`, so the engine, Slack client and HTTP pools are reused across jobs
+    instead of being rebuilt in a forked work horse each time. Any other RQ job is
+    run in a thread. RQ bookkeeping is kept: job status, the started job registry
+    (with heartbeats, so jobs of a worker that dies are moved to the failed registry
+    by the periodic cleanup), retries through `Job.retry` (immediate or via the
+    scheduled registry), the failed job registry, failure callbacks, and the
+    scheduler that moves due retries back onto the queue.
+    """
+
+    def __init__(self, ctx: "AppContext", queue: str = "zebras", *, concurrency: int = 50, dequeue_timeout: int = 5, shutdown_timeout: float = 30.0) -> None:
+        self.log = logging.getLogger("zebras.worker.async")
+        self.ctx = ctx
+        self.queue = Queue(queue, connection=ctx.redis)
+        self.concurrency = concurrency
+        self.dequeue_timeout = dequeue_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.name = f"zebras-{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        # job id -> (job, execution or None on RQ 1.x) while it runs
+        self._running: Dict[str, Tuple[Job, Any]] = {}
+        self._stopping = asyncio.Event()
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:  # pragma: no cover - non-Unix
+                pass
+        self.log.info("Async worker %s on %s (concurrency %d)", self.name, self.queue.name, self.concurrency)
+        # Scraped from the metrics listener thread, so the sync queue length call is fine there.
+        register_stats("worker", lambda: {**self.stats(), "queued": self.queue.count}, counters={"succeeded", "failed", "retried"})
+        scheduler = asyncio.create_task(self._schedule(), name="zebras-worker-scheduler")
+        heartbeat = asyncio.create_task(self._heartbeat(), name="zebras-worker-heartbeat")
+        try:
+            while not self._stopping.is_set():
+                await self._slots.acquire()
+                try:
+                    item = await loop.run_in_executor(None, self._dequeue)
+                except Exception:
+                    self._slots.release()
+                    self.log.exception("Dequeue failed; backing off")
+                    await asyncio.sleep(1)
+                    continue
+                if item is None:
+                    self._slots.release()
+                    continue
+                task = asyncio.create_task(self._perform(*item))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            scheduler.cancel()
+            await asyncio.gather(scheduler, return_exceptions=True)
+            if self._tasks:
+                self.log.info("Waiting for %d running jobs", len(self._tasks))
+                await asyncio.wait(set(self._tasks), timeout=self.shutdown_timeout)
+            # Jobs still running now stop heartbeating and are reclaimed by cleanup.
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            await self.ctx.aclose()
+
+    def _dequeue(self) -> Optional[Tuple[Job, Queue]]:
+        if self._stopping.is_set():
+            return None
+        try:
+            result = Queue.dequeue_any([self.queue], timeout=self.dequeue_timeout, connection=self.ctx.redis)
+        except DequeueTimeout:
+            return None
+        if result is None:
+            return None
+        job, queue = result
+        with self.ctx.redis.pipeline() as pipe:
+            job.prepare_for_execution(self.name, pipeline=pipe)
+            # Registered as started in the same transaction that takes it off the
+            # intermediate list, so a crash from here on leaves it findable.
+            if Execution is not None:
+                execution = Execution.create(job, HEARTBEAT_TTL, pipeline=pipe, worker_name=self.name)
+            else:  # pragma: no cover - RQ 1.x
+                execution = None
+                queue.started_job_registry.add(job, HEARTBEAT_TTL, pipeline=pipe)
+            # Newer RQ parks dequeued ids in an intermediate list until a worker claims them.
+            if hasattr(queue, "intermediate_queue_key"):
+                pipe.lrem(queue.intermediate_queue_key, 1, job.id)
+            pipe.execute()
+        self._running[job.id] = (job, execution)
+        return job, queue
+
+    def _unregister(self, job: Job, pipe: Any) -> None:
+        _, execution = self._running.pop(job.id, (job, None))
+        if execution is not None:
+            execution.delete(job, pipe)
+        else:
+            self.queue.started_job_registry.remove(job, pipeline=pipe)
+
+    async def _heartbeat(self) -> None:
+        """Keep running jobs alive in the started registry; reap other workers' dead ones."""
+        loop = asyncio.get_running_loop()
+        registry = self.queue.started_job_registry
+        since_cleanup = 0.0
+
+        def beat() -> None:
+            with self.ctx.redis.pipeline() as pipe:
+                for job, execution in list(self._running.values()):
+                    if execution is not None:
+                        execution.heartbeat(registry, HEARTBEAT_TTL, pipeline=pipe)
+                    else:  # pragma: no cover - RQ 1.x
+                        registry.add(job, HEARTBEAT_TTL, pipeline=pipe)
+                pipe.execute()
+
+        while True:
+            try:
+                if self._running:
+                    await loop.run_in_executor(None, beat)
+                if since_cleanup >= CLEANUP_INTERVAL:
+                    since_cleanup = 0.0
+                    await loop.run_in_executor(None, registry.cleanup)
+            except Exception:
+                self.log.warning("Worker heartbeat failed", exc_info=True)
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            since_cleanup += HEARTBEAT_INTERVAL
+
+    async def _perform(self, job: Job, queue: Queue) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            if job.func_name == RUN_JOB:
+                name, _key, kwargs = job.args
+                await get_job(name).run(self.ctx, kwargs)
+            else:
+                timeout = job.timeout or self.queue.DEFAULT_TIMEOUT
+                await asyncio.wait_for(loop.run_in_executor(None, job.perform), timeout if timeout > 0 else None)
+        except Exception:
+            await loop.run_in_executor(None, self._handle_failure, job, queue, sys.exc_info())
+        else:
+            await loop.run_in_executor(None, self._handle_success, job)
+        finally:
+            self._slots.release()
+
+    def _handle_success(self, job: Job) -> None:
+        self.succeeded += 1
+        ttl = job.result_ttl
+        with self.ctx.redis.pipeline() as pipe:
+            self._unregister(job, pipe)
+            if ttl == 0:
+                pipe.execute()
+                job.delete(remove_from_queue=False)
+                return
+            job.set_status(JobStatus.FINISHED, pipeline=pipe)
+            self.queue.finished_job_registry.add(job, ttl if ttl is not None else 500, pipeline=pipe)
+            pipe.execute()
+
+    def _handle_failure(self, job: Job, queue: Queue, exc_info: Any) -> None:
+        exc_string = "".join(traceback.format_exception(*exc_info))
+        try:
+            if job.func_name == RUN_JOB:
+                on_job_failure(job, self.ctx.redis, *exc_info)
+            elif job.failure_callback is not None:
+                job.failure_callback(job, self.ctx.redis, *exc_info)
+        except Exception:
+            self.log.exception("Failure callback for job %s raised", job.id)
+        with self.ctx.redis.pipeline() as pipe:
+            self._unregister(job, pipe)
+            if job.retries_left:
+                self.retried += 1
+                job.retry(queue, pipe)
+            else:
+                self.failed += 1
+                job.set_status(JobStatus.FAILED, pipeline=pipe)
+                queue.failed_job_registry.add(job, ttl=job.failure_ttl, exc_string=exc_string, pipeline=pipe)
+            pipe.execute()
+        self.log.warning("Job %s (%s) failed: %s", job.id, job.func_name, exc_info[1])
+
+    async def _schedule(self) -> None:
+        """Move due scheduled jobs (delayed retries) back onto the queue."""
+        loop = asyncio.get_running_loop()
+        scheduler = RQScheduler([self.queue], connection=self.ctx.redis)
+
+        def tick() -> None:
+            # Only the replica holding the queue's scheduler lock enqueues anything.
+            scheduler.acquire_locks()
+            scheduler.enqueue_scheduled_jobs()
+            scheduler.heartbeat()
+
+        try:
+            while True:
+                try:
+                    await loop.run_in_executor(None, tick)
+                except Exception:
+                    self.log.warning("Scheduler tick failed", exc_info=True)
+                await asyncio.sleep(1)
+        finally:
+            try:
+                scheduler.release_locks()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": len(self._tasks),
+            "concurrency": self.concurrency,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
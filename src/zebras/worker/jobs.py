@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Concatenate, Dict, Generic, List, Literal, Optional, ParamSpec, Set
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from rq import Queue, Retry
+from rq.job import Callback, Job
+
+if TYPE_CHECKING:
+    from ..app_context import AppContext
+
+
+DEAD_LETTER_KEY = "zebras:jobs:dead"
+DEAD_LETTER_MAX = 10_000
+IDEMPOTENCY_PREFIX = "zebras:jobs:idem:"
+
+JobsMode = Literal["inline", "queue"]
+
+P = ParamSpec("P")
+
+log = logging.getLogger("zebras.worker.jobs")
+
+
+class PermanentJobError(Exception):
+    """Raised by a job when retrying cannot help; it goes straight to dead-letter."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff: attempt n (1-based) waits `base_delay * factor**(n-1)`,
+    capped at `max_delay`, with +/- `jitter` spread so retries do not align."""
+
+    max_attempts: int = 5
+    base_delay: float = 2.0
+    factor: float = 2.0
+    max_delay: float = 300.0
+    jitter: float = 0.1
+
+    def delay(self, attempt: int) -> float:
+        d = min(self.max_delay, self.base_delay * self.factor ** (attempt - 1))
+        return d * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def intervals(self) -> List[int]:
+        """RQ `Retry` intervals (whole seconds) for the retries after the first attempt."""
+        return [max(1, round(self.delay(n))) for n in range(1, self.max_attempts)]
+
+
+class JobDef(Generic[P]):
+    """A named async job. The function receives the worker's `AppContext` first;
+    the remaining (JSON/pickle-friendly) arguments are supplied at enqueue time."""
+
+    def __init__(self, name: str, fn: Callable[Concatenate["AppContext", P], Awaitable[None]], *, retry: RetryPolicy, timeout: int) -> None:
+        self.name = name
+        self.fn = fn
+        self.retry = retry
+        self.timeout = timeout
+        self._signature = inspect.signature(fn)
+
+    def bind(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        bound = self._signature.bind(None, *args, **kwargs)
+        return dict(list(bound.arguments.items())[1:])
+
+    async def enqueue(self, key: Optional[str], /, *args: P.args, **kwargs: P.kwargs) -> bool:
+        """Schedule the job. `key` (usually derived from the Slack event) makes the
+        enqueue idempotent: a second enqueue with the same key is ignored.
+        Returns False when it was a duplicate."""
+        from ..app_context import get_context
+
+        return await get_context().jobs().enqueue(self, key, self.bind(*args, **kwargs))
+
+    async def run(self, ctx: "AppContext", kwargs: Dict[str, Any]) -> None:
+        await asyncio.wait_for(self.fn(ctx, **kwargs), self.timeout)
+
+
+JOBS: Dict[str, JobDef] = {}
+
+
+def job(name: str, *, retry: RetryPolicy = RetryPolicy(), timeout: int = 60) -> Callable[[Callable[Concatenate["AppContext", P], Awaitable[None]]], JobDef[P]]:
+    """Register an async function as a job under `name`."""
+
+    def decorator(fn: Callable[Concatenate["AppContext", P], Awaitable[None]]) -> JobDef[P]:
+        if name in JOBS:
+            raise ValueError(f"job {name!r} already registered")
+        jd = JobDef(name, fn, retry=retry, timeout=timeout)
+        JOBS[name] = jd
+        return jd
+
+    return decorator
+
+
+def get_job(name: str) -> JobDef:
+    # Job definitions live in tasks.py; import it so worker processes have them.
+    from . import tasks  # noqa: F401
+
+    try:
+        return JOBS[name]
+    except KeyError:
+        raise PermanentJobError(f"unknown job {name!r}") from None
+
+
+def _dead_letter_record(name: str, key: Optional[str], kwargs: Dict[str, Any], error: str, attempts: int) -> str:
+    log.error("Job %s (key=%s) dead-lettered after %d attempt(s): %s", name, key, attempts, error)
+    return json.dumps({
+        "job": name,
+        "key": key,
+        "kwargs": kwargs,
+        "error": error,
+        "attempts": attempts,
+        "failed_at": time.time(),
+    }, default=str)
+
+
+def dead_letter(redis: Redis, name: str, key: Optional[str], kwargs: Dict[str, Any], error: str, attempts: int) -> None:
+    record = _dead_letter_record(name, key, kwargs, error, attempts)
+    with redis.pipeline() as pipe:
+        pipe.rpush(DEAD_LETTER_KEY, record)
+        pipe.ltrim(DEAD_LETTER_KEY, -DEAD_LETTER_MAX, -1)
+        pipe.execute()
+
+
+async def async_dead_letter(redis: AsyncRedis, name: str, key: Optional[str], kwargs: Dict[str, Any], error: str, attempts: int) -> None:
+    record = _dead_letter_record(name, key, kwargs, error, attempts)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.rpush(DEAD_LETTER_KEY, record)
+        pipe.ltrim(DEAD_LETTER_KEY, -DEAD_LETTER_MAX, -1)
+        await pipe.execute()
+
+
+class JobQueue:
+    """Enqueues jobs onto the RQ queue (`queue` mode) or runs them as background
+    tasks in this process (`inline` mode, for deployments without a worker).
+
+    Both modes share the retry policy, idempotency keys and dead-letter list.
+    """
+
+    def __init__(self, ctx: "AppContext", *, mode: JobsMode = "inline", queue: str = "zebras", idempotency_ttl: int = 86_400, inline_concurrency: int = 100) -> None:
+        self.ctx = ctx
+        self.mode = mode
+        self.queue = Queue(queue, connection=ctx.redis)
+        self.idempotency_ttl = idempotency_ttl
+        # Inline jobs beyond this many make `enqueue` wait, like a full queue would.
+        self._inline_slots = asyncio.Semaphore(inline_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self.enqueued = 0
+        self.duplicates = 0
+
+    async def _claim(self, name: str, key: str) -> bool:
+        try:
+            return bool(await self.ctx.aredis().set(f"{IDEMPOTENCY_PREFIX}{name}:{key}", b"1", nx=True, ex=self.idempotency_ttl))
+        except Exception:
+            log.warning("Idempotency check failed for %s:%s; enqueueing anyway", name, key, exc_info=True)
+            return True
+
+    async def enqueue(self, jd: JobDef, key: Optional[str], kwargs: Dict[str, Any]) -> bool:
+        if key is not None and not await self._claim(jd.name, key):
+            self.duplicates += 1
+            return False
+        self.enqueued += 1
+        if self.mode == "inline":
+            await self._inline_slots.acquire()
+            task = asyncio.create_task(self._run_inline(jd, key, kwargs))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return True
+        # RQ only speaks the sync client, so the enqueue itself runs off the loop.
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: self.queue.enqueue_call(
+            func=run_job,
+            args=(jd.name, key, kwargs),
+            timeout=jd.timeout,
+            result_ttl=0,
+            retry=Retry(max=jd.retry.max_attempts - 1, interval=jd.retry.intervals()) if jd.retry.max_attempts > 1 else None,
+            on_failure=Callback(on_job_failure),
+            meta={"zebras_job": jd.name, "key": key},
+        ))
+        return True
+
+    async def _run_inline(self, jd: JobDef, key: Optional[str], kwargs: Dict[str, Any]) -> None:
+        try:
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    await jd.run(self.ctx, kwargs)
+                    return
+                except Exception as e:
+                    if isinstance(e, PermanentJobError) or attempt >= jd.retry.max_attempts:
+                        try:
+                            await async_dead_letter(self.ctx.aredis(), jd.name, key, kwargs, repr(e), attempt)
+                        except Exception:
+                            log.exception("Job %s failed and could not be dead-lettered", jd.name)
+                        return
+                    delay = jd.retry.delay(attempt)
+                    log.warning("Job %s failed (attempt %d); retrying in %.1fs: %r", jd.name, attempt, delay, e)
+                    await asyncio.sleep(delay)
+        finally:
+            self._inline_slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "enqueued": self.enqueued, "duplicates": self.duplicates, "inline_running": len(self._tasks)}
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Give in-flight inline jobs a chance to finish."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+
+# --- RQ entry points (run inside `zebras worker`) ---
+
+def _job_context() -> "AppContext":
+    from ..app_context import AppContext, set_context
+    from ..config import load_settings
+    from ..storage.datastore import engine_from_settings
+    from ..storage.kv import create_redis
+
+    s = load_settings()
+    ctx = AppContext(engine=engine_from_settings(s), redis=create_redis(s.redis_url), bot_token=s.slack_bot_token, settings=s)
+    set_context(ctx)
+    return ctx
+
+
+def run_job(name: str, key: Optional[str], kwargs: Dict[str, Any]) -> None:
+    """Execute one job synchronously (RQ forks a work horse per job, so each run
+    builds its own context and event loop)."""
+    jd = get_job(name)
+    ctx = _job_context()
+
+    async def main() -> None:
+        try:
+            await jd.run(ctx, kwargs)
+        finally:
+            # The loop ends with this job: release its pools and connections.
+            await ctx.aclose()
+
+    asyncio.run(main())
+
+
+def on_job_failure(job: Job, connection: Redis, exc_type: type, exc_value: BaseException, tb: Any) -> None:
+    """RQ failure callback: route exhausted or permanent failures to dead-letter."""
+    attempts = 1 + len(job.retry_intervals or []) - (job.retries_left or 0)
+    if isinstance(exc_value, PermanentJobError):
+        # Runs before RQ decides whether to retry, so this stops the retries.
+        job.retries_left = 0
+    if job.retries_left:
+        return
+    name, key, kwargs = job.args
+    dead_letter(connection, name, key, kwargs, repr(exc_value), attempts)
@@ -0,0 +1,58 @@
+"""Job definitions for Slack side effects.
+
+Plugins decide *what* should happen and enqueue one of these; the I/O runs in
+`zebras worker` (queue mode) or in a background task (inline mode). Jobs must be
+defined here (or imported from here) so worker processes can find them by name.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from slack_sdk.errors import SlackApiError
+
+from .jobs import PermanentJobError, RetryPolicy, job
+
+if TYPE_CHECKING:
+    from ..app_context import AppContext
+
+
+SLACK_RETRY = RetryPolicy(max_attempts=5, base_delay=2.0, max_delay=120.0)
+
+
+def _raise_for_slack(e: SlackApiError) -> None:
+    """Only rate limits and Slack-side errors are worth retrying."""
+    status = e.response.status_code if e.response is not None else None
+    if status == 429 or (status is not None and status >= 500):
+        raise e
+    raise PermanentJobError(f"Slack API error: {e.response.get('error') if e.response is not None else e}") from e
+
+
+@job("slack.post_message", retry=SLACK_RETRY, timeout=30)
+async def post_message(ctx: "AppContext", channel: str, text: str) -> None:
+    client = await ctx.web_client()
+    try:
+        await client.chat_postMessage(channel=channel, text=text)
+    except SlackApiError as e:
+        _raise_for_slack(e)
+
+
+@job("slack.send_dm", retry=SLACK_RETRY, timeout=30)
+async def send_dm(ctx: "AppContext", user_id: str, text: str) -> None:
+    client = await ctx.web_client()
+    try:
+        resp = await client.conversations_open(users=user_id)
+        dm = resp.get("channel", {}).get("id")
+        if not dm:
+            raise PermanentJobError(f"no DM channel for {user_id}")
+        await client.chat_postMessage(channel=dm, text=text)
+    except SlackApiError as e:
+        _raise_for_slack(e)
+
+
+@job("rules.audit", retry=SLACK_RETRY, timeout=30)
+async def post_audit(ctx: "AppContext", channel: str, text: str) -> None:
+    client = await ctx.web_client()
+    try:
+        await client.chat_postMessage(channel=channel, text=text)
+    except SlackApiError as e:
+        _raise_for_slack(e)
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+import pytest
+
+T = TypeVar("T")
+
+
+@pytest.fixture
+def aredis() -> Any:
+    """In-memory stand-in for `AppContext.aredis()`."""
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+def run() -> Callable[[Awaitable[T]], T]:
+    """Run a coroutine to completion (no asyncio plugin needed)."""
+    return asyncio.run
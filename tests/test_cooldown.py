@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+from zebras.plugins.autoresponder.cooldown import ReplyCooldowns, parse_duration
+from zebras.plugins.autoresponder.matcher import CompiledRule
+
+PREFIX = "zebras:auto:cooldown:"
+
+
+def test_partial_claim_is_released(aredis, run):
+    rule = CompiledRule(id=1, response_text="hi", cooldown=0, channel_cooldown=60, thread_cooldown=60)
+
+    async def scenario():
+        cooldowns = ReplyCooldowns(aredis)
+        # Someone else already holds the thread cooldown.
+        await aredis.set(f"{PREFIX}1:C1:111.1", b"1", ex=60)
+        allowed = await cooldowns.acquire(rule, "C1", "111.1")
+        channel_key_left = await aredis.exists(f"{PREFIX}1:C1")
+        # A different thread in the same channel is not blocked by the released claim.
+        other = await ReplyCooldowns(aredis).acquire(rule, "C1", "222.2")
+        await cooldowns.close()
+        return allowed, channel_key_left, other
+
+    allowed, channel_key_left, other = run(scenario())
+    assert allowed is False
+    assert channel_key_left == 0
+    assert other is True
+
+
+def test_cooldown_holds_across_processes(aredis, run):
+    rule = CompiledRule(id=2, response_text="hi", cooldown=60)
+
+    async def scenario():
+        a, b = ReplyCooldowns(aredis), ReplyCooldowns(aredis)
+        first = await a.acquire(rule, "C1", None)
+        second = await b.acquire(rule, "C2", None)
+        # `a` read the TTL back with its claim and answers without Redis.
+        third = await a.acquire(rule, "C3", None)
+        await a.close()
+        await b.close()
+        return (first, second, third), await a.counts([2])
+
+    outcomes, totals = run(scenario())
+    assert outcomes == (True, False, False)
+    assert totals[2] == {"hits": 3, "replies": 1, "suppressed": 1, "suppressed_local": 1}
+
+
+def test_rule_without_cooldowns_always_replies(aredis, run):
+    rule = CompiledRule(id=3, response_text="hi")
+
+    async def scenario():
+        cooldowns = ReplyCooldowns(aredis)
+        results = [await cooldowns.acquire(rule, "C1", None) for _ in range(3)]
+        await cooldowns.close()
+        return results, await cooldowns.counts([3, 4])
+
+    results, totals = run(scenario())
+    assert results == [True, True, True]
+    assert totals == {3: {"hits": 3, "replies": 3, "suppressed": 0, "suppressed_local": 0}}
+
+
+@pytest.mark.parametrize("value,seconds", [("90", 90), ("90s", 90), ("5m", 300), ("2h", 7200), ("1d", 86400)])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_parse_duration_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_duration("soon")
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from zebras.middleware.dedupe import DedupeMiddleware, event_key
+
+
+def test_event_key_prefers_event_id():
+    assert event_key({"event_id": "Ev1", "event": {"client_msg_id": "m1"}}) == "Ev1"
+    assert event_key({"event": {"client_msg_id": "m1"}}) == "msg:m1"
+    assert event_key({"envelope_id": "e1"}) == "env:e1"
+    assert event_key({"event": {"type": "message"}}) is None
+
+
+def _collect(handled):
+    async def nxt(evt):
+        handled.append(evt)
+
+    return nxt
+
+
+def test_retry_is_dropped_across_processes(aredis, run):
+    handled = []
+
+    async def scenario():
+        socket, http = DedupeMiddleware(aredis), DedupeMiddleware(aredis)
+        await socket({"event_id": "Ev1"}, _collect(handled))
+        await http({"event_id": "Ev1", "retry_attempt": 1}, _collect(handled))
+        return socket.stats(), http.stats()
+
+    first, second = run(scenario())
+    assert len(handled) == 1
+    assert first["claimed"] == 1
+    assert (second["claimed"], second["duplicates"], second["retries_dropped"]) == (0, 1, 1)
+
+
+def test_repeat_in_same_process_skips_redis(aredis, run):
+    handled = []
+
+    async def scenario():
+        mw = DedupeMiddleware(aredis)
+        await mw({"event_id": "Ev1"}, _collect(handled))
+        await aredis.flushall()
+        await mw({"event_id": "Ev1"}, _collect(handled))
+        return mw.stats()
+
+    stats = run(scenario())
+    assert len(handled) == 1
+    assert stats["duplicates_local"] == 1
+
+
+def test_distinct_and_keyless_events_pass(aredis, run):
+    handled = []
+
+    async def scenario():
+        mw = DedupeMiddleware(aredis)
+        await mw({"event_id": "Ev1"}, _collect(handled))
+        await mw({"event_id": "Ev2"}, _collect(handled))
+        await mw({"event": {"type": "message"}}, _collect(handled))
+        await mw({"event": {"type": "message"}}, _collect(handled))
+
+    run(scenario())
+    assert len(handled) == 4
+
+
+def test_redis_failure_fails_open(run):
+    class Broken:
+        async def set(self, *args, **kwargs):
+            raise ConnectionError("down")
+
+    handled = []
+
+    async def scenario():
+        mw = DedupeMiddleware(Broken())
+        await mw({"event_id": "Ev1"}, _collect(handled))
+        return mw.stats()
+
+    stats = run(scenario())
+    assert len(handled) == 1
+    assert stats["redis_errors"] == 1
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from zebras.rules.engine import NEUTRAL, Decision, Engine, Facts, PredicateRule, Result, Rule, channel_policy_rules, message_facts
+
+
+def _policy(*, top=True, threads=True, bots=True):
+    return SimpleNamespace(allow_top_level_posts=top, allow_thread_replies=threads, allow_bots=bots)
+
+
+class _Policies:
+    def __init__(self, **channels):
+        self.channels = channels
+        self.loads = 0
+
+    async def __call__(self, channel_id):
+        self.loads += 1
+        return self.channels.get(channel_id)
+
+
+def _engine(policies, **kwargs):
+    engine = Engine(policies, **kwargs)
+    for rule in channel_policy_rules():
+        engine.add(rule)
+    return engine
+
+
+TOP = {"type": "message", "user": "U1", "text": "hi"}
+REPLY = {**TOP, "thread_ts": "1.1"}
+BOT = {"type": "message", "subtype": "bot_message", "bot_id": "B1"}
+
+
+def test_channel_policies(run):
+    policies = _Policies(C1=_policy(top=False), C2=_policy(threads=False), C3=_policy(bots=False))
+    engine = _engine(policies)
+
+    async def scenario():
+        return [
+            await engine.decide("C0", TOP),
+            await engine.decide("C1", TOP),
+            await engine.decide("C1", REPLY),
+            await engine.decide("C2", REPLY),
+            await engine.decide("C3", BOT),
+            await engine.decide("C1", {**TOP, "subtype": "message_changed"}),
+        ]
+
+    no_policy, top, reply_ok, reply, bot, edit = run(scenario())
+    assert no_policy is NEUTRAL
+    assert (top.decision, top.rule) == (Decision.DENY, "top")
+    assert reply_ok is NEUTRAL
+    assert (reply.decision, reply.rule) == (Decision.DENY, "threads")
+    assert (bot.rule, bot.delete) == ("bots", True)
+    assert edit is NEUTRAL
+
+
+def test_decisions_are_served_from_the_table(run):
+    policies = _Policies(C1=_policy(top=False))
+    engine = _engine(policies)
+    facts = message_facts(TOP)
+    assert engine.cached("C1", facts) is None
+
+    async def scenario():
+        first = await engine.decide("C1", TOP)
+        second = await engine.decide("C1", {**TOP, "text": "again"})
+        await engine.decide("C1", REPLY)
+        return first, second
+
+    first, second = run(scenario())
+    assert first is second
+    assert engine.cached("C1", facts) is first
+    assert policies.loads == 2
+    assert engine.table_stats()["channels"] == 1
+
+
+def test_invalidate_reloads_the_policy(run):
+    policies = _Policies(C1=_policy(top=False))
+    engine = _engine(policies)
+
+    async def scenario():
+        before = await engine.decide("C1", TOP)
+        policies.channels["C1"] = _policy()
+        engine.invalidate("C1")
+        return before, await engine.decide("C1", TOP)
+
+    before, after = run(scenario())
+    assert before.decision is Decision.DENY
+    assert after is NEUTRAL
+
+
+def test_decision_is_not_cached_when_invalidated_while_loading(run):
+    gate = asyncio.Event()
+
+    async def slow_policy(channel_id):
+        await gate.wait()
+        return _policy(top=False)
+
+    engine = _engine(slow_policy)
+
+    async def scenario():
+        pending = asyncio.create_task(engine.decide("C1", TOP))
+        await asyncio.sleep(0)
+        engine.invalidate("C1")
+        gate.set()
+        return await pending
+
+    assert run(scenario()).decision is Decision.DENY
+    assert engine.cached("C1", message_facts(TOP)) is None
+
+
+def test_rules_are_reordered_by_deny_rate():
+    engine = Engine(resort_every=10)
+    rare = PredicateRule("rare", lambda p, f: f.subtype == "rare", "rare")
+    common = PredicateRule("common", lambda p, f: not f.is_thread, "common")
+    urgent = PredicateRule("urgent", lambda p, f: False, "urgent", priority=1)
+    for rule in (rare, common, urgent):
+        engine.add(rule)
+    for _ in range(10):
+        engine.decide_static(None, Facts(False, False, None))
+    assert [r.name for r in engine.rules] == ["urgent", "common", "rare"]
+
+
+def test_per_event_rules_run_after_the_table(run):
+    class Keyword(Rule):
+        name = "keyword"
+
+        async def evaluate(self, context, event):
+            if "spam" in event.get("text", ""):
+                return Result(Decision.DENY, "no spam", self.name)
+            return NEUTRAL
+
+    engine = _engine(_Policies(C1=_policy(top=False)))
+    engine.add(Keyword())
+
+    async def scenario():
+        return await engine.decide("C2", {**REPLY, "text": "spam"}), await engine.decide("C1", {**TOP, "text": "spam"})
+
+    spam, top = run(scenario())
+    assert spam.rule == "keyword"
+    # Allowed keys still need the per-event rule; table denials do not.
+    assert engine.cached("C2", message_facts(REPLY)) is None
+    assert engine.cached("C1", message_facts(TOP)) is top
+    assert top.rule == "top"
+
+
+def test_evaluate_batch_matches_live_decisions(run):
+    policies = {"C1": _policy(top=False), "C3": _policy(bots=False)}
+    engine = _engine(_Policies(**policies))
+    events = [("C1", TOP), ("C1", REPLY), ("C3", BOT), ("C1", TOP), ("C2", TOP)]
+
+    report = engine.evaluate_batch(events, policies)
+    assert (report.events, report.denied) == (5, 3)
+    assert report.hits == {"top": 2, "bots": 1}
+    assert sum(report.latency_buckets.values()) == 5
+    assert report.latency_percentile(0.5) <= report.latency_percentile(0.99)
+    # The live tables are left alone.
+    assert engine.table_stats() == {"channels": 0, "hits": 0, "misses": 0}
+
+    async def live():
+        return [await engine.decide(c, e) for c, e in events]
+
+    denied = sum(r.decision is Decision.DENY for r in run(live()))
+    assert denied == report.denied
+
+
+def test_batch_reports_merge():
+    engine = _engine(None)
+    policies = {"C1": _policy(top=False)}
+    total = engine.evaluate_batch([("C1", TOP)] * 3, policies)
+    total.merge(engine.evaluate_batch([("C1", REPLY), ("C1", TOP)], policies))
+    assert (total.events, total.denied, total.hits) == (5, 4, {"top": 4})
+    assert sum(total.latency_buckets.values()) == 5
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from zebras.storage.repositories import EventLogQuery, QueryRejected, decode_cursor, encode_cursor, export_ndjson, parse_time
+
+T0 = datetime(2026, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(T0, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (T0, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(T0, 1)[:-4]])
+def test_bad_cursor_is_rejected(cursor):
+    with pytest.raises(QueryRejected):
+        decode_cursor(cursor)
+
+
+def test_parse_time():
+    now = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    assert parse_time("24h", now=now) == now - timedelta(hours=24)
+    assert parse_time("7d", now=now) == now - timedelta(days=7)
+    assert parse_time("2026-03-01") == datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        EventLogQuery(channel_id="C1"),
+        EventLogQuery(since=T0, subtype="bot_message"),
+        EventLogQuery(since=T0, until=T0, channel_id="C1"),
+    ],
+)
+def test_unindexed_queries_are_rejected(query):
+    with pytest.raises(QueryRejected):
+        query.validate()
+
+
+class _Repo:
+    """Rows ordered by (created_at, id), filtered the way the keyset query does."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def stream(self, query):
+        query.validate()
+        count = 0
+        for row in self.rows:
+            if query.after and (row["created_at"], row["id"]) <= query.after:
+                continue
+            if query.limit and count >= query.limit:
+                return
+            count += 1
+            yield dict(row)
+
+
+def test_pages_continue_from_next_cursor(run):
+    # Several rows share a timestamp, so the cursor must carry the id as well.
+    rows = [{"id": i, "created_at": T0 + timedelta(seconds=i // 3), "event_type": "message"} for i in range(1, 8)]
+    repo = _Repo(rows)
+
+    async def read_all():
+        ids, cursor, pages = [], None, 0
+        while True:
+            pages += 1
+            query = EventLogQuery(since=T0, channel_id="C1", limit=3, after=decode_cursor(cursor) if cursor else None)
+            cursor = None
+            async for line in export_ndjson(repo, query):
+                data = json.loads(line)
+                if "next_cursor" in data:
+                    cursor = data["next_cursor"]
+                else:
+                    ids.append(data["id"])
+            if cursor is None:
+                return ids, pages
+
+    ids, pages = run(read_all())
+    assert ids == list(range(1, 8))
+    assert pages == 3
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+
+from zebras.storage.batch import EventLogWriter, strip_raw
+
+
+class _Repo:
+    def __init__(self, fail: int = 0) -> None:
+        self.batches = []
+        self.fail = fail
+
+    async def log_many(self, rows):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("db down")
+        self.batches.append([r["event_type"] for r in rows])
+
+
+def test_strip_raw_modes():
+    raw = {"type": "event_callback", "event": {"type": "message"}}
+    assert strip_raw(raw, "full") is raw
+    assert strip_raw(raw, "event") == {"type": "message"}
+    assert strip_raw({"type": "hello"}, "event") == {"type": "hello"}
+    assert strip_raw(raw, "none") == {}
+
+
+def test_full_batches_flush_without_waiting(run):
+    repo = _Repo()
+
+    async def scenario():
+        writer = EventLogWriter(repo, batch_size=3, flush_interval=60)
+        writer.start()
+        for i in range(7):
+            await writer.write(event_type=f"e{i}", raw={})
+        await asyncio.sleep(0.05)
+        before_close = list(repo.batches)
+        await writer.close()
+        return before_close, writer.stats()
+
+    before_close, stats = run(scenario())
+    assert before_close == [["e0", "e1", "e2"], ["e3", "e4", "e5"]]
+    assert repo.batches[-1] == ["e6"]
+    assert stats["written"] == 7
+
+
+def test_partial_batch_flushes_after_interval(run):
+    repo = _Repo()
+
+    async def scenario():
+        writer = EventLogWriter(repo, batch_size=100, flush_interval=0.05)
+        writer.start()
+        await writer.write(event_type="message", raw={})
+        await asyncio.sleep(0.15)
+        flushed = list(repo.batches)
+        await writer.close()
+        return flushed
+
+    assert run(scenario()) == [["message"]]
+
+
+def test_failed_flush_is_retried_once_then_dropped(run):
+    repo = _Repo(fail=2)
+
+    async def scenario():
+        writer = EventLogWriter(repo, batch_size=2, flush_interval=60)
+        writer.start()
+        await writer.write(event_type="a", raw={})
+        await writer.write(event_type="b", raw={})
+        await writer.write(event_type="c", raw={})
+        await writer.close()
+        return writer.stats()
+
+    stats = run(scenario())
+    assert stats["dropped"] == 2
+    assert stats["written"] == 1
+    assert repo.batches == [["c"]]
+
+
+def test_write_waits_when_buffer_is_full(run):
+    repo = _Repo()
+
+    async def scenario():
+        writer = EventLogWriter(repo, batch_size=10, flush_interval=60, max_buffer=2)
+        await writer.write(event_type="a", raw={})
+        await writer.write(event_type="b", raw={})
+        blocked = asyncio.create_task(writer.write(event_type="c", raw={}))
+        await asyncio.sleep(0.05)
+        waiting = not blocked.done()
+        writer.start()
+        await asyncio.wait_for(blocked, 1)
+        await writer.close()
+        return waiting
+
+    assert run(scenario()) is True
+    assert [e for batch in repo.batches for e in batch] == ["a", "b", "c"]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from zebras.event_queue import SPILL_KEY, EventQueue
+from zebras.router import Router
+
+
+def _router(seen, gate=None):
+    router = Router()
+
+    async def handler(evt):
+        if gate is not None:
+            await gate.wait()
+        seen.append(evt["event"]["n"])
+
+    router.on("message", handler)
+    return router
+
+
+def _event(n):
+    return {"type": "event_callback", "event": {"type": "message", "n": n}}
+
+
+def test_submit_returns_before_dispatch(run):
+    seen = []
+
+    async def scenario():
+        gate = asyncio.Event()
+        queue = EventQueue(_router(seen, gate), maxsize=10, workers=2)
+        queue.start()
+        accepted = await asyncio.wait_for(queue.submit(_event(1)), 0.1)
+        before = list(seen)
+        gate.set()
+        await queue.stop(timeout=1)
+        return accepted, before, queue.stats()
+
+    accepted, before, stats = run(scenario())
+    assert accepted is True
+    assert before == []
+    assert seen == [1]
+    assert stats["processed"] == 1
+
+
+def test_shed_drops_when_full(run):
+    seen = []
+
+    async def scenario():
+        queue = EventQueue(_router(seen), maxsize=2, workers=1, overflow="shed")
+        results = [await queue.submit(_event(n)) for n in range(3)]
+        queue.start()
+        await queue.stop(timeout=1)
+        return results, queue.stats()
+
+    results, stats = run(scenario())
+    assert results == [True, True, False]
+    assert stats["shed"] == 1
+    assert seen == [0, 1]
+
+
+def test_block_waits_for_room(run):
+    seen = []
+
+    async def scenario():
+        queue = EventQueue(_router(seen), maxsize=1, workers=1, overflow="block")
+        await queue.submit(_event(0))
+        pending = asyncio.create_task(queue.submit(_event(1)))
+        await asyncio.sleep(0.05)
+        waiting = not pending.done()
+        queue.start()
+        await asyncio.wait_for(pending, 1)
+        await queue.stop(timeout=1)
+        return waiting
+
+    assert run(scenario()) is True
+    assert seen == [0, 1]
+
+
+def test_spill_goes_to_redis_and_drains_back(aredis, run):
+    seen = []
+
+    async def scenario():
+        queue = EventQueue(_router(seen), maxsize=2, workers=1, overflow="spill", redis=aredis)
+        for n in range(4):
+            assert await queue.submit(_event(n))
+        spilled = [json.loads(raw)["p"]["event"]["n"] for raw in await aredis.lrange(SPILL_KEY, 0, -1)]
+        queue.start()
+        for _ in range(50):
+            if len(seen) == 4:
+                break
+            await asyncio.sleep(0.05)
+        await queue.stop(timeout=1)
+        return spilled, queue.stats(), await aredis.llen(SPILL_KEY)
+
+    spilled, stats, left = run(scenario())
+    assert spilled == [2, 3]
+    assert stats["spilled"] == 2
+    assert sorted(seen) == [0, 1, 2, 3]
+    assert left == 0
+
+
+def test_spill_requires_redis():
+    with pytest.raises(ValueError):
+        EventQueue(Router(), overflow="spill")
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+
+from zebras.rules.flood import FloodLimiter
+
+
+def test_user_limit_reports_the_first_message_over(aredis, run):
+    async def scenario():
+        # No local fast path: every message goes to Redis.
+        limiter = FloodLimiter(aredis, local_lag=0)
+        results = [
+            await limiter.hit("C1", "U1", f"m{i}", user_limit=3, channel_limit=0, window=60)
+            for i in range(6)
+        ]
+        return limiter, results
+
+    limiter, results = run(scenario())
+    assert results[:3] == [None, None, None]
+    assert [v.first for v in results[3:]] == [True, False, False]
+    assert {(v.scope, v.limit) for v in results[3:]} == {("user", 3)}
+    assert [v.count for v in results[3:]] == [4, 5, 6]
+    assert limiter.violations == 3
+
+
+def test_window_is_shared_between_processes(aredis, run):
+    async def scenario():
+        a = FloodLimiter(aredis, local_lag=0)
+        b = FloodLimiter(aredis, local_lag=0)
+        out = []
+        for i in range(4):
+            limiter = a if i % 2 else b
+            out.append(await limiter.hit("C1", f"U{i}", f"m{i}", user_limit=0, channel_limit=3, window=60))
+        return out
+
+    results = run(scenario())
+    assert results[:3] == [None, None, None]
+    assert results[3].scope == "channel" and results[3].first
+
+
+def test_local_fast_path_messages_still_count(aredis, run):
+    async def scenario():
+        limiter = FloodLimiter(aredis, headroom=0.5, local_lag=60)
+        results = [
+            await limiter.hit("C1", "U1", f"m{i}", user_limit=10, channel_limit=0, window=60)
+            for i in range(11)
+        ]
+        return limiter, results
+
+    limiter, results = run(scenario())
+    assert limiter.local > 0
+    assert results[:10] == [None] * 10
+    assert results[10] is not None and results[10].count == 11 and results[10].first
+
+
+def test_old_messages_leave_the_window(aredis, run, monkeypatch):
+    import zebras.rules.flood as flood
+
+    clock = [1_000.0]
+    monkeypatch.setattr(flood.time, "time", lambda: clock[0])
+
+    async def scenario():
+        limiter = FloodLimiter(aredis, local_lag=0)
+        for i in range(3):
+            assert await limiter.hit("C1", "U1", f"m{i}", user_limit=3, channel_limit=0, window=10) is None
+        clock[0] += 11
+        return await limiter.hit("C1", "U1", "m3", user_limit=3, channel_limit=0, window=10)
+
+    assert run(scenario()) is None
+
+
+def test_redis_failure_allows_the_message(run):
+    class Pipeline:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: None
+
+        async def execute(self):
+            raise ConnectionError("down")
+
+    class Broken:
+        def pipeline(self, transaction=False):
+            return Pipeline()
+
+    async def scenario():
+        limiter = FloodLimiter(Broken(), local_lag=0)
+        return limiter, await limiter.hit("C1", "U1", "m", user_limit=1, channel_limit=0, window=60)
+
+    limiter, result = run(scenario())
+    assert result is None
+    assert limiter.redis_errors == 1
+
+
+def test_local_hits_reach_redis_when_the_sender_goes_quiet(aredis, run):
+    async def scenario():
+        a = FloodLimiter(aredis, headroom=0.5, local_lag=0.05)
+        b = FloodLimiter(aredis, local_lag=0)
+        for i in range(5):
+            assert await a.hit("C1", "U1", f"m{i}", user_limit=10, channel_limit=0, window=60) is None
+        assert a.local > 0
+        await asyncio.sleep(0.2)
+        # Another process sees every one of them, not just those sent before the last local hit.
+        seen = await aredis.zcard("zebras:flood:u:C1:U1")
+        over = [await b.hit("C1", "U1", f"n{i}", user_limit=10, channel_limit=0, window=60) for i in range(6)]
+        await a.close()
+        return seen, over
+
+    seen, over = run(scenario())
+    assert seen == 5
+    assert over[:5] == [None] * 5
+    assert over[5] is not None and over[5].first
+
+
+def test_flush_writes_outstanding_local_hits(aredis, run):
+    async def scenario():
+        limiter = FloodLimiter(aredis, headroom=0.5, local_lag=30)
+        for i in range(3):
+            await limiter.hit("C1", "U1", f"m{i}", user_limit=100, channel_limit=0, window=60)
+        before = await aredis.zcard("zebras:flood:u:C1:U1")
+        await limiter.flush()
+        after = await aredis.zcard("zebras:flood:u:C1:U1")
+        limiter._flusher.cancel()
+        return limiter.local, before, after
+
+    local, before, after = run(scenario())
+    assert local == 2
+    assert (before, after) == (1, 3)
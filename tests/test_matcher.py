@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from zebras.plugins.autoresponder import matcher
+from zebras.plugins.autoresponder.matcher import AutoResponderIndex
+
+
+def _rule(id, phrase, *, match_type="contains", case_sensitive=False, channel_id=None):
+    return SimpleNamespace(
+        id=id, phrase=phrase, response_text=f"reply {id}", match_type=match_type, case_sensitive=case_sensitive,
+        channel_id=channel_id, cooldown=0, channel_cooldown=0, thread_cooldown=0, once_per_thread=False,
+    )
+
+
+async def _inline(rule_id, pattern, text):
+    return pattern.compiled.search(text) is not None
+
+
+def _match(index, channel, text, run):
+    rule = run(index.match(channel, text, _inline))
+    return rule.id if rule else None
+
+
+def test_lowest_id_wins_across_scopes_and_kinds(run):
+    index = AutoResponderIndex([
+        _rule(5, "deploy"),
+        _rule(3, "deploy", channel_id="C1"),
+        _rule(4, r"dep\w+", match_type="regex"),
+        _rule(9, "hello", match_type="exact"),
+    ])
+    assert _match(index, "C1", "about the deploy", run) == 3
+    assert _match(index, "C2", "about the deploy", run) == 4
+    assert _match(index, "C2", "hello", run) == 9
+    assert _match(index, "C2", "hello there", run) is None
+
+
+def test_case_sensitivity(run):
+    index = AutoResponderIndex([_rule(1, "VPN", case_sensitive=True), _rule(2, "wifi")])
+    assert _match(index, "C1", "the vpn is down", run) is None
+    assert _match(index, "C1", "the VPN is down", run) == 1
+    assert _match(index, "C1", "WiFi is slow", run) == 2
+
+
+def test_many_phrases_use_the_automaton(run):
+    rules = [_rule(i, f"word{i}x") for i in range(1, 40)]
+    index = AutoResponderIndex(rules)
+    assert _match(index, None, "prefix word17x suffix", run) == 17
+    assert _match(index, None, "WORD3X", run) == 3
+    assert _match(index, None, "word", run) is None
+
+
+class _Repo:
+    def __init__(self, rules):
+        self.rules = rules
+        self.loads = 0
+        self.invalidator = SimpleNamespace(subscriptions=0)
+        self.invalidator.subscribe = self._subscribe
+
+    def _subscribe(self, topic, callback):
+        self.invalidator.subscriptions += 1
+
+    async def enabled_rules(self):
+        self.loads += 1
+        return self.rules
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(matcher, "_index", None)
+    monkeypatch.setattr(matcher, "_subscribed", None)
+    clock = [1_000.0]
+    monkeypatch.setattr(matcher.time, "monotonic", lambda: clock[0])
+    return clock
+
+
+def test_index_is_cached_invalidated_and_expires(fresh_index, run):
+    clock = fresh_index
+    repo = _Repo([_rule(1, "hi")])
+
+    async def scenario():
+        await matcher.get_index(repo, max_age=60)
+        await matcher.get_index(repo, max_age=60)
+        assert repo.loads == 1
+        matcher.invalidate()
+        await matcher.get_index(repo, max_age=60)
+        assert repo.loads == 2
+        # A lost invalidation is bounded by the max age.
+        clock[0] += 61
+        await matcher.get_index(repo, max_age=60)
+        assert repo.loads == 3
+
+    run(scenario())
+    assert repo.invalidator.subscriptions == 1
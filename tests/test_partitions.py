@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pytest
+
+from zebras.storage.partitions import drop_partitions, ensure_partitions, parse_partition, partition_name, period_end, period_start
+
+
+def test_period_bounds():
+    assert period_start(date(2025, 9, 14), "month") == date(2025, 9, 1)
+    assert period_start(date(2025, 9, 14), "day") == date(2025, 9, 14)
+    assert period_end(date(2025, 12, 1), "month") == date(2026, 1, 1)
+    assert period_end(date(2025, 2, 28), "day") == date(2025, 3, 1)
+
+
+@pytest.mark.parametrize("start,granularity", [(date(2025, 12, 1), "month"), (date(2024, 2, 29), "day")])
+def test_partition_names_round_trip(start, granularity):
+    name = partition_name(start, granularity)
+    assert parse_partition(name) == (start, period_end(start, granularity))
+
+
+def test_foreign_tables_are_ignored():
+    assert parse_partition("event_logs_default") is None
+    assert parse_partition("event_logs_archive_2024") is None
+
+
+class _Engine:
+    """Records statements; answers the partition listing from `partitions`."""
+
+    def __init__(self, partitions):
+        self.partitions = list(partitions)
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "pg_inherits" in sql:
+            return [(name,) for name in self.partitions]
+        self.statements.append(sql)
+
+    @asynccontextmanager
+    async def begin(self):
+        yield self
+
+
+def test_ensure_creates_missing_periods_only(run):
+    engine = _Engine(["event_logs_p202509"])
+    created = run(ensure_partitions(engine, ahead=2, today=date(2025, 9, 14)))
+    assert created == ["event_logs_p202510", "event_logs_p202511"]
+    attach = [s for s in engine.statements if "ATTACH PARTITION" in s]
+    assert "FROM ('2025-10-01T00:00:00+00:00') TO ('2025-11-01T00:00:00+00:00')" in attach[0]
+    # Rows that fell into the default partition are moved before attaching.
+    moves = [i for i, s in enumerate(engine.statements) if "DELETE FROM event_logs_default" in s]
+    assert moves and moves[0] < engine.statements.index(attach[0])
+
+
+def test_daily_partitions_skip_ranges_covered_by_monthly_ones(run):
+    engine = _Engine(["event_logs_p202509"])
+    created = run(ensure_partitions(engine, granularity="day", ahead=2, today=date(2025, 9, 29)))
+    assert created == ["event_logs_p20251001"]
+
+
+def test_drop_respects_cutoff_and_dry_run(run):
+    names = ["event_logs_p202507", "event_logs_p202508", "event_logs_p202509"]
+    dry = _Engine(names)
+    assert run(drop_partitions(dry, before=date(2025, 9, 1), dry_run=True)) == names[:2]
+    assert dry.statements == []
+
+    engine = _Engine(names)
+    assert run(drop_partitions(engine, before=date(2025, 8, 15))) == names[:1]
+    assert engine.statements[0] == "DROP TABLE event_logs_p202507"
+    assert "DELETE FROM event_logs_default" in engine.statements[-1]
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from zebras.router import Router
+
+
+def _message(**extra):
+    return {"type": "event_callback", "event_id": "Ev1", "event": {"type": "message", **extra}}
+
+
+def test_handlers_in_a_stage_run_concurrently(run):
+    router = Router()
+    started = []
+
+    def handler(name):
+        async def h(evt):
+            started.append(name)
+            await asyncio.sleep(0.1)
+
+        return h
+
+    for name in "abc":
+        router.on("message", handler(name))
+
+    start = time.perf_counter()
+    run(router.dispatch(_message()))
+    assert sorted(started) == ["a", "b", "c"]
+    assert time.perf_counter() - start < 0.25
+
+
+def test_later_stage_waits_for_earlier_one(run):
+    router = Router()
+    order = []
+
+    async def slow(evt):
+        await asyncio.sleep(0.05)
+        order.append("slow")
+
+    async def fast(evt):
+        order.append("fast")
+
+    async def after(evt):
+        order.append("after")
+
+    router.on("message", after, stage=1)
+    router.on("message", slow)
+    router.on("message", fast)
+    run(router.dispatch(_message()))
+    assert order == ["fast", "slow", "after"]
+
+
+def test_sequential_mode_keeps_registration_order(run):
+    router = Router(concurrent=False)
+    order = []
+
+    def handler(name, delay):
+        async def h(evt):
+            await asyncio.sleep(delay)
+            order.append(name)
+
+        return h
+
+    router.on("message", handler("first", 0.05))
+    router.on("message", handler("second", 0))
+    run(router.dispatch(_message()))
+    assert order == ["first", "second"]
+
+
+def test_timeout_and_errors_do_not_affect_other_handlers(run):
+    router = Router(handler_timeout=0.05)
+    done = []
+
+    async def hangs(evt):
+        await asyncio.sleep(10)
+
+    async def fails(evt):
+        raise RuntimeError("boom")
+
+    async def works(evt):
+        done.append(evt["event"]["type"])
+
+    router.on("message", hangs)
+    router.on("message", fails)
+    router.on("message", works)
+    start = time.perf_counter()
+    run(router.dispatch(_message()))
+    assert done == ["message"]
+    assert time.perf_counter() - start < 1
+
+
+def test_per_handler_timeout_overrides_default(run):
+    router = Router(handler_timeout=0.01)
+    done = []
+
+    async def slowish(evt):
+        await asyncio.sleep(0.05)
+        done.append(True)
+
+    router.on("message", slowish, timeout=1)
+    run(router.dispatch(_message()))
+    assert done == [True]
+
+
+def test_routes_by_inner_event_type(run):
+    router = Router()
+    seen = []
+
+    async def on_join(evt):
+        seen.append("join")
+
+    router.on("member_joined_channel", on_join)
+    run(router.dispatch(_message()))
+    run(router.dispatch({"type": "event_callback", "event": {"type": "member_joined_channel"}}))
+    run(router.dispatch({"event": {}}))
+    assert seen == ["join"]
+
+
+def test_middleware_runs_in_registration_order(run):
+    router = Router()
+    order = []
+
+    def mw(name):
+        async def m(evt, nxt):
+            order.append(f"{name}>")
+            await nxt(evt)
+            order.append(f"<{name}")
+
+        return m
+
+    async def handler(evt):
+        order.append("handler")
+
+    router.add_middleware(mw("a"))
+    router.add_middleware(mw("b"))
+    router.on("message", handler)
+    run(router.dispatch(_message()))
+    assert order == ["a>", "b>", "handler", "<b", "<a"]
+
+
+def test_middleware_can_short_circuit(run):
+    router = Router()
+    seen = []
+
+    async def drop(evt, nxt):
+        if evt["event"].get("bot_id"):
+            return
+        await nxt(evt)
+
+    async def handler(evt):
+        seen.append(evt["event"].get("text"))
+
+    router.add_middleware(drop)
+    router.on("message", handler)
+    run(router.dispatch(_message(bot_id="B1", text="bot")))
+    run(router.dispatch(_message(text="human")))
+    assert seen == ["human"]
+
+
+def test_chain_is_rebuilt_after_registration(run):
+    router = Router()
+    seen = []
+
+    async def first(evt):
+        seen.append("first")
+
+    async def second(evt):
+        seen.append("second")
+
+    async def tag(evt, nxt):
+        seen.append("mw")
+        await nxt(evt)
+
+    router.on("message", first)
+    run(router.dispatch(_message()))
+    router.on("message", second)
+    router.add_middleware(tag)
+    run(router.dispatch(_message()))
+    assert seen == ["first", "mw", "first", "second"]
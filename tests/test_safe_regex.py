@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from zebras.plugins.autoresponder.safe_regex import PatternRejected, RegexRunner, compile_pattern, validate_pattern
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        r"(a+)+$",
+        r"(a|aa)+$",
+        r"(a|a)*",
+        r"(\w+\s?)*$",
+        r"^(a*)*$",
+        # Adjacent repeats over the same characters.
+        r"\w*\w*\w*\w*\w*\w*\w*\w*x",
+        r"\s*\s+",
+        # A bounded repeat around an unbounded one.
+        r"(.*a){8}x",
+        # Overlapping character classes in alternations.
+        r"(\w|\d)+",
+        r"(\w|[0-9])*!",
+        r"(",
+    ],
+)
+def test_rejects_catastrophic_or_invalid_patterns(pattern):
+    if _linear(pattern):
+        pytest.skip("RE2 runs this pattern in linear time")
+    with pytest.raises(PatternRejected):
+        validate_pattern(pattern)
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [r"hello\s+world", r"(foo|bar)+", r"^ticket-\d{3,6}$", r"(?:please )?help", r"(\d{1,3}\.){3}\d{1,3}", r"[\w-]+"],
+)
+def test_accepts_safe_patterns(pattern):
+    assert validate_pattern(pattern) == []
+
+
+def test_warns_on_optional_part_inside_repeat():
+    if _linear(r"(?:x?y)+"):
+        pytest.skip("RE2 runs this pattern in linear time")
+    assert validate_pattern(r"(?:x?y)+")
+
+
+def test_case_sensitivity_is_respected():
+    assert compile_pattern("Hello").compiled.search("hello")
+    assert not compile_pattern("Hello", True).compiled.search("hello")
+
+
+def test_slow_pattern_that_passes_validation_is_cut_off(run):
+    # Polynomial rather than exponential, so validation lets it through; it must
+    # still never run on the event loop.
+    pattern = compile_pattern(r".*a.*a.*a.*a.*a.*x")
+    if pattern.linear:
+        pytest.skip("RE2 runs this pattern in linear time")
+
+    async def scenario():
+        runner = RegexRunner(timeout=0.2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        t = asyncio.create_task(ticker())
+        try:
+            await runner.search(1, compile_pattern("warm"), "up")  # start the pool
+            start = time.perf_counter()
+            found = await runner.search(7, pattern, "a" * 200)
+            elapsed = time.perf_counter() - start
+            fine = await runner.search(8, compile_pattern(r"hello\s+world"), "hello  world")
+        finally:
+            t.cancel()
+            await runner.close()
+        return found, elapsed, fine, ticks, runner.timing(7)
+
+    found, elapsed, fine, ticks, timing = run(scenario())
+    assert found is False
+    assert elapsed < 2.0
+    assert fine is True
+    assert ticks > 5
+    assert timing["timeouts"] == 1
+
+
+def _linear(pattern: str) -> bool:
+    try:
+        return compile_pattern(pattern).linear
+    except Exception:
+        return False
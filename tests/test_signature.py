@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException  # noqa: E402
+
+from zebras.http.app import SlackSignatureVerifier  # noqa: E402
+
+SECRET = "8f742231b10e8888abcd99yyyzzz85a5"
+
+
+def _request(body: bytes, *, ts: int | None = None, secret: str = SECRET) -> SimpleNamespace:
+    stamp = str(int(time.time()) if ts is None else ts)
+    sig = "v0=" + hmac.new(secret.encode(), b"v0:" + stamp.encode() + b":" + body, hashlib.sha256).hexdigest()
+    return SimpleNamespace(headers={"X-Slack-Request-Timestamp": stamp, "X-Slack-Signature": sig})
+
+
+def _detail(verifier: SlackSignatureVerifier, req: SimpleNamespace, body: bytes) -> str:
+    with pytest.raises(HTTPException) as exc:
+        verifier.verify(req, body)
+    assert exc.value.status_code == 401
+    return exc.value.detail
+
+
+def test_accepts_a_fresh_signed_request():
+    body = b'{"type":"event_callback"}'
+    SlackSignatureVerifier(SECRET).verify(_request(body), body)
+
+
+def test_rejects_a_replayed_request():
+    verifier = SlackSignatureVerifier(SECRET)
+    body = b"command=%2Frules&text=list"
+    req = _request(body)
+    verifier.verify(req, body)
+    assert _detail(verifier, req, body) == "Replayed request"
+
+
+def test_rejects_a_stale_request():
+    body = b"{}"
+    req = _request(body, ts=int(time.time()) - 301)
+    assert _detail(SlackSignatureVerifier(SECRET), req, body) == "Stale request"
+
+
+def test_rejects_a_tampered_body():
+    req = _request(b'{"a":1}')
+    assert _detail(SlackSignatureVerifier(SECRET), req, b'{"a":2}') == "Invalid signature"
+
+
+def test_rejects_the_wrong_secret():
+    body = b"{}"
+    assert _detail(SlackSignatureVerifier(SECRET), _request(body, secret="other"), body) == "Invalid signature"
+
+
+def test_rejects_missing_or_malformed_headers():
+    verifier = SlackSignatureVerifier(SECRET)
+    assert _detail(verifier, SimpleNamespace(headers={}), b"") == "Missing Slack signature"
+    bad_ts = SimpleNamespace(headers={"X-Slack-Request-Timestamp": "soon", "X-Slack-Signature": "v0=00"})
+    assert _detail(verifier, bad_ts, b"") == "Invalid timestamp"